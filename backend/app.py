@@ -1,7 +1,7 @@
 """
 Aplicação principal Flask para o FinTracker API
 """
-from flask import Flask
+from flask import Flask, g
 from flask_cors import CORS
 from dotenv import load_dotenv
 import os
@@ -18,6 +18,9 @@ from routes import mfa_routes  # Rotas de autenticação em 2 fatores
 from routes import transaction_routes  # Rotas de transações
 from routes import notification_routes  # Rotas de notificações
 from routes import group_routes  # Rotas de grupos
+from services.stock_cache_service import warm_up_stock_cache
+from services.market_data_scheduler_service import MARKET_SCHEDULER_ENABLED, start_market_scheduler
+from utils.request_loader import begin_request_scope, end_request_scope
 
 # Carrega variáveis de ambiente
 load_dotenv()
@@ -43,6 +46,25 @@ def create_app(config_class=Config):
     app.register_blueprint(notification_routes.bp)  # Rotas de notificações
     app.register_blueprint(group_routes.bp)  # Rotas de grupos
     
+    # Mapa de identidade por requisição (usuários, grupos e membros carregados uma vez por requisição)
+    @app.before_request
+    def open_request_scope():
+        g.request_loader_token = begin_request_scope()
+
+    @app.teardown_request
+    def close_request_scope(exc):
+        token = g.pop('request_loader_token', None)
+        if token is not None:
+            end_request_scope(token)
+    
+    # Carrega o mapeamento ticker -> stock_id em memória e agenda recargas periódicas
+    if not app.config.get('TESTING'):
+        warm_up_stock_cache()
+    
+        # Atualiza preços das ações acompanhadas em segundo plano (MARKET_SCHEDULER_ENABLED=true)
+        if MARKET_SCHEDULER_ENABLED:
+            start_market_scheduler()
+    
     return app
 
 # Cria a aplicação
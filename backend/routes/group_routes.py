@@ -1,7 +1,7 @@
 """
 Rotas para gerenciamento de grupos.
 """
-from flask import Blueprint, jsonify, g, request
+from flask import Blueprint, jsonify, g, make_response, request
 
 from services.group_service import (
     accept_invite,
@@ -16,6 +16,7 @@ from services.group_service import (
     demote_member,
     get_group,
     get_invite_link,
+    get_group_portfolio,
     get_invite_preview,
     get_member_wallet,
     join_group,
@@ -35,6 +36,18 @@ from utils.auth_context import require_authenticated_user
 bp = Blueprint('groups', __name__)
 
 
+def _wants_full_wallet() -> bool:
+    return request.args.get('full', 'false').lower() == 'true'
+
+
+def _with_wallet_etag(response, result):
+    """ETag com a versão da carteira do membro (transações, quantidades e preços)."""
+    wallet_etag = (result.get('data') or {}).get('walletEtag')
+    if wallet_etag:
+        response.set_etag(wallet_etag, weak=True)
+    return response
+
+
 @bp.route('/api/groups', methods=['POST'])
 @require_authenticated_user(allow_legacy=False)
 def create_group_route():
@@ -90,20 +103,31 @@ def list_my_groups_route():
 @bp.route('/api/groups/public', methods=['GET'])
 @require_authenticated_user(allow_legacy=False)
 def list_public_groups_route():
-    """Lista grupos públicos disponíveis para descoberta."""
+    """
+    Lista grupos públicos disponíveis para descoberta.
+
+    Query: q (busca no nome), limit e cursor (next_cursor da página anterior).
+    """
     try:
-        result = list_public_groups(g.auth_user_id)
+        result = list_public_groups(
+            g.auth_user_id,
+            limit=request.args.get('limit'),
+            cursor=request.args.get('cursor'),
+            search=request.args.get('q'),
+        )
 
         if result['success']:
             return jsonify({
                 'status': 'success',
                 'data': result.get('data', []),
+                'next_cursor': result.get('next_cursor'),
+                'has_more': result.get('has_more', False),
             }), 200
 
         return jsonify({
             'status': 'error',
             'message': result.get('message', 'Erro ao listar grupos públicos'),
-        }), 500
+        }), result.get('status_code', 500)
     except Exception as error:
         print(f'Erro na rota GET /api/groups/public: {error}')
         return jsonify({
@@ -539,16 +563,43 @@ def accept_invite_route(token):
 @bp.route('/api/groups/<group_id>/members/<member_user_id>/wallet', methods=['GET'])
 @require_authenticated_user(allow_legacy=False)
 def get_member_wallet_route(group_id, member_user_id):
-    """Retorna carteira e transações de um membro."""
+    """
+    Retorna carteira e transações de um membro (todas, ou uma página com cursor/limit).
+
+    Sem cursor/limit responde 304 quando If-None-Match traz o walletEtag atual.
+    """
     try:
-        result = get_member_wallet(group_id, g.auth_user_id, member_user_id)
+        cursor = request.args.get('cursor')
+        limit = request.args.get('limit')
+        # O ETag descreve a carteira completa: páginas não são condicionais
+        paged = cursor is not None or limit is not None
+        known_etags = None
+        if not paged:
+            known_etags = request.if_none_match.as_set(include_weak=True)
+            if request.if_none_match.star_tag:
+                known_etags.add('*')
+
+        result = get_member_wallet(
+            group_id,
+            g.auth_user_id,
+            member_user_id,
+            cursor=cursor,
+            limit=limit,
+            known_etags=known_etags,
+        )
         status_code = result.get('status_code', 200 if result['success'] else 400)
 
+        if result.get('not_modified'):
+            return _with_wallet_etag(make_response('', 304), result)
+
         if result['success']:
-            return jsonify({
+            response = jsonify({
                 'status': 'success',
                 'data': result.get('data'),
-            }), 200
+            })
+            if not paged:
+                response = _with_wallet_etag(response, result)
+            return response, 200
 
         return jsonify({
             'status': 'error',
@@ -562,10 +613,36 @@ def get_member_wallet_route(group_id, member_user_id):
         }), 500
 
 
+@bp.route('/api/groups/<group_id>/portfolio', methods=['GET'])
+@require_authenticated_user(allow_legacy=False)
+def get_group_portfolio_route(group_id):
+    """Retorna a carteira agregada do grupo (membros visíveis, totais e maiores posições)."""
+    try:
+        result = get_group_portfolio(group_id, g.auth_user_id)
+        status_code = result.get('status_code', 200 if result['success'] else 400)
+
+        if result['success']:
+            return jsonify({
+                'status': 'success',
+                'data': result.get('data'),
+            }), 200
+
+        return jsonify({
+            'status': 'error',
+            'message': result.get('message', 'Erro ao carregar carteira do grupo'),
+        }), status_code
+    except Exception as error:
+        print(f'Erro na rota GET group portfolio: {error}')
+        return jsonify({
+            'status': 'error',
+            'message': f'Erro interno: {str(error)}',
+        }), 500
+
+
 @bp.route('/api/groups/<group_id>/members/<member_user_id>/transactions', methods=['POST'])
 @require_authenticated_user(allow_legacy=False)
 def create_member_transaction_route(group_id, member_user_id):
-    """Cria transação na carteira de um membro quando permitido."""
+    """Cria transação na carteira de um membro (responde com o delta; full=true devolve a carteira)."""
     try:
         payload = request.get_json(silent=True) or {}
         result = create_member_transaction(
@@ -573,15 +650,16 @@ def create_member_transaction_route(group_id, member_user_id):
             g.auth_user_id,
             member_user_id,
             payload,
+            full=_wants_full_wallet(),
         )
         status_code = result.get('status_code', 201 if result['success'] else 400)
 
         if result['success']:
-            return jsonify({
+            return _with_wallet_etag(jsonify({
                 'status': 'success',
                 'message': result.get('message'),
                 'data': result.get('data'),
-            }), 201
+            }), result), 201
 
         return jsonify({
             'status': 'error',
@@ -598,7 +676,7 @@ def create_member_transaction_route(group_id, member_user_id):
 @bp.route('/api/groups/<group_id>/members/<member_user_id>/transactions/<transaction_id>', methods=['PATCH'])
 @require_authenticated_user(allow_legacy=False)
 def update_member_transaction_route(group_id, member_user_id, transaction_id):
-    """Atualiza transação na carteira de um membro quando permitido."""
+    """Atualiza transação na carteira de um membro (responde com o delta; full=true devolve a carteira)."""
     try:
         payload = request.get_json(silent=True) or {}
         result = update_member_transaction(
@@ -607,15 +685,16 @@ def update_member_transaction_route(group_id, member_user_id, transaction_id):
             member_user_id,
             transaction_id,
             payload,
+            full=_wants_full_wallet(),
         )
         status_code = result.get('status_code', 200 if result['success'] else 400)
 
         if result['success']:
-            return jsonify({
+            return _with_wallet_etag(jsonify({
                 'status': 'success',
                 'message': result.get('message'),
                 'data': result.get('data'),
-            }), 200
+            }), result), 200
 
         return jsonify({
             'status': 'error',
@@ -632,22 +711,23 @@ def update_member_transaction_route(group_id, member_user_id, transaction_id):
 @bp.route('/api/groups/<group_id>/members/<member_user_id>/transactions/<transaction_id>', methods=['DELETE'])
 @require_authenticated_user(allow_legacy=False)
 def delete_member_transaction_route(group_id, member_user_id, transaction_id):
-    """Remove transação na carteira de um membro quando permitido."""
+    """Remove transação na carteira de um membro (responde com o delta; full=true devolve a carteira)."""
     try:
         result = delete_member_transaction(
             group_id,
             g.auth_user_id,
             member_user_id,
             transaction_id,
+            full=_wants_full_wallet(),
         )
         status_code = result.get('status_code', 200 if result['success'] else 400)
 
         if result['success']:
-            return jsonify({
+            return _with_wallet_etag(jsonify({
                 'status': 'success',
                 'message': result.get('message'),
                 'data': result.get('data'),
-            }), 200
+            }), result), 200
 
         return jsonify({
             'status': 'error',
@@ -21,3 +21,50 @@ def health_check():
         'version': '1.0.0'
     }), 200
 
+
+@bp.route('/health/stats', methods=['GET'])
+def health_stats():
+    """
+    Endpoint com estatísticas dos caches e da coalescência de buscas externas
+    
+    Returns:
+        JSON com contadores por subsistema (ex: chamadas coalescidas por fonte)
+    """
+    from services.brapi_price_service import brapi_flight, brapi_client, brapi_negative_cache
+    from services.yahoo_dividend_service import yahoo_flight, yahoo_negative_cache
+    from services.orchestration_service import refresh_flight
+    from services.stock_cache_service import get_stock_cache_stats, db_negative_cache
+    from services.stock_view_cache_service import get_view_cache_stats
+    from services.market_data_scheduler_service import get_scheduler_status
+    from services.price_stream_service import price_hub
+    from services.price_history_service import get_price_history_stats
+    from services.group_portfolio_service import get_group_portfolio_stats
+    from utils.auth_context import get_auth_stats
+    
+    return jsonify({
+        'status': 'success',
+        'timestamp': datetime.utcnow().isoformat(),
+        'data': {
+            'single_flight': {
+                'brapi': brapi_flight.stats(),
+                'yahoo': yahoo_flight.stats(),
+                'page_view_refresh': refresh_flight.stats()
+            },
+            'http_clients': {
+                'brapi': brapi_client.stats()
+            },
+            'negative_cache': {
+                'db': db_negative_cache.stats(),
+                'brapi': brapi_negative_cache.stats(),
+                'yahoo': yahoo_negative_cache.stats()
+            },
+            'stock_cache': get_stock_cache_stats(),
+            'view_cache': get_view_cache_stats(),
+            'price_history': get_price_history_stats(),
+            'group_portfolio': get_group_portfolio_stats(),
+            'market_scheduler': get_scheduler_status(),
+            'price_stream': price_hub.stats(),
+            'auth': get_auth_stats()
+        }
+    }), 200
+
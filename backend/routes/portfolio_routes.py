@@ -1,7 +1,10 @@
 """
 Rotas para gerenciamento de portfolio e watchlist
 """
-from flask import Blueprint, request, jsonify, g
+import json
+import os
+import time
+from flask import Blueprint, request, jsonify, g, Response, stream_with_context
 from services.portfolio_service import (
     add_to_portfolio,
     add_to_watchlist,
@@ -15,8 +18,14 @@ from services.portfolio_service import (
     update_portfolio_prices_on_login,
     update_watchlist_prices_on_login
 )
+from services.price_stream_service import price_hub, get_user_holdings
+from services.portfolio_analytics_service import get_portfolio_analytics, DEFAULT_ANALYTICS_RANGE
 from utils.auth_context import require_authenticated_user
 
+# Stream SSE: intervalo do heartbeat e duração máxima de cada conexão
+SSE_HEARTBEAT_SECONDS = float(os.getenv('SSE_HEARTBEAT_SECONDS', '15'))
+SSE_MAX_STREAM_SECONDS = float(os.getenv('SSE_MAX_STREAM_SECONDS', '300'))
+
 portfolio_bp = Blueprint('portfolio', __name__)
 
 @portfolio_bp.route('/api/portfolio/add', methods=['POST'])
@@ -318,6 +327,117 @@ def get_portfolio_full():
         }), 500
 
 
+@portfolio_bp.route('/api/portfolio/analytics', methods=['GET'])
+@require_authenticated_user(allow_legacy=False)
+def get_portfolio_analytics_route():
+    """
+    GET /api/portfolio/analytics?range=3m
+    
+    Métricas da carteira no período (7d, 1m, 3m, 6m, 1y), a partir dos
+    preços em cache e das transações do usuário
+    
+    Response: {
+        "status": "success",
+        "data": {
+            "range": "3m",
+            "series": [{"date": "2024-01-15", "value": 1311.50}, ...],
+            "twr": 0.042,
+            "volatility": 0.21,
+            "max_drawdown": -0.057,
+            "assets": [
+                {"ticker": "PETR4", "quantity": 43, "value": 1311.50, "weight": 0.62,
+                 "pnl": 54.18, "contribution": 0.027},
+                ...
+            ]
+        }
+    }
+    """
+    try:
+        user_id = g.auth_user_id
+        range_param = request.args.get('range', DEFAULT_ANALYTICS_RANGE)
+        
+        result = get_portfolio_analytics(user_id, range_param)
+        
+        if result['success']:
+            return jsonify({
+                "status": "success",
+                "data": result['data']
+            }), 200
+        else:
+            return jsonify({
+                "status": "error",
+                "message": result['message']
+            }), 400
+            
+    except Exception as e:
+        print(f"Erro ao calcular análise do portfolio: {str(e)}")
+        return jsonify({
+            "status": "error",
+            "message": f"Erro interno: {str(e)}"
+        }), 500
+
+
+def _sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@portfolio_bp.route('/api/portfolio/stream', methods=['GET'])
+@require_authenticated_user(allow_legacy=False)
+def stream_portfolio_prices():
+    """
+    GET /api/portfolio/stream
+    
+    Stream Server-Sent Events com os preços novos das ações da carteira,
+    publicados assim que o backend grava preços (save_prices / save_prices_bulk).
+    Substitui o polling de /api/portfolio/full.
+    
+    O token vai no header Authorization, então o cliente deve consumir o
+    stream com fetch() (EventSource não envia headers). A conexão é encerrada
+    após SSE_MAX_STREAM_SECONDS; o cliente reconecta e recebe a carteira atualizada.
+    
+    Eventos:
+        event: ready   data: {"tickers": ["PETR4", "VALE3"]}
+        event: price   data: {"stock_id": "...", "ticker": "PETR4", "date": "2024-01-15", "price": 30.5}
+        : heartbeat    (comentário a cada SSE_HEARTBEAT_SECONDS)
+    """
+    try:
+        holdings = get_user_holdings(g.auth_user_id)
+    except Exception as e:
+        print(f"Erro ao abrir stream do portfolio: {str(e)}")
+        return jsonify({
+            "status": "error",
+            "message": f"Erro interno: {str(e)}"
+        }), 500
+    
+    subscription = price_hub.subscribe(holdings.keys())
+    
+    def generate():
+        deadline = time.monotonic() + SSE_MAX_STREAM_SECONDS
+        try:
+            yield _sse_event("ready", {"tickers": sorted(holdings.values())})
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                message = subscription.get(timeout=min(SSE_HEARTBEAT_SECONDS, remaining))
+                if message is None:
+                    yield ": heartbeat\n\n"
+                else:
+                    yield _sse_event("price", message)
+        finally:
+            # Cliente desconectou ou o stream expirou
+            price_hub.unsubscribe(subscription)
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+
 @portfolio_bp.route('/api/portfolio/update-prices-login', methods=['POST'])
 @require_authenticated_user(allow_legacy=False)
 def update_prices_on_login():
@@ -331,6 +451,9 @@ def update_prices_on_login():
         "status": "success",
         "data": {
             "updated_count": 3,
+            "failed": [],
+            "timed_out": [],
+            "partial": false,
             "message": "3 preços atualizados no login"
         }
     }
@@ -345,6 +468,9 @@ def update_prices_on_login():
                 "status": "success",
                 "data": {
                     "updated_count": result['updated_count'],
+                    "failed": result.get('failed', []),
+                    "timed_out": result.get('timed_out', []),
+                    "partial": result.get('partial', False),
                     "message": result['message']
                 }
             }), 200
@@ -415,6 +541,9 @@ def update_watchlist_prices_on_login_route():
         "status": "success",
         "data": {
             "updated_count": 3,
+            "failed": [],
+            "timed_out": [],
+            "partial": false,
             "message": "3 ações da watchlist atualizadas no login"
         }
     }
@@ -429,6 +558,9 @@ def update_watchlist_prices_on_login_route():
                 "status": "success",
                 "data": {
                     "updated_count": result['updated_count'],
+                    "failed": result.get('failed', []),
+                    "timed_out": result.get('timed_out', []),
+                    "partial": result.get('partial', False),
                     "message": result['message']
                 }
             }), 200
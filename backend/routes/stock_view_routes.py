@@ -4,7 +4,7 @@ Endpoint chamado quando usuário acessa a página de uma ação
 """
 from flask import Blueprint, jsonify, request
 from datetime import datetime
-from services.orchestration_service import update_stock_on_page_view
+from services.orchestration_service import update_stock_on_page_view, get_revalidation_status
 
 bp = Blueprint('stock_view', __name__, url_prefix='/api')
 
@@ -20,6 +20,10 @@ def view_stock(ticker: str):
     Query Parameters:
         range: Período do histórico (padrão: "3m")
                Opções: "7d", "1m", "3m"
+        swr: Se "true", dados desatualizados são retornados na hora
+             (data.stale=true, data.age) e a atualização roda em segundo plano;
+             acompanhe em GET /stocks/<ticker>/view/status e repita o POST
+             quando state="done"
     
     Returns:
         JSON com dados da ação (preços e dividendos)
@@ -67,6 +71,7 @@ def view_stock(ticker: str):
         # ========================================================================
         range_param = request.args.get('range', default='3m', type=str)
         force_update = request.args.get('force_update', default='false', type=str).lower() == 'true'
+        stale_while_revalidate = request.args.get('swr', default='false', type=str).lower() == 'true'
         
         # ========================================================================
         # VALIDAÇÃO: Verificar se range é válido
@@ -84,7 +89,7 @@ def view_stock(ticker: str):
         # ORQUESTRAÇÃO: Chamar função que coordena todas as operações
         # ========================================================================
         print(f"[INFO] force_update={force_update}")
-        result = update_stock_on_page_view(ticker, range_param, force_update)
+        result = update_stock_on_page_view(ticker, range_param, force_update, stale_while_revalidate)
         
         # ========================================================================
         # RESPOSTA: Processar resultado da orquestração
@@ -117,6 +122,42 @@ def view_stock(ticker: str):
         }), 500
 
 
+@bp.route('/stocks/<ticker>/view/status', methods=['GET'])
+def view_stock_status(ticker: str):
+    """
+    Estado da atualização em segundo plano disparada por /view?swr=true
+    
+    Query Parameters:
+        range: Período do histórico (padrão: "3m")
+    
+    Example:
+        GET /api/stocks/PETR4/view/status?range=3m
+        
+        Response (200):
+        {
+            "status": "success",
+            "timestamp": "2024-10-17T12:30:46",
+            "data": {"state": "done", "prices_updated": true, "dividends_updated": false, ...}
+        }
+    """
+    range_param = request.args.get('range', default='3m', type=str)
+    status = get_revalidation_status(ticker, range_param)
+    
+    if status is None:
+        return jsonify({
+            "status": "error",
+            "message": f"Nenhuma atualização em segundo plano para {ticker.upper()} ({range_param})",
+            "timestamp": datetime.utcnow().isoformat(),
+            "error": "Not found"
+        }), 404
+    
+    return jsonify({
+        "status": "success",
+        "timestamp": datetime.utcnow().isoformat(),
+        "data": status
+    }), 200
+
+
 @bp.route('/stocks/<ticker>/refresh', methods=['POST'])
 def refresh_stock(ticker: str):
     """
@@ -9,6 +9,7 @@ from services.transaction_service import (
     update_transaction,
     delete_transaction,
 )
+from services.position_service import get_user_positions
 from utils.auth_context import require_authenticated_user
 
 
@@ -47,17 +48,33 @@ def create_transaction_route():
 @transactions_bp.route('/api/transactions', methods=['GET'])
 @require_authenticated_user(allow_legacy=False)
 def list_transactions_route():
-    """Lista transações do usuário autenticado."""
+    """
+    Lista transações do usuário autenticado (mais recentes primeiro).
+
+    Sem limit nem cursor devolve todas; com limit/cursor (next_cursor da página
+    anterior) devolve uma página. Query também aceita stock_id, ticker,
+    date_from/date_to (YYYY-MM-DD) e fields (ex: "id,ticker,type,quantity,date").
+    """
     try:
         user_id = g.auth_user_id
-        stock_id = request.args.get('stock_id')
 
-        result = list_transactions(user_id, stock_id=stock_id)
+        result = list_transactions(
+            user_id,
+            stock_id=request.args.get('stock_id'),
+            limit=request.args.get('limit'),
+            cursor=request.args.get('cursor'),
+            date_from=request.args.get('date_from'),
+            date_to=request.args.get('date_to'),
+            ticker=request.args.get('ticker'),
+            fields=request.args.get('fields')
+        )
 
         if result['success']:
             return jsonify({
                 "status": "success",
-                "data": result.get('data', [])
+                "data": result.get('data', []),
+                "next_cursor": result.get('next_cursor'),
+                "has_more": result.get('has_more', False)
             }), 200
 
         return jsonify({
@@ -72,6 +89,40 @@ def list_transactions_route():
         }), 500
 
 
+@transactions_bp.route('/api/transactions/positions', methods=['GET'])
+@require_authenticated_user(allow_legacy=False)
+def list_positions_route():
+    """
+    Posições do usuário derivadas das transações (custo médio e lucro).
+
+    Query: include_closed=true inclui ações zeradas; rebuild=true reprocessa o histórico.
+    """
+    try:
+        user_id = g.auth_user_id
+        include_closed = request.args.get('include_closed', 'false').lower() == 'true'
+        rebuild = request.args.get('rebuild', 'false').lower() == 'true'
+
+        result = get_user_positions(user_id, include_closed=include_closed, rebuild=rebuild)
+
+        if result['success']:
+            return jsonify({
+                "status": "success",
+                "data": result.get('data', []),
+                "totals": result.get('totals', {})
+            }), 200
+
+        return jsonify({
+            "status": "error",
+            "message": result.get('message', 'Erro ao calcular posições')
+        }), 400
+    except Exception as error:
+        print(f"Erro ao calcular posições: {str(error)}")
+        return jsonify({
+            "status": "error",
+            "message": f"Erro interno: {str(error)}"
+        }), 500
+
+
 @transactions_bp.route('/api/transactions/<transaction_id>', methods=['PATCH'])
 @require_authenticated_user(allow_legacy=False)
 def update_transaction_route(transaction_id):
@@ -4,10 +4,15 @@ Busca histórico de preços de ações brasileiras
 """
 import os
 import requests
-from datetime import datetime
+from datetime import datetime, date
 from typing import List, Dict, Optional
 from dotenv import load_dotenv
 from services.update_detection_service import get_last_trading_day
+from services.trading_calendar_service import sessions_between
+from utils.singleflight import SingleFlight
+from utils.http_client import MarketDataHttpClient
+from utils.resilience import CircuitOpenError
+from utils.cache import NegativeCache
 
 # Carrega variáveis de ambiente
 load_dotenv()
@@ -18,6 +23,41 @@ BRAPI_TOKEN = os.getenv('BRAPI_TOKEN')
 # URL base da BraAPI
 BRAPI_BASE_URL = "https://brapi.dev/api/quote"
 
+# Quantidade máxima de tickers por requisição em lote (/quote/PETR4,VALE3,...)
+BRAPI_BATCH_CHUNK_SIZE = int(os.getenv('BRAPI_BATCH_CHUNK_SIZE', '10'))
+
+# Ranges da BraAPI usados na busca incremental, do menor para o maior,
+# com a quantidade de dias corridos que cada um cobre com segurança
+INCREMENTAL_RANGES = [
+    ("1d", 1),
+    ("5d", 5),
+    ("7d", 7),
+    ("1mo", 30),
+    ("3mo", 90),
+    ("6mo", 180),
+    ("1y", 365),
+    ("2y", 730),
+    ("5y", 1825),
+]
+
+# Cliente HTTP compartilhado: conexões keep-alive, retries com backoff e circuit breaker
+brapi_client = MarketDataHttpClient(
+    "brapi",
+    pool_maxsize=int(os.getenv('BRAPI_POOL_MAXSIZE', '10')),
+    max_retries=int(os.getenv('BRAPI_MAX_RETRIES', '2')),
+    backoff_base=float(os.getenv('BRAPI_BACKOFF_BASE_SECONDS', '0.5')),
+    breaker_threshold=int(os.getenv('BRAPI_BREAKER_THRESHOLD', '5')),
+    breaker_reset_timeout=float(os.getenv('BRAPI_BREAKER_RESET_SECONDS', '30'))
+)
+
+# Tickers rejeitados pela BraAPI (404/sem dados) não são consultados de novo por um tempo
+NEGATIVE_CACHE_BRAPI_TTL_SECONDS = int(os.getenv('NEGATIVE_CACHE_BRAPI_TTL_SECONDS', '600'))
+
+brapi_negative_cache = NegativeCache("brapi", ttl=NEGATIVE_CACHE_BRAPI_TTL_SECONDS)
+
+# Coalesce buscas simultâneas do mesmo (ticker, período) em uma única requisição
+brapi_flight = SingleFlight("brapi")
+
 
 def convert_timestamp_to_date(timestamp: int) -> str:
     """
@@ -72,6 +112,19 @@ def fetch_prices_from_brapi(ticker: str, range_period: str = "3m") -> Optional[L
     """
     Busca o histórico de preços de uma ação na BraAPI
     
+    Chamadas simultâneas para o mesmo (ticker, período) são coalescidas:
+    apenas uma requisição é feita e todos recebem o mesmo resultado.
+    
+    Args e retorno: ver _fetch_prices_from_brapi()
+    """
+    key = (str(ticker).upper().strip(), normalize_range_period(range_period))
+    return brapi_flight.do(key, lambda: _fetch_prices_from_brapi(ticker, range_period))
+
+
+def _fetch_prices_from_brapi(ticker: str, range_period: str = "3m") -> Optional[List[Dict[str, any]]]:
+    """
+    Busca o histórico de preços de uma ação na BraAPI (sem coalescência)
+    
     Args:
         ticker: Código da ação (ex: "PETR4", "VALE3")
         range_period: Período do histórico - opções:
@@ -111,6 +164,10 @@ def fetch_prices_from_brapi(ticker: str, range_period: str = "3m") -> Optional[L
     # Formata o ticker (sempre em maiúsculas e sem espaços)
     ticker = ticker.upper().strip()
     
+    # Ticker rejeitado recentemente: não consulta a API de novo
+    if brapi_negative_cache.is_negative(ticker):
+        return None
+    
     # Normaliza o período para o formato da BraAPI (converte 1m -> 1mo, etc)
     normalized_period = normalize_range_period(range_period)
     
@@ -134,7 +191,7 @@ def fetch_prices_from_brapi(ticker: str, range_period: str = "3m") -> Optional[L
         print(f"[INFO] Buscando preços de {ticker} (período: {range_period} -> {normalized_period})...")
         
         # Faz a requisição para a BraAPI
-        response = requests.get(url, params=params, headers=headers, timeout=10)
+        response = brapi_client.get(url, params=params, headers=headers, timeout=10)
         
         # Tratamento de diferentes códigos de status HTTP
         if response.status_code == 200:
@@ -149,6 +206,7 @@ def fetch_prices_from_brapi(ticker: str, range_period: str = "3m") -> Optional[L
             # Valida estrutura da resposta
             if 'results' not in data or not data['results']:
                 print(f"[ERRO] Nenhum dado encontrado para {ticker}")
+                brapi_negative_cache.remember(ticker)
                 return None
             
             # Extrai o primeiro resultado (dados da ação)
@@ -218,6 +276,7 @@ def fetch_prices_from_brapi(ticker: str, range_period: str = "3m") -> Optional[L
         elif response.status_code == 404:
             print(f"[ERRO 404] Ação '{ticker}' não encontrada")
             print("Verifique se o ticker está correto (ex: PETR4, VALE3, ITUB4)")
+            brapi_negative_cache.remember(ticker)
             return None
             
         elif response.status_code == 403:
@@ -237,6 +296,10 @@ def fetch_prices_from_brapi(ticker: str, range_period: str = "3m") -> Optional[L
             print(f"Detalhes: {response.text[:200]}")
             return None
             
+    except CircuitOpenError:
+        print("[ERRO] BraAPI indisponível após falhas consecutivas - aguardando para tentar novamente")
+        return None
+        
     except requests.exceptions.Timeout:
         print("[ERRO] Timeout na requisição")
         print("A API demorou muito para responder. Tente novamente.")
@@ -279,6 +342,79 @@ def validate_range_period(range_period: str) -> bool:
     return range_period in valid_periods or range_period in alternative_periods
 
 
+def select_range_for_gap(gap_days: int, max_range: Optional[str] = None) -> str:
+    """
+    Escolhe o menor range da BraAPI que cobre uma janela de dias
+    
+    A BraAPI não aceita datas de início/fim, apenas ranges fixos; então a
+    janela faltante é arredondada para o menor range que a contém.
+    
+    Args:
+        gap_days: Dias corridos que precisam ser buscados (inclui hoje)
+        max_range: Range máximo (ex: o range pedido pela página); nunca é ultrapassado
+        
+    Returns:
+        Range no formato da BraAPI (ex: "5d", "1mo")
+        
+    Example:
+        >>> select_range_for_gap(3)
+        '5d'
+        >>> select_range_for_gap(40, max_range="1m")
+        '1mo'
+    """
+    range_days = dict(INCREMENTAL_RANGES)
+    max_period = normalize_range_period(max_range) if max_range else None
+    max_days = range_days.get(max_period) if max_period else None
+    
+    for period, days in INCREMENTAL_RANGES:
+        if max_days is not None and days >= max_days:
+            return max_period
+        if days >= gap_days:
+            return period
+    
+    return max_period or INCREMENTAL_RANGES[-1][0]
+
+
+def fetch_prices_since(ticker: str, since: date, max_range: Optional[str] = None) -> Optional[List[Dict[str, any]]]:
+    """
+    Busca apenas os preços a partir de uma data (busca incremental)
+    
+    Usa a data do último preço em cache como marca d'água: pede à BraAPI o
+    menor range que cobre a janela faltante e descarta o que já está em cache.
+    O próprio dia `since` é mantido, pois pode ter sido salvo durante o pregão.
+    
+    Args:
+        ticker: Código da ação
+        since: Data do preço mais recente em cache
+        max_range: Range pedido pela página (limita a janela buscada)
+        
+    Returns:
+        Lista [{"date": "YYYY-MM-DD", "price": float}] com datas >= since,
+        ou None em caso de erro
+        
+    Example:
+        >>> fetch_prices_since("PETR4", date(2024, 1, 12), max_range="3m")
+        [{"date": "2024-01-12", "price": 28.4}, {"date": "2024-01-15", "price": 28.5}]
+    """
+    today = datetime.now().date()
+    gap_days = (today - since).days + 1
+    
+    # "5d" são 5 pregões: fins de semana e feriados da B3 não contam na janela
+    missing_sessions = sessions_between(since, today) + 1
+    if missing_sessions <= 5:
+        gap_days = min(gap_days, 1 if missing_sessions <= 1 else 5)
+    
+    period = select_range_for_gap(gap_days, max_range)
+    
+    print(f"[INFO] Busca incremental de {ticker}: desde {since} ({gap_days} dia(s) -> range {period})")
+    prices = fetch_prices_from_brapi(ticker, period)
+    if prices is None:
+        return None
+    
+    since_str = since.strftime('%Y-%m-%d')
+    return [item for item in prices if item["date"] >= since_str]
+
+
 def get_price_summary(ticker: str, range_period: str = "3m") -> Optional[Dict[str, any]]:
     """
     Retorna um resumo dos preços (último preço, variação, etc.)
@@ -329,6 +465,239 @@ def get_price_summary(ticker: str, range_period: str = "3m") -> Optional[Dict[st
     }
 
 
+def _chunk_tickers(tickers: List[str], chunk_size: int) -> List[List[str]]:
+    """
+    Normaliza (maiúsculas, sem espaços, sem duplicatas) e divide os tickers em blocos
+    
+    Args:
+        tickers: Lista de códigos de ações
+        chunk_size: Tamanho máximo de cada bloco
+        
+    Returns:
+        Lista de blocos de tickers, preservando a ordem original
+        
+    Example:
+        >>> _chunk_tickers(["petr4", "VALE3", "PETR4", "ITUB4"], 2)
+        [['PETR4', 'VALE3'], ['ITUB4']]
+    """
+    normalized = []
+    seen = set()
+    for ticker in tickers:
+        if not ticker:
+            continue
+        clean = str(ticker).upper().strip()
+        if clean and clean not in seen:
+            seen.add(clean)
+            normalized.append(clean)
+    
+    size = max(1, int(chunk_size))
+    return [normalized[i:i + size] for i in range(0, len(normalized), size)]
+
+
+def _fetch_quote_results(tickers: List[str], params: Dict[str, str], chunk_size: int) -> Dict[str, Dict[str, any]]:
+    """
+    Consulta a BraAPI em lotes (/quote/PETR4,VALE3,...) e indexa os resultados por ticker
+    
+    Cada bloco de até chunk_size tickers custa UMA requisição HTTP.
+    Se um bloco com mais de um ticker for rejeitado com 404 (a BraAPI recusa o lote
+    inteiro quando um dos tickers não existe), o bloco é refeito ticker a ticker para
+    que os tickers válidos não sejam perdidos.
+    
+    Args:
+        tickers: Lista de códigos de ações
+        params: Parâmetros da requisição (sem o token, que é adicionado aqui)
+        chunk_size: Quantidade máxima de tickers por requisição
+        
+    Returns:
+        Dicionário {ticker: resultado_bruto_da_brapi}
+        Tickers sem resposta simplesmente não aparecem no dicionário
+    """
+    results = {}
+    
+    request_params = dict(params)
+    request_params["token"] = BRAPI_TOKEN
+    
+    headers = {
+        "User-Agent": "FinTracker/1.0",
+        "Accept": "application/json"
+    }
+    
+    # Tickers rejeitados recentemente ficam de fora do lote
+    tickers = [ticker for ticker in tickers if ticker and not brapi_negative_cache.is_negative(str(ticker))]
+    pending_chunks = _chunk_tickers(tickers, chunk_size)
+    
+    while pending_chunks:
+        chunk = pending_chunks.pop(0)
+        url = f"{BRAPI_BASE_URL}/{','.join(chunk)}"
+        
+        try:
+            print(f"[INFO] Buscando cotações em lote na BraAPI: {', '.join(chunk)}")
+            response = brapi_client.get(url, params=request_params, headers=headers, timeout=10)
+            
+            if response.status_code == 200:
+                try:
+                    data = response.json()
+                except ValueError as json_error:
+                    print(f"[ERRO] Falha ao decodificar resposta JSON do lote")
+                    print(f"Detalhes: {str(json_error)}")
+                    continue
+                
+                for resultado in data.get('results') or []:
+                    symbol = str(resultado.get('symbol') or '').upper().strip()
+                    if symbol:
+                        results[symbol] = resultado
+                
+                missing = [ticker for ticker in chunk if ticker not in results]
+                if missing:
+                    print(f"[AVISO] Sem dados na BraAPI para: {', '.join(missing)}")
+                    for ticker in missing:
+                        brapi_negative_cache.remember(ticker)
+                
+            elif response.status_code == 404 and len(chunk) > 1:
+                print(f"[AVISO] Lote rejeitado (404) - Refazendo {len(chunk)} tickers individualmente")
+                pending_chunks = [[ticker] for ticker in chunk] + pending_chunks
+                
+            elif response.status_code == 404:
+                print(f"[ERRO 404] Ação '{chunk[0]}' não encontrada")
+                brapi_negative_cache.remember(chunk[0])
+                
+            elif response.status_code == 401:
+                print("[ERRO 401] Token inválido ou ausente")
+                print("Verifique seu token em: https://brapi.dev/dashboard")
+                break
+                
+            elif response.status_code == 402:
+                print("[ERRO 402] Limite de requisições excedido")
+                print("Seu plano atingiu o limite de requisições. Verifique em: https://brapi.dev/dashboard")
+                break
+                
+            elif response.status_code == 403:
+                print("[ERRO 403] Acesso negado - Limitação do plano")
+                print("Seu plano não permite consultar estes dados em lote")
+                
+            elif response.status_code == 429:
+                print("[ERRO 429] Muitas requisições")
+                print("Aguarde alguns instantes antes de tentar novamente")
+                break
+                
+            else:
+                print(f"[ERRO {response.status_code}] Erro inesperado no lote")
+                print(f"Detalhes: {response.text[:200]}")
+                
+        except CircuitOpenError:
+            print("[ERRO] BraAPI indisponível após falhas consecutivas - lote interrompido")
+            break
+            
+        except requests.exceptions.Timeout:
+            print(f"[ERRO] Timeout na requisição do lote: {', '.join(chunk)}")
+            
+        except requests.exceptions.ConnectionError:
+            print("[ERRO] Falha na conexão")
+            print("Verifique sua conexão com a internet")
+            break
+            
+        except requests.exceptions.RequestException as e:
+            print(f"[ERRO] Erro na requisição do lote: {str(e)}")
+            
+        except Exception as e:
+            print(f"[ERRO] Erro inesperado no lote: {str(e)}")
+    
+    return results
+
+
+def _parse_current_price(ticker: str, resultado: Dict[str, any], price_date: str) -> Optional[Dict[str, any]]:
+    """
+    Extrai o preço atual de um resultado da BraAPI
+    
+    Args:
+        ticker: Código da ação
+        resultado: Item de 'results' retornado pela BraAPI
+        price_date: Data a associar ao preço (último dia de pregão)
+        
+    Returns:
+        Dicionário no formato de get_current_stock_price() ou None se não houver preço
+    """
+    current_price = None
+    market_status = "unknown"
+    
+    if resultado.get('regularMarketPrice'):
+        current_price = float(resultado['regularMarketPrice'])
+        market_status = "open" if resultado.get('marketState') == 'REGULAR' else "closed"
+    elif resultado.get('regularMarketPreviousClose'):
+        # Fallback: preço de fechamento anterior
+        current_price = float(resultado['regularMarketPreviousClose'])
+        market_status = "closed"
+        print(f"[INFO] {ticker}: usando regularMarketPreviousClose (fallback): R$ {current_price:.2f}")
+    
+    if current_price is None:
+        print(f"[ERRO] Não foi possível obter preço atual para {ticker}")
+        return None
+    
+    return {
+        "ticker": ticker,
+        "current_price": current_price,
+        "date": price_date,
+        "market_status": market_status
+    }
+
+
+def get_current_stock_prices_batch(tickers: List[str], chunk_size: int = BRAPI_BATCH_CHUNK_SIZE) -> Dict[str, Dict[str, any]]:
+    """
+    Busca o preço atual de VÁRIAS ações com poucas requisições (em lotes)
+    
+    Os tickers são agrupados em blocos de até chunk_size e cada bloco é
+    consultado com uma única chamada /quote/PETR4,VALE3,... Assim N ações
+    custam aproximadamente N/chunk_size requisições ao invés de N.
+    
+    Args:
+        tickers: Lista de códigos de ações (ex: ["PETR4", "VALE3"])
+        chunk_size: Quantidade máxima de tickers por requisição
+                    (padrão: BRAPI_BATCH_CHUNK_SIZE, configurável no .env)
+        
+    Returns:
+        Dicionário {ticker: dados} no mesmo formato de get_current_stock_price():
+        {
+            "PETR4": {"ticker": "PETR4", "current_price": 30.50, "date": "2024-11-05", "market_status": "open"},
+            ...
+        }
+        Tickers com erro não aparecem no dicionário
+        
+    Example:
+        >>> prices = get_current_stock_prices_batch(["PETR4", "VALE3"])
+        >>> for ticker, data in prices.items():
+        ...     print(f"{ticker}: R$ {data['current_price']:.2f}")
+    """
+    
+    # Valida se o token está configurado
+    if not BRAPI_TOKEN:
+        print("[ERRO] Token da BraAPI não configurado!")
+        print("Configure a variável BRAPI_TOKEN no arquivo .env")
+        return {}
+    
+    if not tickers:
+        return {}
+    
+    # Sem range = apenas dados atuais (mais rápido)
+    raw_results = _fetch_quote_results(tickers, {}, chunk_size)
+    
+    # Determina a data (hoje ou último dia de pregão) uma única vez para o lote
+    price_date = get_last_trading_day().strftime('%Y-%m-%d')
+    
+    prices = {}
+    for ticker, resultado in raw_results.items():
+        try:
+            parsed = _parse_current_price(ticker, resultado, price_date)
+        except (ValueError, TypeError) as e:
+            print(f"[AVISO] Erro ao processar preço de {ticker}: {str(e)}")
+            continue
+        
+        if parsed:
+            prices[ticker] = parsed
+    
+    print(f"[OK] Preços atuais obtidos em lote: {len(prices)} ações")
+    return prices
+
+
 def get_current_stock_price(ticker: str) -> Optional[Dict[str, any]]:
     """
     Busca APENAS o preço atual de uma ação (otimizado para carteira)
@@ -337,6 +706,10 @@ def get_current_stock_price(ticker: str) -> Optional[Dict[str, any]]:
     É muito mais rápida que fetch_prices_from_brapi() para casos onde só
     precisamos do valor atual (como na carteira).
     
+    Internamente usa get_current_stock_prices_batch() com um único ticker,
+    para que o caminho de uma ação e o caminho em lote compartilhem o mesmo
+    tratamento de resposta. Para várias ações, prefira a versão em lote.
+    
     Args:
         ticker: Código da ação (ex: "PETR4", "VALE3")
         
@@ -355,141 +728,21 @@ def get_current_stock_price(ticker: str) -> Optional[Dict[str, any]]:
         >>> if price_data:
         ...     print(f"PETR4: R$ {price_data['current_price']:.2f}")
     """
-    
-    # Valida se o token está configurado
-    if not BRAPI_TOKEN:
-        print("[ERRO] Token da BraAPI não configurado!")
-        print("Configure a variável BRAPI_TOKEN no arquivo .env")
+    if not ticker:
         return None
     
     # Formata o ticker (sempre em maiúsculas e sem espaços)
     ticker = ticker.upper().strip()
     
-    # Monta a URL da requisição (sem range - busca apenas dados atuais)
-    url = f"{BRAPI_BASE_URL}/{ticker}"
+    print(f"[INFO] Buscando preço atual de {ticker}...")
     
-    # Parâmetros mínimos para buscar apenas preço atual
-    params = {
-        "token": BRAPI_TOKEN
-        # Sem range = apenas dados atuais (mais rápido)
-    }
+    # Chamadas simultâneas para o mesmo ticker compartilham a mesma requisição
+    price_data = brapi_flight.do(
+        (ticker, "current"),
+        lambda: get_current_stock_prices_batch([ticker]).get(ticker)
+    )
     
-    # Headers da requisição
-    headers = {
-        "User-Agent": "FinTracker/1.0",
-        "Accept": "application/json"
-    }
+    if price_data:
+        print(f"[OK] Preço atual de {ticker}: R$ {price_data['current_price']:.2f} ({price_data['market_status']})")
     
-    try:
-        print(f"[INFO] Buscando preço atual de {ticker}...")
-        
-        # Faz a requisição para a BraAPI
-        response = requests.get(url, params=params, headers=headers, timeout=10)
-        
-        # Tratamento de diferentes códigos de status HTTP
-        if response.status_code == 200:
-            # Sucesso - processa os dados
-            try:
-                data = response.json()
-            except ValueError as json_error:
-                print(f"[ERRO] Falha ao decodificar resposta JSON")
-                print(f"Detalhes: {str(json_error)}")
-                return None
-            
-            # Valida estrutura da resposta
-            if 'results' not in data or not data['results']:
-                print(f"[ERRO] Nenhum dado encontrado para {ticker}")
-                return None
-            
-            # Extrai o primeiro resultado (dados da ação)
-            resultado = data['results'][0]
-            
-            # DEBUG: Mostrar TODOS os campos de preço disponíveis
-            print("[DEBUG] Campos de preço disponíveis na resposta da API:")
-            price_fields = ['regularMarketPrice', 'regularMarketPreviousClose', 
-                          'regularMarketOpen', 'regularMarketDayHigh', 'regularMarketDayLow']
-            for field in price_fields:
-                if field in resultado:
-                    print(f"  {field}: R$ {resultado[field]}")
-            
-            # Busca o preço atual (regularMarketPrice é o mais atualizado)
-            current_price = None
-            market_status = "unknown"
-            
-            if 'regularMarketPrice' in resultado and resultado['regularMarketPrice']:
-                current_price = float(resultado['regularMarketPrice'])
-                market_status = "open" if 'marketState' in resultado and resultado['marketState'] == 'REGULAR' else "closed"
-                print(f"[INFO] Usando regularMarketPrice: R$ {current_price:.2f}")
-            elif 'regularMarketPreviousClose' in resultado and resultado['regularMarketPreviousClose']:
-                # Fallback: preço de fechamento anterior
-                current_price = float(resultado['regularMarketPreviousClose'])
-                market_status = "closed"
-                print(f"[INFO] Usando regularMarketPreviousClose (fallback): R$ {current_price:.2f}")
-            
-            if current_price is None:
-                print(f"[ERRO] Não foi possível obter preço atual para {ticker}")
-                print(f"[DEBUG] Resposta completa da API: {resultado}")
-                return None
-            
-            # Determina a data (hoje ou último dia de pregão)
-            from services.update_detection_service import get_last_trading_day
-            price_date = get_last_trading_day().strftime('%Y-%m-%d')
-            
-            result = {
-                "ticker": ticker,
-                "current_price": current_price,
-                "date": price_date,
-                "market_status": market_status
-            }
-            
-            print(f"[OK] Preço atual de {ticker}: R$ {current_price:.2f} ({market_status})")
-            return result
-            
-        elif response.status_code == 401:
-            print("[ERRO 401] Token inválido ou ausente")
-            print("Verifique seu token em: https://brapi.dev/dashboard")
-            return None
-            
-        elif response.status_code == 402:
-            print("[ERRO 402] Limite de requisições excedido")
-            print("Seu plano atingiu o limite de requisições. Verifique em: https://brapi.dev/dashboard")
-            return None
-            
-        elif response.status_code == 403:
-            print("[ERRO 403] Acesso negado - Limitação do plano")
-            print("Seu plano não permite acessar dados desta ação")
-            return None
-            
-        elif response.status_code == 404:
-            print(f"[ERRO 404] Ação '{ticker}' não encontrada")
-            print("Verifique se o ticker está correto (ex: PETR4, VALE3, ITUB4)")
-            return None
-            
-        elif response.status_code == 429:
-            print("[ERRO 429] Muitas requisições")
-            print("Aguarde alguns instantes antes de tentar novamente")
-            return None
-            
-        else:
-            print(f"[ERRO {response.status_code}] Erro inesperado")
-            print(f"Detalhes: {response.text[:200]}")
-            return None
-            
-    except requests.exceptions.Timeout:
-        print("[ERRO] Timeout na requisição")
-        print("A API demorou muito para responder. Tente novamente.")
-        return None
-        
-    except requests.exceptions.ConnectionError:
-        print("[ERRO] Falha na conexão")
-        print("Verifique sua conexão com a internet")
-        return None
-        
-    except requests.exceptions.RequestException as e:
-        print(f"[ERRO] Erro na requisição: {str(e)}")
-        return None
-        
-    except Exception as e:
-        print(f"[ERRO] Erro inesperado: {str(e)}")
-        return None
-
+    return price_data
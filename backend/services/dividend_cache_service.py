@@ -178,3 +178,63 @@ def check_if_dividends_exist(stock_id: str) -> bool:
         print(f"Detalhes: {str(e)}")
         return False
 
+
+
+def get_latest_dividends_bulk(stock_ids: List[str], supabase=None) -> Dict[str, Dict[str, any]]:
+    """
+    Busca o dividendo mais recente de VÁRIAS ações em uma única consulta
+    
+    Usa a view latest_stock_dividends (supabase/migrations/003), que já
+    devolve uma linha por stock_id, filtrada com IN (...).
+    
+    Args:
+        stock_ids: Lista de IDs de ações (UUID)
+        supabase: Cliente Supabase a usar (padrão: get_supabase_client())
+        
+    Returns:
+        Dicionário {stock_id: {"value": 1.25, "payment_date": "2024-03-30"}}
+        Ações sem dividendo válido em cache não aparecem no dicionário
+        
+    Example:
+        >>> latest = get_latest_dividends_bulk(["uuid-1", "uuid-2"])
+        >>> print(latest.get("uuid-1"))
+    """
+    unique_ids = list(dict.fromkeys(stock_id for stock_id in stock_ids if stock_id))
+    if not unique_ids:
+        return {}
+    
+    try:
+        print(f"[INFO] Buscando dividendos mais recentes de {len(unique_ids)} ações (consulta única)...")
+        
+        if supabase is None:
+            supabase = get_supabase_client()
+        
+        # Query: SELECT stock_id, value, payment_date FROM latest_stock_dividends WHERE stock_id IN (...)
+        response = supabase.table('latest_stock_dividends')\
+            .select('stock_id, value, payment_date')\
+            .in_('stock_id', unique_ids)\
+            .execute()
+        
+        latest_dividends = {}
+        for item in response.data or []:
+            # Valida que ambos os campos existem e são válidos
+            if item.get('value') is None or item.get('payment_date') is None:
+                print(f"[AVISO] Dividendo para stock_id={item.get('stock_id')} tem dados inválidos")
+                continue
+            
+            try:
+                latest_dividends[item['stock_id']] = {
+                    "value": float(item['value']),
+                    "payment_date": item['payment_date']
+                }
+            except (KeyError, ValueError, TypeError) as e:
+                print(f"[AVISO] Erro ao processar dividendo mais recente: {str(e)}")
+                continue
+        
+        print(f"[OK] {len(latest_dividends)} dividendos mais recentes encontrados")
+        return latest_dividends
+        
+    except Exception as e:
+        print(f"[ERRO] Erro ao buscar dividendos mais recentes em lote")
+        print(f"Detalhes: {str(e)}")
+        return {}
@@ -0,0 +1,295 @@
+"""
+Carteira agregada de um grupo: posições, valor e desempenho de cada membro
+e totais do grupo
+
+As posições de todos os membros vêm em lote (user_portfolio, user_positions
+e, para quem ainda não tem snapshot, transactions) e ficam em cache por
+grupo até uma transação de algum membro ou o TTL. O preço mais recente é
+lido a cada consulta (uma consulta para todas as ações).
+"""
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Set
+
+from config.supabase_config import get_supabase_admin_client
+from services.position_service import replay_transactions
+from services.price_cache_service import get_latest_prices_bulk
+from utils.cache import TTLCache
+
+GROUP_PORTFOLIO_TTL_SECONDS = int(os.getenv('GROUP_PORTFOLIO_TTL_SECONDS', '300'))
+GROUP_PORTFOLIO_MAX_GROUPS = int(os.getenv('GROUP_PORTFOLIO_MAX_GROUPS', '500'))
+GROUP_PORTFOLIO_TOP_HOLDINGS = int(os.getenv('GROUP_PORTFOLIO_TOP_HOLDINGS', '10'))
+
+# Tamanho da página ao ler transactions (limite padrão do PostgREST é 1000)
+_LOAD_PAGE_SIZE = 1000
+
+_holdings = TTLCache(max_size=GROUP_PORTFOLIO_MAX_GROUPS, default_ttl=GROUP_PORTFOLIO_TTL_SECONDS)
+_lock = threading.Lock()
+# Grupos em cache por usuário, para invalidar quando uma transação dele muda
+_groups_by_user: Dict[str, Set[str]] = {}
+# Incrementados a cada invalidação: uma carga iniciada antes dela não é gravada
+# (_epoch cobre transações de usuários cujo grupo ainda não estava no índice)
+_versions: Dict[str, int] = {}
+_epoch = 0
+
+
+def _load_transactions(supabase, user_ids: List[str]) -> List[Dict[str, Any]]:
+    rows = []
+    offset = 0
+    while True:
+        response = supabase.table('transactions')\
+            .select('user_id, stock_id, type, price, quantity, date, created_at')\
+            .in_('user_id', user_ids)\
+            .order('id')\
+            .range(offset, offset + _LOAD_PAGE_SIZE - 1)\
+            .execute()
+
+        page = response.data or []
+        rows.extend(page)
+        if len(page) < _LOAD_PAGE_SIZE:
+            return rows
+        offset += _LOAD_PAGE_SIZE
+
+
+def load_member_holdings(user_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Posições de vários usuários em poucas consultas
+
+    Quantidade vem de user_portfolio; custo médio e lucro realizado, de
+    user_positions. Usuários sem snapshot têm as transações reprocessadas
+    em memória (uma consulta para todos). Ações da carteira sem posição nem
+    transação têm average_cost None (custo desconhecido).
+
+    Returns:
+        {user_id: {"positions": [...], "realized_pnl": float}}
+    """
+    supabase = get_supabase_admin_client()
+    holdings = {user_id: {'positions': [], 'realized_pnl': 0.0} for user_id in user_ids}
+    if not user_ids:
+        return holdings
+
+    portfolio_response = supabase.table('user_portfolio')\
+        .select('user_id, stock_id, quantity, stocks(ticker, company_name)')\
+        .in_('user_id', user_ids)\
+        .execute()
+
+    positions_response = supabase.table('user_positions')\
+        .select('user_id, stock_id, average_cost, realized_pnl')\
+        .in_('user_id', user_ids)\
+        .execute()
+
+    costs: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for row in positions_response.data or []:
+        costs.setdefault(row['user_id'], {})[row['stock_id']] = {
+            'average_cost': float(row.get('average_cost') or 0),
+            'realized_pnl': float(row.get('realized_pnl') or 0),
+        }
+
+    without_snapshot = [user_id for user_id in user_ids if user_id not in costs]
+    if without_snapshot:
+        by_user: Dict[str, List[Dict[str, Any]]] = {}
+        for row in _load_transactions(supabase, without_snapshot):
+            by_user.setdefault(row['user_id'], []).append(row)
+        for user_id, transactions in by_user.items():
+            costs[user_id] = {
+                stock_id: {'average_cost': position['average_cost'], 'realized_pnl': position['realized_pnl']}
+                for stock_id, position in replay_transactions(transactions).items()
+            }
+
+    for user_id, user_costs in costs.items():
+        holdings[user_id]['realized_pnl'] = sum(cost['realized_pnl'] for cost in user_costs.values())
+
+    for row in portfolio_response.data or []:
+        quantity = float(row.get('quantity') or 0)
+        if quantity <= 0:
+            continue
+
+        stock = row.get('stocks') or {}
+        if isinstance(stock, list):
+            stock = stock[0] if stock else {}
+        cost = costs.get(row['user_id'], {}).get(row['stock_id']) or {}
+
+        holdings[row['user_id']]['positions'].append({
+            'stock_id': row['stock_id'],
+            'ticker': stock.get('ticker'),
+            'company_name': stock.get('company_name'),
+            'quantity': quantity,
+            'average_cost': cost.get('average_cost'),
+        })
+
+    return holdings
+
+
+def get_member_holdings(group_id: str, user_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Posições dos membros do grupo, do cache quando ele já cobre todos os usuários pedidos
+
+    Args:
+        group_id: ID do grupo (chave do cache)
+        user_ids: Membros cujas posições são necessárias
+
+    Returns:
+        {user_id: {"positions": [...], "realized_pnl": float}}
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    cached = _holdings.get(group_id)
+    if cached is not None and all(user_id in cached for user_id in user_ids):
+        return {user_id: cached[user_id] for user_id in user_ids}
+
+    with _lock:
+        epoch = _epoch
+        version = _versions.get(group_id, 0)
+
+    print(f"[INFO] Carregando carteiras de {len(user_ids)} membro(s) do grupo {group_id}...")
+    holdings = load_member_holdings(user_ids)
+
+    with _lock:
+        if _epoch == epoch and _versions.get(group_id, 0) == version:
+            _holdings.set(group_id, holdings)
+            for user_id in user_ids:
+                _groups_by_user.setdefault(user_id, set()).add(group_id)
+
+    return holdings
+
+
+def invalidate_group_portfolio(group_id: str) -> None:
+    with _lock:
+        _versions[group_id] = _versions.get(group_id, 0) + 1
+        _holdings.delete(group_id)
+
+
+def invalidate_member_portfolios(user_id: str) -> None:
+    """Descarta o cache dos grupos que incluem o usuário (após uma transação dele)"""
+    global _epoch
+    with _lock:
+        _epoch += 1
+        group_ids = _groups_by_user.pop(user_id, set())
+    for group_id in group_ids:
+        invalidate_group_portfolio(group_id)
+
+
+def summarize_group_portfolio(
+    members: List[Dict[str, Any]],
+    holdings: Dict[str, Dict[str, Any]],
+    latest_prices: Dict[str, Dict[str, Any]],
+    top_holdings: int = GROUP_PORTFOLIO_TOP_HOLDINGS,
+) -> Dict[str, Any]:
+    """
+    Monta a resposta agregada a partir das posições e dos preços mais recentes
+
+    Ações sem preço entram com valor de mercado None e ficam fora dos totais
+    de valor e de lucro não realizado. Ações com custo médio desconhecido
+    (None) entram no valor total, mas ficam fora do custo e do lucro não
+    realizado.
+
+    Args:
+        members: [{"userId": ..., "name": ...}] na ordem de exibição
+        holdings: Saída de get_member_holdings
+        latest_prices: {stock_id: {"price": ..., "date": ...}}
+        top_holdings: Quantas ações listar em topHoldings
+
+    Returns:
+        {"members": [...], "totals": {...}, "topHoldings": [...]}
+    """
+    by_stock: Dict[str, Dict[str, Any]] = {}
+    group_totals = {'totalValue': 0.0, 'costBasis': 0.0, 'unrealizedPnl': 0.0, 'realizedPnl': 0.0}
+    member_items = []
+
+    for member in members:
+        member_holdings = holdings.get(member['userId']) or {'positions': [], 'realized_pnl': 0.0}
+        totals = {'totalValue': 0.0, 'costBasis': 0.0, 'unrealizedPnl': 0.0,
+                  'realizedPnl': member_holdings['realized_pnl']}
+        positions = []
+
+        for holding in member_holdings['positions']:
+            latest = latest_prices.get(holding['stock_id'])
+            current_price = latest['price'] if latest else None
+            average_cost = holding['average_cost']
+            cost_basis = holding['quantity'] * average_cost if average_cost is not None else None
+            market_value = holding['quantity'] * current_price if current_price is not None else None
+            unrealized = (
+                market_value - cost_basis if market_value is not None and cost_basis is not None else None
+            )
+
+            positions.append({
+                'stockId': holding['stock_id'],
+                'ticker': holding['ticker'],
+                'companyName': holding['company_name'],
+                'quantity': holding['quantity'],
+                'averageCost': holding['average_cost'],
+                'currentPrice': current_price,
+                'marketValue': market_value,
+                'costBasis': cost_basis,
+                'unrealizedPnl': unrealized,
+            })
+
+            if market_value is not None:
+                totals['totalValue'] += market_value
+            if unrealized is not None:
+                totals['costBasis'] += cost_basis
+                totals['unrealizedPnl'] += unrealized
+
+            stock = by_stock.setdefault(holding['stock_id'], {
+                'stockId': holding['stock_id'],
+                'ticker': holding['ticker'],
+                'companyName': holding['company_name'],
+                'quantity': 0.0,
+                'marketValue': 0.0 if market_value is not None else None,
+                'holders': 0,
+            })
+            stock['quantity'] += holding['quantity']
+            stock['holders'] += 1
+            if market_value is not None:
+                stock['marketValue'] += market_value
+
+        positions.sort(key=lambda item: item['marketValue'] or 0, reverse=True)
+        totals['returnPct'] = (
+            totals['unrealizedPnl'] / totals['costBasis'] * 100 if totals['costBasis'] > 0 else None
+        )
+        member_items.append({**member, 'positions': positions, 'totals': totals})
+
+        for key in ('totalValue', 'costBasis', 'unrealizedPnl', 'realizedPnl'):
+            group_totals[key] += totals[key]
+
+    group_totals['returnPct'] = (
+        group_totals['unrealizedPnl'] / group_totals['costBasis'] * 100 if group_totals['costBasis'] > 0 else None
+    )
+    group_totals['membersCount'] = len(member_items)
+
+    top = sorted(by_stock.values(), key=lambda item: item['marketValue'] or 0, reverse=True)[:top_holdings]
+    for item in top:
+        item['weightPct'] = (
+            item['marketValue'] / group_totals['totalValue'] * 100
+            if item['marketValue'] is not None and group_totals['totalValue'] > 0 else None
+        )
+
+    return {
+        'members': member_items,
+        'totals': group_totals,
+        'topHoldings': top,
+    }
+
+
+def build_group_portfolio(group_id: str, members: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Carteira agregada dos membros informados (já filtrados por permissão)
+
+    Args:
+        group_id: ID do grupo
+        members: [{"userId": ..., "name": ...}]
+    """
+    holdings = get_member_holdings(group_id, [member['userId'] for member in members])
+    stock_ids = [
+        holding['stock_id']
+        for member_holdings in holdings.values()
+        for holding in member_holdings['positions']
+    ]
+    latest_prices = get_latest_prices_bulk(stock_ids, supabase=get_supabase_admin_client())
+    return summarize_group_portfolio(members, holdings, latest_prices)
+
+
+def get_group_portfolio_stats() -> Dict[str, Any]:
+    """Retorna informações do cache de carteiras de grupo (para diagnóstico)"""
+    stats = _holdings.stats()
+    stats['ttl_seconds'] = GROUP_PORTFOLIO_TTL_SECONDS
+    return stats
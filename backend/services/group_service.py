@@ -1,25 +1,35 @@
 """
 Serviço para gerenciamento de grupos.
 """
+import os
 import secrets
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from config.supabase_config import get_supabase_admin_client
+from services.group_portfolio_service import build_group_portfolio
 from services.notification_service import create_notification
 from services.portfolio_service import get_user_portfolio_full
+from services.position_service import get_user_positions, get_wallet_version
 from services.transaction_service import (
     create_transaction,
     delete_transaction,
     list_transactions,
     update_transaction,
 )
+from utils.pagination import decode_cursor, encode_cursor, keyset_after_filter
+from utils.request_loader import get_loader
 
 VALID_VISIBILITY = {'publico', 'restrito', 'privado'}
 VALID_PERMISSIONS = {'todos', 'lideres', 'ninguem'}
 PERMISSION_LEVELS = {'ninguem': 0, 'lideres': 1, 'todos': 2}
 ACTIVE_MEMBER_STATUSES = ('active', 'pending_reconsent', 'pending_approval', 'invited')
 
+# Paginação da descoberta de grupos públicos (keyset em created_at, id)
+PUBLIC_GROUPS_PAGE_SIZE = int(os.getenv('PUBLIC_GROUPS_PAGE_SIZE', '50'))
+PUBLIC_GROUPS_MAX_PAGE_SIZE = int(os.getenv('PUBLIC_GROUPS_MAX_PAGE_SIZE', '100'))
+PUBLIC_GROUPS_CURSOR_KEYS = ('created_at', 'id')
+
 
 def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
@@ -162,18 +172,92 @@ def _count_active_members(supabase, group_id: str) -> int:
     return response.count or 0
 
 
-def _get_user_membership(supabase, group_id: str, user_id: str) -> Optional[Dict[str, Any]]:
-    response = supabase.table('group_members')\
-        .select('id, user_id, is_founder, is_leader, status, consented_view, consented_manage')\
-        .eq('group_id', group_id)\
-        .eq('user_id', user_id)\
-        .limit(1)\
+def _count_active_members_bulk(supabase, group_ids: List[str]) -> Dict[str, int]:
+    """Membros ativos de vários grupos em uma consulta (view group_active_member_counts)."""
+    if not group_ids:
+        return {}
+
+    response = supabase.table('group_active_member_counts')\
+        .select('group_id, active_member_count')\
+        .in_('group_id', group_ids)\
         .execute()
 
-    if response.data:
-        return response.data[0]
+    counts = {group_id: 0 for group_id in group_ids}
+    for row in response.data or []:
+        counts[row['group_id']] = int(row.get('active_member_count') or 0)
+    return counts
 
-    return None
+
+MEMBERSHIP_COLUMNS = 'id, group_id, user_id, is_founder, is_leader, status, consented_view, consented_manage'
+
+
+def _group_loader(supabase):
+    def batch(group_ids):
+        response = supabase.table('groups')\
+            .select('*')\
+            .in_('id', group_ids)\
+            .execute()
+        return {row['id']: row for row in response.data or []}
+
+    return get_loader('groups', batch)
+
+
+def _user_loader(supabase):
+    def batch(user_ids):
+        response = supabase.table('users')\
+            .select('id, name, last_name, email')\
+            .in_('id', user_ids)\
+            .execute()
+        return {row['id']: row for row in response.data or []}
+
+    return get_loader('users', batch)
+
+
+def _membership_loader(supabase):
+    def batch(keys):
+        # Chaves (group_id, user_id); uma consulta por grupo, normalmente só um
+        user_ids_by_group: Dict[str, List[str]] = {}
+        for group_id, user_id in keys:
+            user_ids_by_group.setdefault(group_id, []).append(user_id)
+
+        found = {}
+        for group_id, user_ids in user_ids_by_group.items():
+            response = supabase.table('group_members')\
+                .select(MEMBERSHIP_COLUMNS)\
+                .eq('group_id', group_id)\
+                .in_('user_id', user_ids)\
+                .execute()
+            for row in response.data or []:
+                found[(group_id, row['user_id'])] = row
+        return found
+
+    return get_loader('group_members', batch)
+
+
+def _get_group(supabase, group_id: str) -> Optional[Dict[str, Any]]:
+    return _group_loader(supabase).load(group_id)
+
+
+def _forget_group(supabase, group_id: str) -> None:
+    _group_loader(supabase).clear(group_id)
+
+
+def _get_user_membership(supabase, group_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+    return _membership_loader(supabase).load((group_id, user_id))
+
+
+def _get_user_memberships(
+    supabase,
+    group_id: str,
+    user_ids: List[str],
+) -> Dict[str, Optional[Dict[str, Any]]]:
+    loaded = _membership_loader(supabase).load_many((group_id, user_id) for user_id in user_ids)
+    return {user_id: membership for (_, user_id), membership in loaded.items()}
+
+
+def _forget_memberships(supabase, group_id: str) -> None:
+    """Descarta os vínculos do grupo carregados nesta requisição (após qualquer escrita em group_members)"""
+    _membership_loader(supabase).clear_where(lambda key: key[0] == group_id)
 
 
 def _is_leader_or_founder(membership: Optional[Dict[str, Any]]) -> bool:
@@ -281,6 +365,7 @@ def create_group(user_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
 
         if not member_response.data:
             supabase.table('groups').delete().eq('id', group_id).execute()
+            _forget_group(supabase, group_id)
             return {'success': False, 'message': 'Erro ao registrar fundador do grupo'}
 
         members = _fetch_group_members(supabase, group_id)
@@ -320,12 +405,14 @@ def list_my_groups(user_id: str) -> Dict[str, Any]:
             .order('created_at', desc=True)\
             .execute()
 
+        rows = groups_response.data or []
+        counts = _count_active_members_bulk(supabase, [group['id'] for group in rows])
+
         groups = []
-        for group in (groups_response.data or []):
+        for group in rows:
             group_id = group['id']
-            members_count = _count_active_members(supabase, group_id)
             membership = _serialize_membership(membership_by_group.get(group_id))
-            groups.append(_serialize_group(group, members_count, current_membership=membership))
+            groups.append(_serialize_group(group, counts.get(group_id, 0), current_membership=membership))
 
         return {'success': True, 'data': groups}
     except Exception as error:
@@ -333,8 +420,29 @@ def list_my_groups(user_id: str) -> Dict[str, Any]:
         return {'success': False, 'message': 'Erro ao listar grupos'}
 
 
-def list_public_groups(user_id: str) -> Dict[str, Any]:
+def _escape_like(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def list_public_groups(
+    user_id: str,
+    limit: Optional[Any] = None,
+    cursor: Optional[str] = None,
+    search: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Lista grupos públicos/restritos dos quais o usuário não participa, mais recentes primeiro.
+
+    Paginação por keyset em (created_at, id): envie next_cursor como cursor para a
+    próxima página. search filtra por trecho do nome (sem diferenciar maiúsculas).
+    """
     try:
+        try:
+            page_size = int(limit) if limit is not None else PUBLIC_GROUPS_PAGE_SIZE
+        except (TypeError, ValueError):
+            return {'success': False, 'message': 'limit inválido', 'status_code': 400}
+        page_size = max(1, min(page_size, PUBLIC_GROUPS_MAX_PAGE_SIZE))
+
         supabase = get_supabase_admin_client()
 
         memberships_response = supabase.table('group_members')\
@@ -343,23 +451,44 @@ def list_public_groups(user_id: str) -> Dict[str, Any]:
             .in_('status', list(ACTIVE_MEMBER_STATUSES))\
             .execute()
 
-        excluded_group_ids = {item['group_id'] for item in (memberships_response.data or [])}
+        excluded_group_ids = list({item['group_id'] for item in (memberships_response.data or [])})
 
-        groups_response = supabase.table('groups')\
+        query = supabase.table('groups')\
             .select('*')\
-            .in_('visibility', ['publico', 'restrito'])\
-            .order('created_at', desc=True)\
+            .in_('visibility', ['publico', 'restrito'])
+
+        if excluded_group_ids:
+            query = query.not_.in_('id', excluded_group_ids)
+
+        search_text = (search or '').strip()[:100]
+        if search_text:
+            query = query.ilike('name', f'%{_escape_like(search_text)}%')
+
+        if cursor:
+            try:
+                values = decode_cursor(cursor, len(PUBLIC_GROUPS_CURSOR_KEYS))
+            except ValueError as error:
+                return {'success': False, 'message': str(error), 'status_code': 400}
+            query = query.or_(keyset_after_filter(PUBLIC_GROUPS_CURSOR_KEYS, values))
+
+        groups_response = query.order('created_at', desc=True)\
+            .order('id', desc=True)\
+            .limit(page_size + 1)\
             .execute()
 
-        groups = []
-        for group in (groups_response.data or []):
-            if group['id'] in excluded_group_ids:
-                continue
+        rows = groups_response.data or []
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
 
-            members_count = _count_active_members(supabase, group['id'])
-            groups.append(_serialize_group(group, members_count))
+        counts = _count_active_members_bulk(supabase, [group['id'] for group in rows])
+        groups = [_serialize_group(group, counts.get(group['id'], 0)) for group in rows]
 
-        return {'success': True, 'data': groups}
+        return {
+            'success': True,
+            'data': groups,
+            'next_cursor': encode_cursor(rows[-1], PUBLIC_GROUPS_CURSOR_KEYS) if has_more else None,
+            'has_more': has_more,
+        }
     except Exception as error:
         print(f'Erro ao listar grupos públicos: {error}')
         return {'success': False, 'message': 'Erro ao listar grupos públicos'}
@@ -369,16 +498,11 @@ def get_group(group_id: str, user_id: str) -> Dict[str, Any]:
     try:
         supabase = get_supabase_admin_client()
 
-        group_response = supabase.table('groups')\
-            .select('*')\
-            .eq('id', group_id)\
-            .limit(1)\
-            .execute()
+        group = _get_group(supabase, group_id)
 
-        if not group_response.data:
+        if not group:
             return {'success': False, 'message': 'Grupo não encontrado', 'status_code': 404}
 
-        group = group_response.data[0]
         membership = _get_user_membership(supabase, group_id, user_id)
         join_request = _get_user_join_request(supabase, group_id, user_id)
 
@@ -412,16 +536,11 @@ def update_group(group_id: str, user_id: str, payload: Dict[str, Any]) -> Dict[s
 
         supabase = get_supabase_admin_client()
 
-        group_response = supabase.table('groups')\
-            .select('*')\
-            .eq('id', group_id)\
-            .limit(1)\
-            .execute()
+        group = _get_group(supabase, group_id)
 
-        if not group_response.data:
+        if not group:
             return {'success': False, 'message': 'Grupo não encontrado', 'status_code': 404}
 
-        group = group_response.data[0]
         membership = _get_user_membership(supabase, group_id, user_id)
 
         if not _is_leader_or_founder(membership):
@@ -446,17 +565,12 @@ def update_group(group_id: str, user_id: str, payload: Dict[str, Any]) -> Dict[s
             .eq('id', group_id)\
             .execute()
 
-        refetch_response = supabase.table('groups')\
-            .select('*')\
-            .eq('id', group_id)\
-            .limit(1)\
-            .execute()
+        _forget_group(supabase, group_id)
+        updated_group = _get_group(supabase, group_id)
 
-        if not refetch_response.data:
+        if not updated_group:
             return {'success': False, 'message': 'Erro ao atualizar grupo'}
 
-        updated_group = refetch_response.data[0]
-
         permissions_changed = (
             (
                 'view_permission' in update_data
@@ -489,20 +603,6 @@ def _is_founder(membership: Optional[Dict[str, Any]]) -> bool:
     return bool(membership.get('is_founder'))
 
 
-def _get_target_member(supabase, group_id: str, target_user_id: str) -> Optional[Dict[str, Any]]:
-    response = supabase.table('group_members')\
-        .select('id, user_id, is_founder, is_leader, status')\
-        .eq('group_id', group_id)\
-        .eq('user_id', target_user_id)\
-        .limit(1)\
-        .execute()
-
-    if response.data:
-        return response.data[0]
-
-    return None
-
-
 def _get_user_join_request(
     supabase,
     group_id: str,
@@ -625,16 +725,11 @@ def _fetch_group_leaders(supabase, group_id: str) -> List[str]:
 
 
 def _fetch_user_profile(supabase, user_id: str) -> Dict[str, Any]:
-    response = supabase.table('users')\
-        .select('id, name, last_name, email')\
-        .eq('id', user_id)\
-        .limit(1)\
-        .execute()
+    return _user_loader(supabase).load(user_id) or {}
 
-    if response.data:
-        return response.data[0]
 
-    return {}
+def _fetch_user_profiles(supabase, user_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    return {user_id: user or {} for user_id, user in _user_loader(supabase).load_many(user_ids).items()}
 
 
 def _group_requires_consent(group: Dict[str, Any]) -> bool:
@@ -685,6 +780,7 @@ def _apply_reconsent_for_permission_changes(
                 .update({'status': 'active'})\
                 .eq('id', member['id'])\
                 .execute()
+            _forget_memberships(supabase, group['id'])
             continue
 
         if not needs_reconsent:
@@ -696,6 +792,7 @@ def _apply_reconsent_for_permission_changes(
             .update({'status': 'pending_reconsent'})\
             .eq('id', member['id'])\
             .execute()
+        _forget_memberships(supabase, group['id'])
 
         if was_active:
             create_notification(
@@ -729,6 +826,7 @@ def _sync_editor_consent_after_permission_update(
         })\
         .eq('id', membership['id'])\
         .execute()
+    _forget_memberships(supabase, group['id'])
 
 
 def _is_group_at_capacity(supabase, group: Dict[str, Any]) -> bool:
@@ -816,16 +914,13 @@ def promote_member(group_id: str, actor_id: str, target_user_id: str) -> Dict[st
 
         supabase = get_supabase_admin_client()
 
-        group_response = supabase.table('groups')\
-            .select('*')\
-            .eq('id', group_id)\
-            .limit(1)\
-            .execute()
+        group = _get_group(supabase, group_id)
 
-        if not group_response.data:
+        if not group:
             return {'success': False, 'message': 'Grupo não encontrado', 'status_code': 404}
 
-        actor_membership = _get_user_membership(supabase, group_id, actor_id)
+        memberships = _get_user_memberships(supabase, group_id, [actor_id, target_user_id])
+        actor_membership = memberships[actor_id]
 
         if not _is_founder(actor_membership):
             return {
@@ -834,7 +929,7 @@ def promote_member(group_id: str, actor_id: str, target_user_id: str) -> Dict[st
                 'status_code': 403,
             }
 
-        target_member = _get_target_member(supabase, group_id, target_user_id)
+        target_member = memberships[target_user_id]
         can_manage, message = _can_manage_target_member(actor_membership, target_member)
 
         if not can_manage:
@@ -847,12 +942,11 @@ def promote_member(group_id: str, actor_id: str, target_user_id: str) -> Dict[st
             .update({'is_leader': True})\
             .eq('id', target_member['id'])\
             .execute()
+        _forget_memberships(supabase, group_id)
 
         if not updated_response.data:
             return {'success': False, 'message': 'Erro ao promover membro'}
 
-        group = group_response.data[0]
-
         return {
             'success': True,
             'message': 'Membro promovido a líder',
@@ -870,16 +964,13 @@ def demote_member(group_id: str, actor_id: str, target_user_id: str) -> Dict[str
 
         supabase = get_supabase_admin_client()
 
-        group_response = supabase.table('groups')\
-            .select('*')\
-            .eq('id', group_id)\
-            .limit(1)\
-            .execute()
+        group = _get_group(supabase, group_id)
 
-        if not group_response.data:
+        if not group:
             return {'success': False, 'message': 'Grupo não encontrado', 'status_code': 404}
 
-        actor_membership = _get_user_membership(supabase, group_id, actor_id)
+        memberships = _get_user_memberships(supabase, group_id, [actor_id, target_user_id])
+        actor_membership = memberships[actor_id]
 
         if not _is_founder(actor_membership):
             return {
@@ -888,7 +979,7 @@ def demote_member(group_id: str, actor_id: str, target_user_id: str) -> Dict[str
                 'status_code': 403,
             }
 
-        target_member = _get_target_member(supabase, group_id, target_user_id)
+        target_member = memberships[target_user_id]
         can_manage, message = _can_manage_target_member(actor_membership, target_member)
 
         if not can_manage:
@@ -901,12 +992,11 @@ def demote_member(group_id: str, actor_id: str, target_user_id: str) -> Dict[str
             .update({'is_leader': False})\
             .eq('id', target_member['id'])\
             .execute()
+        _forget_memberships(supabase, group_id)
 
         if not updated_response.data:
             return {'success': False, 'message': 'Erro ao rebaixar membro'}
 
-        group = group_response.data[0]
-
         return {
             'success': True,
             'message': 'Líder rebaixado a membro',
@@ -924,17 +1014,14 @@ def remove_member(group_id: str, actor_id: str, target_user_id: str) -> Dict[str
 
         supabase = get_supabase_admin_client()
 
-        group_response = supabase.table('groups')\
-            .select('*')\
-            .eq('id', group_id)\
-            .limit(1)\
-            .execute()
+        group = _get_group(supabase, group_id)
 
-        if not group_response.data:
+        if not group:
             return {'success': False, 'message': 'Grupo não encontrado', 'status_code': 404}
 
-        actor_membership = _get_user_membership(supabase, group_id, actor_id)
-        target_member = _get_target_member(supabase, group_id, target_user_id)
+        memberships = _get_user_memberships(supabase, group_id, [actor_id, target_user_id])
+        actor_membership = memberships[actor_id]
+        target_member = memberships[target_user_id]
 
         can_manage, message = _can_manage_target_member(actor_membership, target_member)
 
@@ -952,8 +1039,7 @@ def remove_member(group_id: str, actor_id: str, target_user_id: str) -> Dict[str
             .delete()\
             .eq('id', target_member['id'])\
             .execute()
-
-        group = group_response.data[0]
+        _forget_memberships(supabase, group_id)
 
         return {
             'success': True,
@@ -972,17 +1058,13 @@ def transfer_founder(group_id: str, actor_id: str, new_founder_user_id: str) ->
 
         supabase = get_supabase_admin_client()
 
-        group_response = supabase.table('groups')\
-            .select('*')\
-            .eq('id', group_id)\
-            .limit(1)\
-            .execute()
+        group = _get_group(supabase, group_id)
 
-        if not group_response.data:
+        if not group:
             return {'success': False, 'message': 'Grupo não encontrado', 'status_code': 404}
 
-        group = group_response.data[0]
-        actor_membership = _get_user_membership(supabase, group_id, actor_id)
+        memberships = _get_user_memberships(supabase, group_id, [actor_id, new_founder_user_id])
+        actor_membership = memberships[actor_id]
 
         if not _is_founder(actor_membership):
             return {
@@ -991,7 +1073,7 @@ def transfer_founder(group_id: str, actor_id: str, new_founder_user_id: str) ->
                 'status_code': 403,
             }
 
-        new_founder_member = _get_target_member(supabase, group_id, new_founder_user_id)
+        new_founder_member = memberships[new_founder_user_id]
 
         if not new_founder_member or new_founder_member.get('status') != 'active':
             return {'success': False, 'message': 'Membro alvo não encontrado ou inativo'}
@@ -1005,6 +1087,7 @@ def transfer_founder(group_id: str, actor_id: str, new_founder_user_id: str) ->
             .update({'is_founder': True, 'is_leader': True})\
             .eq('id', new_founder_member['id'])\
             .execute()
+        _forget_memberships(supabase, group_id)
 
         updated_group_response = supabase.table('groups')\
             .update({
@@ -1018,6 +1101,7 @@ def transfer_founder(group_id: str, actor_id: str, new_founder_user_id: str) ->
             return {'success': False, 'message': 'Erro ao transferir fundação'}
 
         updated_group = updated_group_response.data[0]
+        _group_loader(supabase).prime(group_id, updated_group)
 
         return {
             'success': True,
@@ -1033,16 +1117,11 @@ def delete_group(group_id: str, user_id: str) -> Dict[str, Any]:
     try:
         supabase = get_supabase_admin_client()
 
-        group_response = supabase.table('groups')\
-            .select('*')\
-            .eq('id', group_id)\
-            .limit(1)\
-            .execute()
+        group = _get_group(supabase, group_id)
 
-        if not group_response.data:
+        if not group:
             return {'success': False, 'message': 'Grupo não encontrado', 'status_code': 404}
 
-        group = group_response.data[0]
         membership = _get_user_membership(supabase, group_id, user_id)
 
         if not _is_founder(membership) and group.get('founder_id') != user_id:
@@ -1056,6 +1135,8 @@ def delete_group(group_id: str, user_id: str) -> Dict[str, Any]:
             .delete()\
             .eq('id', group_id)\
             .execute()
+        _forget_group(supabase, group_id)
+        _forget_memberships(supabase, group_id)
 
         return {
             'success': True,
@@ -1070,16 +1151,11 @@ def join_group(group_id: str, user_id: str, payload: Dict[str, Any]) -> Dict[str
     try:
         supabase = get_supabase_admin_client()
 
-        group_response = supabase.table('groups')\
-            .select('*')\
-            .eq('id', group_id)\
-            .limit(1)\
-            .execute()
+        group = _get_group(supabase, group_id)
 
-        if not group_response.data:
+        if not group:
             return {'success': False, 'message': 'Grupo não encontrado', 'status_code': 404}
 
-        group = group_response.data[0]
 
         if group.get('visibility') == 'privado':
             return {
@@ -1159,13 +1235,9 @@ def leave_group(group_id: str, user_id: str) -> Dict[str, Any]:
     try:
         supabase = get_supabase_admin_client()
 
-        group_response = supabase.table('groups')\
-            .select('*')\
-            .eq('id', group_id)\
-            .limit(1)\
-            .execute()
+        group = _get_group(supabase, group_id)
 
-        if not group_response.data:
+        if not group:
             return {'success': False, 'message': 'Grupo não encontrado', 'status_code': 404}
 
         membership = _get_user_membership(supabase, group_id, user_id)
@@ -1173,7 +1245,7 @@ def leave_group(group_id: str, user_id: str) -> Dict[str, Any]:
         if not membership or membership.get('status') != 'active':
             return {'success': False, 'message': 'Você não é membro ativo deste grupo'}
 
-        if membership.get('is_founder') or group_response.data[0].get('founder_id') == user_id:
+        if membership.get('is_founder') or group.get('founder_id') == user_id:
             return {
                 'success': False,
                 'message': 'O fundador não pode sair do grupo. Transfira a fundação ou exclua o grupo.',
@@ -1183,6 +1255,7 @@ def leave_group(group_id: str, user_id: str) -> Dict[str, Any]:
             .delete()\
             .eq('id', membership['id'])\
             .execute()
+        _forget_memberships(supabase, group_id)
 
         return {
             'success': True,
@@ -1197,16 +1270,11 @@ def approve_join_request(group_id: str, actor_id: str, request_id: str) -> Dict[
     try:
         supabase = get_supabase_admin_client()
 
-        group_response = supabase.table('groups')\
-            .select('*')\
-            .eq('id', group_id)\
-            .limit(1)\
-            .execute()
+        group = _get_group(supabase, group_id)
 
-        if not group_response.data:
+        if not group:
             return {'success': False, 'message': 'Grupo não encontrado', 'status_code': 404}
 
-        group = group_response.data[0]
         actor_membership = _get_user_membership(supabase, group_id, actor_id)
 
         if not _is_leader_or_founder(actor_membership):
@@ -1267,6 +1335,7 @@ def approve_join_request(group_id: str, actor_id: str, request_id: str) -> Dict[
                 'consented_manage': join_request.get('consented_manage'),
                 'consented_at': _now_iso(),
             }).execute()
+        _forget_memberships(supabase, group_id)
 
         supabase.table('group_join_requests')\
             .update({'status': 'approved'})\
@@ -1300,16 +1369,11 @@ def reject_join_request(group_id: str, actor_id: str, request_id: str) -> Dict[s
     try:
         supabase = get_supabase_admin_client()
 
-        group_response = supabase.table('groups')\
-            .select('*')\
-            .eq('id', group_id)\
-            .limit(1)\
-            .execute()
+        group = _get_group(supabase, group_id)
 
-        if not group_response.data:
+        if not group:
             return {'success': False, 'message': 'Grupo não encontrado', 'status_code': 404}
 
-        group = group_response.data[0]
         actor_membership = _get_user_membership(supabase, group_id, actor_id)
 
         if not _is_leader_or_founder(actor_membership):
@@ -1404,15 +1468,11 @@ def _find_invite_context(supabase, token: str) -> Tuple[Optional[Dict[str, Any]]
         if _is_invite_expired(invite.get('expires_at')):
             return None, None, None
 
-        group_response = supabase.table('groups')\
-            .select('*')\
-            .eq('id', invite['group_id'])\
-            .limit(1)\
-            .execute()
+        group = _get_group(supabase, invite['group_id'])
 
-        if group_response.data:
+        if group:
             invite_type = 'direct' if invite.get('invited_user_id') else 'link'
-            return group_response.data[0], invite, invite_type
+            return group, invite, invite_type
 
     group_response = supabase.table('groups')\
         .select('*')\
@@ -1421,7 +1481,9 @@ def _find_invite_context(supabase, token: str) -> Tuple[Optional[Dict[str, Any]]
         .execute()
 
     if group_response.data:
-        return group_response.data[0], None, 'link'
+        group = group_response.data[0]
+        _group_loader(supabase).prime(group['id'], group)
+        return group, None, 'link'
 
     return None, None, None
 
@@ -1466,6 +1528,7 @@ def _activate_group_member(
         if not inserted.data:
             return False, 'Erro ao entrar no grupo'
 
+    _forget_memberships(supabase, group['id'])
     return True, ''
 
 
@@ -1476,17 +1539,13 @@ def create_direct_invite(group_id: str, actor_id: str, target_user_id: str) -> D
 
         supabase = get_supabase_admin_client()
 
-        group_response = supabase.table('groups')\
-            .select('*')\
-            .eq('id', group_id)\
-            .limit(1)\
-            .execute()
+        group = _get_group(supabase, group_id)
 
-        if not group_response.data:
+        if not group:
             return {'success': False, 'message': 'Grupo não encontrado', 'status_code': 404}
 
-        group = group_response.data[0]
-        actor_membership = _get_user_membership(supabase, group_id, actor_id)
+        memberships = _get_user_memberships(supabase, group_id, [actor_id, target_user_id])
+        actor_membership = memberships[actor_id]
 
         if not _is_leader_or_founder(actor_membership):
             return {
@@ -1495,7 +1554,7 @@ def create_direct_invite(group_id: str, actor_id: str, target_user_id: str) -> D
                 'status_code': 403,
             }
 
-        target_membership = _get_user_membership(supabase, group_id, target_user_id)
+        target_membership = memberships[target_user_id]
         if target_membership and target_membership.get('status') == 'active':
             return {'success': False, 'message': 'Este usuário já é membro do grupo'}
 
@@ -1524,8 +1583,9 @@ def create_direct_invite(group_id: str, actor_id: str, target_user_id: str) -> D
             return {'success': False, 'message': 'Erro ao criar convite'}
 
         invite = invite_response.data[0]
-        target_user = _fetch_user_profile(supabase, target_user_id)
-        inviter = _fetch_user_profile(supabase, actor_id)
+        profiles = _fetch_user_profiles(supabase, [target_user_id, actor_id])
+        target_user = profiles[target_user_id]
+        inviter = profiles[actor_id]
 
         create_notification(
             user_id=target_user_id,
@@ -1559,16 +1619,11 @@ def get_invite_link(group_id: str, actor_id: str, regenerate: bool = False) -> D
     try:
         supabase = get_supabase_admin_client()
 
-        group_response = supabase.table('groups')\
-            .select('*')\
-            .eq('id', group_id)\
-            .limit(1)\
-            .execute()
+        group = _get_group(supabase, group_id)
 
-        if not group_response.data:
+        if not group:
             return {'success': False, 'message': 'Grupo não encontrado', 'status_code': 404}
 
-        group = group_response.data[0]
         actor_membership = _get_user_membership(supabase, group_id, actor_id)
 
         if not _is_leader_or_founder(actor_membership):
@@ -1593,6 +1648,8 @@ def get_invite_link(group_id: str, actor_id: str, regenerate: bool = False) -> D
             if not updated.data:
                 return {'success': False, 'message': 'Erro ao gerar link de convite'}
 
+            _group_loader(supabase).prime(group_id, updated.data[0])
+
         return {
             'success': True,
             'data': {
@@ -1698,16 +1755,11 @@ def accept_reconsent(group_id: str, user_id: str) -> Dict[str, Any]:
     try:
         supabase = get_supabase_admin_client()
 
-        group_response = supabase.table('groups')\
-            .select('*')\
-            .eq('id', group_id)\
-            .limit(1)\
-            .execute()
+        group = _get_group(supabase, group_id)
 
-        if not group_response.data:
+        if not group:
             return {'success': False, 'message': 'Grupo não encontrado', 'status_code': 404}
 
-        group = group_response.data[0]
         membership = _get_user_membership(supabase, group_id, user_id)
 
         if not membership or membership.get('status') != 'pending_reconsent':
@@ -1725,6 +1777,7 @@ def accept_reconsent(group_id: str, user_id: str) -> Dict[str, Any]:
             })\
             .eq('id', membership['id'])\
             .execute()
+        _forget_memberships(supabase, group_id)
 
         if not updated.data:
             return {'success': False, 'message': 'Erro ao confirmar re-consentimento'}
@@ -1764,6 +1817,7 @@ def decline_reconsent(group_id: str, user_id: str) -> Dict[str, Any]:
             .delete()\
             .eq('id', membership['id'])\
             .execute()
+        _forget_memberships(supabase, group_id)
 
         return {
             'success': True,
@@ -1852,22 +1906,21 @@ def _get_group_and_memberships(
     actor_id: str,
     target_user_id: str,
 ) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]], Optional[Dict[str, Any]], Optional[str]]:
-    group_response = supabase.table('groups')\
-        .select('*')\
-        .eq('id', group_id)\
-        .limit(1)\
-        .execute()
+    group = _get_group(supabase, group_id)
 
-    if not group_response.data:
+    if not group:
         return None, None, None, 'Grupo não encontrado'
 
-    group = group_response.data[0]
-    actor_membership = _get_user_membership(supabase, group_id, actor_id)
-    target_membership = _get_user_membership(supabase, group_id, target_user_id)
+    memberships = _get_user_memberships(supabase, group_id, [actor_id, target_user_id])
+    actor_membership = memberships[actor_id]
+    target_membership = memberships[target_user_id]
 
     if not target_membership or target_membership.get('status') != 'active':
         return group, actor_membership, None, 'Membro não encontrado'
 
+    # Aviso ao dono e payload da carteira usam os dois perfis: uma consulta só
+    _fetch_user_profiles(supabase, [actor_id, target_user_id])
+
     return group, actor_membership, target_membership, None
 
 
@@ -1934,6 +1987,7 @@ def _wallet_payload_from_member(
     target_user = _fetch_user_profile(supabase, target_user_id)
     portfolio = get_user_portfolio_full(target_user_id, use_admin=True)
     transactions_result = list_transactions(target_user_id)
+    transactions_ok = transactions_result.get('success')
 
     return {
         'member': {
@@ -1942,26 +1996,82 @@ def _wallet_payload_from_member(
             'email': target_user.get('email'),
         },
         'portfolio': portfolio or [],
-        'transactions': transactions_result.get('data') or [] if transactions_result.get('success') else [],
+        'transactions': transactions_result.get('data') or [] if transactions_ok else [],
+        'transactionsNextCursor': transactions_result.get('next_cursor') if transactions_ok else None,
         'canManage': can_manage,
     }
 
 
-def get_member_wallet(group_id: str, actor_id: str, target_user_id: str) -> Dict[str, Any]:
+def _wallet_mutation_payload(
+    supabase,
+    group: Dict[str, Any],
+    actor_id: str,
+    target_user_id: str,
+    previous_etag: str,
+    transaction: Optional[Dict[str, Any]],
+    stock_ids: List[Optional[str]],
+    full: bool = False,
+) -> Dict[str, Any]:
+    """
+    Resposta das mutações na carteira do membro.
+
+    Por padrão devolve só o delta: a transação alterada e as posições das
+    ações afetadas (ações sem posição restante aparecem em affectedStockIds
+    mas não em positions). Se o walletEtag que o cliente tem é igual a
+    previousWalletEtag, nada mais mudou (transações, quantidades nem preços)
+    e o delta basta; senão, recarregar.
+    full=True devolve a carteira completa, como GET .../wallet.
+    """
+    wallet_etag = get_wallet_version(target_user_id)
+
+    if full:
+        return {
+            **_wallet_payload_from_member(supabase, group, actor_id, target_user_id),
+            'transaction': transaction,
+            'walletEtag': wallet_etag,
+            'previousWalletEtag': previous_etag,
+        }
+
+    affected = list(dict.fromkeys(stock_id for stock_id in stock_ids if stock_id))
+    positions_result = (
+        get_user_positions(target_user_id, include_closed=True, stock_ids=affected)
+        if affected else {'success': True, 'data': []}
+    )
+
+    return {
+        'transaction': transaction,
+        'positions': positions_result.get('data') or [] if positions_result.get('success') else [],
+        'affectedStockIds': affected,
+        'walletEtag': wallet_etag,
+        'previousWalletEtag': previous_etag,
+    }
+
+
+def get_member_wallet(
+    group_id: str,
+    actor_id: str,
+    target_user_id: str,
+    cursor: Optional[str] = None,
+    limit: Optional[Any] = None,
+    known_etags: Optional[Iterable[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Carteira e transações de um membro.
+
+    known_etags: walletEtags que o cliente já tem (If-None-Match). Se a
+    versão atual estiver entre eles, devolve not_modified=True sem montar a
+    carteira.
+    """
     try:
         supabase = get_supabase_admin_client()
 
-        group_response = supabase.table('groups')\
-            .select('*')\
-            .eq('id', group_id)\
-            .limit(1)\
-            .execute()
+        group = _get_group(supabase, group_id)
 
-        if not group_response.data:
+        if not group:
             return {'success': False, 'message': 'Grupo não encontrado', 'status_code': 404}
 
-        group = group_response.data[0]
-        actor_membership = _get_user_membership(supabase, group_id, actor_id)
+        memberships = _get_user_memberships(supabase, group_id, [actor_id, target_user_id])
+        actor_membership = memberships[actor_id]
 
         can_view, message = _can_view_member_wallet(
             group,
@@ -1973,14 +2083,23 @@ def get_member_wallet(group_id: str, actor_id: str, target_user_id: str) -> Dict
         if not can_view:
             return {'success': False, 'message': message, 'status_code': 403}
 
-        target_membership = _get_user_membership(supabase, group_id, target_user_id)
+        target_membership = memberships[target_user_id]
 
         if not target_membership or target_membership.get('status') != 'active':
             return {'success': False, 'message': 'Membro não encontrado', 'status_code': 404}
 
+        wallet_etag = get_wallet_version(target_user_id)
+        known_etags = set(known_etags or ())
+        if wallet_etag in known_etags or '*' in known_etags:
+            return {'success': True, 'not_modified': True, 'data': {'walletEtag': wallet_etag}}
+
         target_user = _fetch_user_profile(supabase, target_user_id)
         portfolio = get_user_portfolio_full(target_user_id, use_admin=True)
-        transactions_result = list_transactions(target_user_id)
+        transactions_result = list_transactions(
+            target_user_id,
+            limit=limit,
+            cursor=cursor,
+        )
 
         if not transactions_result.get('success'):
             return {
@@ -2005,7 +2124,9 @@ def get_member_wallet(group_id: str, actor_id: str, target_user_id: str) -> Dict
                 },
                 'portfolio': portfolio or [],
                 'transactions': transactions_result.get('data') or [],
+                'transactionsNextCursor': transactions_result.get('next_cursor'),
                 'canManage': can_manage,
+                'walletEtag': wallet_etag,
             },
         }
     except Exception as error:
@@ -2013,11 +2134,57 @@ def get_member_wallet(group_id: str, actor_id: str, target_user_id: str) -> Dict
         return {'success': False, 'message': 'Erro ao carregar carteira do membro'}
 
 
+def get_group_portfolio(group_id: str, actor_id: str) -> Dict[str, Any]:
+    """
+    Carteira agregada do grupo: posições, valor e desempenho de cada membro
+    visível para quem pede, totais do grupo e maiores posições.
+
+    Segue a mesma regra de GET .../wallet: sem permissão para ver carteiras
+    de outros membros, o agregado contém só a carteira de quem pede.
+    """
+    try:
+        supabase = get_supabase_admin_client()
+
+        group = _get_group(supabase, group_id)
+
+        if not group:
+            return {'success': False, 'message': 'Grupo não encontrado', 'status_code': 404}
+
+        actor_membership = _get_user_membership(supabase, group_id, actor_id)
+
+        if not actor_membership or actor_membership.get('status') != 'active':
+            return {
+                'success': False,
+                'message': 'Você precisa ser membro ativo do grupo',
+                'status_code': 403,
+            }
+
+        members = [
+            {
+                'userId': member['user_id'],
+                'name': member['name'],
+                'roles': member['roles'],
+            }
+            for member in _fetch_group_members(supabase, group_id)
+            if member.get('status') == 'active'
+            and _can_view_member_wallet(group, actor_membership, actor_id, member['user_id'])[0]
+        ]
+
+        return {
+            'success': True,
+            'data': build_group_portfolio(group_id, members),
+        }
+    except Exception as error:
+        print(f'Erro ao buscar carteira do grupo: {error}')
+        return {'success': False, 'message': 'Erro ao carregar carteira do grupo'}
+
+
 def create_member_transaction(
     group_id: str,
     actor_id: str,
     target_user_id: str,
     payload: Dict[str, Any],
+    full: bool = False,
 ) -> Dict[str, Any]:
     try:
         supabase = get_supabase_admin_client()
@@ -2041,6 +2208,7 @@ def create_member_transaction(
         if not can_manage:
             return {'success': False, 'message': message, 'status_code': 403}
 
+        previous_etag = get_wallet_version(target_user_id)
         result = create_transaction(target_user_id, payload)
 
         if not result.get('success'):
@@ -2058,7 +2226,16 @@ def create_member_transaction(
         return {
             'success': True,
             'message': result.get('message'),
-            'data': _wallet_payload_from_member(supabase, group, actor_id, target_user_id),
+            'data': _wallet_mutation_payload(
+                supabase,
+                group,
+                actor_id,
+                target_user_id,
+                previous_etag,
+                result.get('data'),
+                [(result.get('data') or {}).get('stock_id')],
+                full=full,
+            ),
         }
     except Exception as error:
         print(f'Erro ao criar transação do membro: {error}')
@@ -2071,6 +2248,7 @@ def update_member_transaction(
     target_user_id: str,
     transaction_id: str,
     payload: Dict[str, Any],
+    full: bool = False,
 ) -> Dict[str, Any]:
     try:
         supabase = get_supabase_admin_client()
@@ -2095,6 +2273,19 @@ def update_member_transaction(
         if not can_manage:
             return {'success': False, 'message': message, 'status_code': 403}
 
+        previous_etag = get_wallet_version(target_user_id)
+        previous_stock_id = None
+        if 'stock_id' in payload or 'ticker' in payload:
+            # A transação pode mudar de ação: a posição antiga também é afetada
+            existing = supabase.table('transactions')\
+                .select('stock_id')\
+                .eq('id', transaction_id)\
+                .eq('user_id', target_user_id)\
+                .limit(1)\
+                .execute()
+            if existing.data:
+                previous_stock_id = existing.data[0].get('stock_id')
+
         result = update_transaction(target_user_id, transaction_id, payload)
 
         if not result.get('success'):
@@ -2112,7 +2303,16 @@ def update_member_transaction(
         return {
             'success': True,
             'message': result.get('message'),
-            'data': _wallet_payload_from_member(supabase, group, actor_id, target_user_id),
+            'data': _wallet_mutation_payload(
+                supabase,
+                group,
+                actor_id,
+                target_user_id,
+                previous_etag,
+                result.get('data'),
+                [(result.get('data') or {}).get('stock_id'), previous_stock_id],
+                full=full,
+            ),
         }
     except Exception as error:
         print(f'Erro ao atualizar transação do membro: {error}')
@@ -2124,6 +2324,7 @@ def delete_member_transaction(
     actor_id: str,
     target_user_id: str,
     transaction_id: str,
+    full: bool = False,
 ) -> Dict[str, Any]:
     try:
         supabase = get_supabase_admin_client()
@@ -2147,8 +2348,9 @@ def delete_member_transaction(
         if not can_manage:
             return {'success': False, 'message': message, 'status_code': 403}
 
+        previous_etag = get_wallet_version(target_user_id)
         existing = supabase.table('transactions')\
-            .select('id, type, stocks(ticker)')\
+            .select('id, type, stock_id, stocks(ticker)')\
             .eq('id', transaction_id)\
             .eq('user_id', target_user_id)\
             .limit(1)\
@@ -2162,6 +2364,7 @@ def delete_member_transaction(
             tx_snapshot = {
                 'id': transaction_id,
                 'type': existing.data[0].get('type'),
+                'stock_id': existing.data[0].get('stock_id'),
                 'ticker': stock.get('ticker'),
             }
 
@@ -2182,7 +2385,16 @@ def delete_member_transaction(
         return {
             'success': True,
             'message': result.get('message'),
-            'data': _wallet_payload_from_member(supabase, group, actor_id, target_user_id),
+            'data': _wallet_mutation_payload(
+                supabase,
+                group,
+                actor_id,
+                target_user_id,
+                previous_etag,
+                {**tx_snapshot, 'deleted': True} if tx_snapshot else {'id': transaction_id, 'deleted': True},
+                [(tx_snapshot or {}).get('stock_id')],
+                full=full,
+            ),
         }
     except Exception as error:
         print(f'Erro ao remover transação do membro: {error}')
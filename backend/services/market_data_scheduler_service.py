@@ -0,0 +1,196 @@
+"""
+Agendador de atualização de dados de mercado em segundo plano
+Atualiza periodicamente os preços de todas as ações acompanhadas pelos usuários
+(carteiras e watchlists), para que as requisições apenas leiam o cache
+"""
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from config.supabase_config import get_supabase_admin_client
+from services.brapi_price_service import get_current_stock_prices_batch
+from services.yahoo_dividend_service import fetch_dividends_batch
+from services.save_service import save_prices_bulk, save_dividends_bulk
+from services.trading_calendar_service import is_market_open, is_after_close
+
+# Habilita o agendador em create_app (ative em APENAS um processo/worker)
+MARKET_SCHEDULER_ENABLED = os.getenv('MARKET_SCHEDULER_ENABLED', 'false').lower() == 'true'
+
+# Intervalo (segundos) entre ciclos durante o pregão
+MARKET_SCHEDULER_INTERVAL_SECONDS = int(os.getenv('MARKET_SCHEDULER_INTERVAL_SECONDS', '300'))
+
+# Tamanho da página ao ler carteiras/watchlists
+_PAGE_SIZE = 1000
+
+_lock = threading.Lock()
+_stop_event = threading.Event()
+_scheduler_thread: Optional[threading.Thread] = None
+_status = {
+    "cycles": 0,
+    "last_run_at": None,
+    "last_close_run_date": None,
+    "last_result": None
+}
+
+
+def _fetch_tracked_rows(supabase, table: str) -> List[Dict[str, any]]:
+    rows = []
+    offset = 0
+    while True:
+        response = supabase.table(table)\
+            .select('stock_id, stocks(ticker)')\
+            .range(offset, offset + _PAGE_SIZE - 1)\
+            .execute()
+
+        page = response.data or []
+        rows.extend(page)
+        if len(page) < _PAGE_SIZE:
+            break
+        offset += _PAGE_SIZE
+    return rows
+
+
+def get_tracked_stocks() -> Dict[str, str]:
+    """
+    Busca o conjunto distinto de ações em carteiras e watchlists de todos os usuários
+
+    Returns:
+        Dicionário {ticker: stock_id}
+    """
+    supabase = get_supabase_admin_client()
+
+    tracked = {}
+    for table in ('user_portfolio', 'user_watchlist'):
+        for row in _fetch_tracked_rows(supabase, table):
+            stock = row.get('stocks') or {}
+            if row.get('stock_id') and stock.get('ticker'):
+                tracked[stock['ticker'].upper().strip()] = row['stock_id']
+
+    return tracked
+
+
+def run_refresh_cycle(include_dividends: bool = False) -> Dict[str, any]:
+    """
+    Executa um ciclo de atualização para todas as ações acompanhadas
+
+    Preços atuais são buscados em lote na BraAPI e gravados com os salvamentos
+    em lote do save_service (o que também invalida os caches de visualização).
+
+    Args:
+        include_dividends: Se True, também atualiza dividendos (feito uma vez por dia)
+
+    Returns:
+        dict: {"tracked": int, "prices_saved": int, "dividends_saved": int, "started_at": str}
+    """
+    started_at = datetime.utcnow().isoformat()
+    print(f"[SCHEDULER] Iniciando ciclo de atualização (dividendos={include_dividends})...")
+
+    try:
+        tracked = get_tracked_stocks()
+    except Exception as e:
+        print(f"[SCHEDULER] Erro ao buscar ações acompanhadas: {str(e)}")
+        return {"tracked": 0, "prices_saved": 0, "dividends_saved": 0, "started_at": started_at}
+
+    if not tracked:
+        print("[SCHEDULER] Nenhuma ação acompanhada")
+        return {"tracked": 0, "prices_saved": 0, "dividends_saved": 0, "started_at": started_at}
+
+    # 1. Preços atuais em lote
+    batch_prices = get_current_stock_prices_batch(list(tracked.keys()))
+    price_result = save_prices_bulk({
+        tracked[ticker]: [{"date": price_data["date"], "price": price_data["current_price"]}]
+        for ticker, price_data in batch_prices.items()
+        if ticker in tracked
+    })
+    prices_saved = sum(1 for outcome in price_result["by_stock"].values() if outcome["saved"] > 0)
+
+    # 2. Dividendos (uma vez por dia, no ciclo de fechamento)
+    dividends_saved = 0
+    if include_dividends:
+        dividends_by_ticker = fetch_dividends_batch(list(tracked.keys()))
+        dividend_result = save_dividends_bulk({
+            tracked[ticker]: dividends
+            for ticker, dividends in dividends_by_ticker.items()
+            if ticker in tracked and dividends
+        })
+        dividends_saved = sum(1 for outcome in dividend_result["by_stock"].values() if outcome["saved"] > 0)
+
+    result = {
+        "tracked": len(tracked),
+        "prices_saved": prices_saved,
+        "dividends_saved": dividends_saved,
+        "started_at": started_at
+    }
+    print(f"[SCHEDULER] ✅ Ciclo concluído: {result}")
+    return result
+
+
+def _should_run_close_cycle(now: datetime) -> bool:
+    """Após o fechamento de um dia de pregão, roda um ciclo (com dividendos) uma única vez"""
+    if not is_after_close(now):
+        return False
+    return _status["last_close_run_date"] != now.date().isoformat()
+
+
+def _scheduler_loop(interval_seconds: int) -> None:
+    while not _stop_event.is_set():
+        now = datetime.now()
+        try:
+            if is_market_open(now):
+                _status["last_result"] = run_refresh_cycle(include_dividends=False)
+                _status["cycles"] += 1
+                _status["last_run_at"] = now.isoformat()
+            elif _should_run_close_cycle(now):
+                _status["last_result"] = run_refresh_cycle(include_dividends=True)
+                _status["cycles"] += 1
+                _status["last_run_at"] = now.isoformat()
+                _status["last_close_run_date"] = now.date().isoformat()
+        except Exception as e:
+            print(f"[SCHEDULER] Erro inesperado no ciclo: {str(e)}")
+
+        _stop_event.wait(interval_seconds)
+
+
+def start_market_scheduler(interval_seconds: int = MARKET_SCHEDULER_INTERVAL_SECONDS) -> bool:
+    """
+    Inicia a thread do agendador (uma única vez por processo)
+
+    Args:
+        interval_seconds: Intervalo entre ciclos
+
+    Returns:
+        True se o agendador foi iniciado agora, False se já estava rodando
+    """
+    global _scheduler_thread
+
+    with _lock:
+        if _scheduler_thread is not None and _scheduler_thread.is_alive():
+            return False
+
+        _stop_event.clear()
+        _scheduler_thread = threading.Thread(
+            target=_scheduler_loop,
+            args=(max(1, int(interval_seconds)),),
+            name='market-data-scheduler',
+            daemon=True
+        )
+        _scheduler_thread.start()
+
+    print(f"[SCHEDULER] Agendador de dados de mercado iniciado (intervalo: {interval_seconds}s)")
+    return True
+
+
+def stop_market_scheduler() -> None:
+    """Sinaliza a thread do agendador para parar após o ciclo atual"""
+    _stop_event.set()
+
+
+def get_scheduler_status() -> Dict[str, any]:
+    """Retorna o estado do agendador (para diagnóstico)"""
+    return {
+        "enabled": MARKET_SCHEDULER_ENABLED,
+        "running": _scheduler_thread is not None and _scheduler_thread.is_alive(),
+        "interval_seconds": MARKET_SCHEDULER_INTERVAL_SECONDS,
+        **_status
+    }
@@ -2,18 +2,22 @@
 Serviço de orquestração de atualização de dados
 Coordena todas as operações quando o usuário acessa a página de uma ação
 """
-from datetime import datetime
-from typing import Dict, Optional
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
 
 # Importa serviços de busca externa
-from services.brapi_price_service import fetch_prices_from_brapi
+from services.brapi_price_service import fetch_prices_from_brapi, fetch_prices_since
 from services.yahoo_dividend_service import fetch_dividends_from_yahoo
 
 # Importa serviços de cache
 from services.price_cache_service import (
     get_stock_id_by_ticker,
     get_prices_from_cache,
-    get_most_recent_price_date
+    get_most_recent_price_date,
+    get_oldest_price_date
 )
 from services.dividend_cache_service import (
     get_dividends_from_cache,
@@ -31,8 +35,247 @@ from services.update_detection_service import (
 # Importa serviço de salvamento
 from services.save_service import save_prices, save_dividends
 
+# Importa cache da visualização (memória + compartilhado)
+from services.stock_view_cache_service import get_cached_view, set_cached_view
 
-def update_stock_on_page_view(ticker: str, range_param: str, force_update: bool = False) -> Dict[str, any]:
+from services.trading_calendar_service import is_trading_day, next_session, sessions_between
+
+from utils.cache import TTLCache
+from utils.singleflight import SingleFlight
+
+# Coalesce "buscar na API + salvar" simultâneos da mesma ação: usuários que abrem
+# a mesma ação ao mesmo tempo compartilham uma única busca e um único UPSERT
+refresh_flight = SingleFlight("orchestration")
+
+# Stale-while-revalidate: atualizações em segundo plano disparadas por /view?swr=true
+VIEW_REVALIDATE_MAX_WORKERS = int(os.getenv('VIEW_REVALIDATE_MAX_WORKERS', '4'))
+# Por quanto tempo (e para quantas ações/ranges) o estado da última revalidação é guardado
+VIEW_REVALIDATE_STATUS_TTL_SECONDS = int(os.getenv('VIEW_REVALIDATE_STATUS_TTL_SECONDS', '3600'))
+VIEW_REVALIDATE_STATUS_MAX = int(os.getenv('VIEW_REVALIDATE_STATUS_MAX', '1000'))
+
+_revalidate_executor = ThreadPoolExecutor(
+    max_workers=VIEW_REVALIDATE_MAX_WORKERS,
+    thread_name_prefix='view-revalidate'
+)
+_revalidations_lock = threading.Lock()
+_revalidations = TTLCache(
+    max_size=VIEW_REVALIDATE_STATUS_MAX,
+    default_ttl=VIEW_REVALIDATE_STATUS_TTL_SECONDS
+)
+
+
+def _refresh_prices(stock_id: str, ticker: str, range_param: str, since=None) -> bool:
+    """
+    Busca preços na BraAPI e salva no banco
+    
+    Args:
+        since: Data do último preço em cache; se informada, busca apenas a
+            janela faltante (incremental) em vez do range completo
+    
+    Returns:
+        True se algum preço foi salvo
+    """
+    if since is not None:
+        prices_from_api = fetch_prices_since(ticker, since, max_range=range_param)
+    else:
+        prices_from_api = fetch_prices_from_brapi(ticker, range_param)
+    
+    if prices_from_api is None:
+        print("[ERRO] Erro ao buscar preços da BraAPI - Continuando...")
+        return False
+    
+    if len(prices_from_api) == 0:
+        print("[AVISO] Nenhum preço retornado da BraAPI")
+        return False
+    
+    # Salva preços no banco
+    print(f"[INFO] Salvando {len(prices_from_api)} preços no banco...")
+    saved_count = save_prices(stock_id, prices_from_api)
+    
+    if saved_count > 0:
+        print(f"[OK] {saved_count} preços salvos com sucesso")
+        return True
+    
+    print("[AVISO] Nenhum preço foi salvo")
+    return False
+
+
+def _history_covers_range(stock_id: str, range_days: int) -> bool:
+    """
+    Se o histórico em cache começa no primeiro pregão do range (ou antes)
+
+    Preços isolados gravados por login/agendador/adição à carteira deixam o
+    último preço recente sem que o período pedido esteja no banco.
+    """
+    oldest = get_oldest_price_date(stock_id)
+    if oldest is None:
+        return False
+    range_start = datetime.now().date() - timedelta(days=range_days)
+    first_session = range_start if is_trading_day(range_start) else next_session(range_start)
+    return oldest <= first_session
+
+
+def _refresh_dividends(stock_id: str, ticker: str) -> bool:
+    """
+    Busca dividendos no Yahoo Finance e salva no banco
+    
+    Returns:
+        True se algum dividendo foi salvo
+    """
+    dividends_from_api = fetch_dividends_from_yahoo(ticker)
+    
+    if dividends_from_api is None:
+        print("[ERRO] Erro ao buscar dividendos do Yahoo Finance - Continuando...")
+        return False
+    
+    # Salva dividendos no banco (mesmo se lista vazia)
+    if len(dividends_from_api) == 0:
+        print("[INFO] Nenhum dividendo retornado (ação pode não pagar dividendos)")
+        return False
+    
+    print(f"[INFO] Salvando {len(dividends_from_api)} dividendos no banco...")
+    saved_count = save_dividends(stock_id, dividends_from_api)
+    
+    if saved_count > 0:
+        print(f"[OK] {saved_count} dividendos salvos com sucesso")
+        return True
+    
+    print("[AVISO] Nenhum dividendo foi salvo")
+    return False
+
+
+def _revalidation_key(ticker: str, range_param: str) -> tuple:
+    return (ticker.upper().strip(), range_param.lower().strip())
+
+
+def _run_revalidation(key: tuple) -> None:
+    """Executa a atualização completa (síncrona) em segundo plano e registra o resultado"""
+    ticker, range_param = key
+    try:
+        result = update_stock_on_page_view(ticker, range_param)
+        status = {
+            "state": "done" if result.get("success") else "failed",
+            "prices_updated": result.get("data", {}).get("prices_updated", False),
+            "dividends_updated": result.get("data", {}).get("dividends_updated", False),
+            "error": result.get("error")
+        }
+    except Exception as e:
+        status = {"state": "failed", "error": str(e)}
+    
+    with _revalidations_lock:
+        # A entrada pode ter sido descartada (TTL/limite) durante a execução
+        current = _revalidations.get(key) or {"started_at": None}
+        _revalidations.set(key, {
+            **current,
+            **status,
+            "finished_at": datetime.utcnow().isoformat()
+        })
+
+
+def schedule_revalidation(ticker: str, range_param: str) -> Dict[str, any]:
+    """
+    Agenda a atualização da visualização em segundo plano (uma por ação/range)
+    
+    Returns:
+        Estado da revalidação (ver get_revalidation_status)
+    """
+    key = _revalidation_key(ticker, range_param)
+    
+    with _revalidations_lock:
+        current = _revalidations.get(key)
+        if current is not None and current["state"] == "pending":
+            return dict(current)
+        
+        status = {
+            "state": "pending",
+            "started_at": datetime.utcnow().isoformat(),
+            "finished_at": None
+        }
+        _revalidations.set(key, status)
+        status = dict(status)
+    
+    print(f"[SWR] Agendando atualização em segundo plano de {key[0]} ({key[1]})")
+    _revalidate_executor.submit(_run_revalidation, key)
+    return status
+
+
+def get_revalidation_status(ticker: str, range_param: str) -> Optional[Dict[str, any]]:
+    """
+    Estado da última revalidação em segundo plano da ação/range
+    
+    Returns:
+        {"state": "pending" | "done" | "failed", "started_at", "finished_at",
+         "prices_updated", "dividends_updated"} ou None se nunca houve revalidação
+    """
+    with _revalidations_lock:
+        status = _revalidations.get(_revalidation_key(ticker, range_param))
+        return dict(status) if status is not None else None
+
+
+def _stale_view(
+    ticker: str,
+    range_param: str,
+    stock_id: str,
+    range_days: int
+) -> Tuple[Optional[Dict[str, any]], Dict[str, any]]:
+    """
+    Stale-while-revalidate: se o banco tem dados, mas desatualizados, devolve-os
+    na hora (com a idade) e agenda a atualização em segundo plano
+    
+    Returns:
+        (resposta, consultado): resposta no formato de update_stock_on_page_view,
+        ou None quando não há o que servir (cache vazio) ou os dados já estão
+        atualizados; consultado traz o que já foi lido do banco
+        ("last_price_date", "has_dividends", "last_dividend_date") para o
+        caminho síncrono não repetir as consultas
+    """
+    last_price_date = get_most_recent_price_date(stock_id)
+    known = {"last_price_date": last_price_date}
+    if last_price_date is None:
+        print("[SWR] Sem preços em cache - Atualização síncrona")
+        return None, known
+    
+    has_dividends = check_if_dividends_exist(stock_id)
+    last_dividend_date = get_most_recent_dividend_date(stock_id) if has_dividends else None
+    known.update(has_dividends=has_dividends, last_dividend_date=last_dividend_date)
+    
+    prices_stale = should_update_prices(last_price_date, range_days)
+    dividends_stale = should_update_dividends(last_dividend_date, has_dividends)
+    if not prices_stale and not dividends_stale:
+        return None, known
+    
+    revalidation = schedule_revalidation(ticker, range_param)
+    today = datetime.now().date()
+    
+    return {
+        "success": True,
+        "data": {
+            "ticker": ticker.upper(),
+            "prices": get_prices_from_cache(stock_id, range_days),
+            "dividends": get_dividends_from_cache(stock_id),
+            "prices_updated": False,
+            "dividends_updated": False,
+            "cached": False,
+            "stale": True,
+            "revalidating": revalidation["state"] == "pending",
+            "age": {
+                "prices_last_date": last_price_date.isoformat(),
+                "prices_sessions_behind": sessions_between(last_price_date, today),
+                "prices_stale": prices_stale,
+                "dividends_last_date": last_dividend_date.isoformat() if last_dividend_date else None,
+                "dividends_stale": dividends_stale
+            },
+            "timestamp": datetime.utcnow().isoformat()
+        }
+    }, known
+
+
+def update_stock_on_page_view(
+    ticker: str,
+    range_param: str,
+    force_update: bool = False,
+    stale_while_revalidate: bool = False
+) -> Dict[str, any]:
     """
     Orquestra todas as operações para atualizar dados quando usuário acessa a página
     
@@ -40,6 +283,9 @@ def update_stock_on_page_view(ticker: str, range_param: str, force_update: bool
         ticker: Código da ação (ex: "PETR4")
         range_param: Período do histórico ("7d", "1m" ou "3m")
         force_update: Se True, força atualização ignorando cache (padrão: False)
+        stale_while_revalidate: Se True e os dados do banco estiverem
+            desatualizados, retorna-os na hora (data.stale=True, data.age) e
+            busca as APIs externas em segundo plano (ver get_revalidation_status)
         
     Returns:
         Dicionário com resultado da operação:
@@ -64,6 +310,8 @@ def update_stock_on_page_view(ticker: str, range_param: str, force_update: bool
     # Variáveis de controle
     prices_updated = False
     dividends_updated = False
+    # Preços do cache estão atualizados (não precisavam de busca ou a busca salvou)
+    prices_fresh = False
     prices_result = []
     dividends_result = []
     
@@ -84,6 +332,25 @@ def update_stock_on_page_view(ticker: str, range_param: str, force_update: bool
         
         print(f"[OK] Range '{range_param}' convertido para {range_days} dias\n")
         
+        # ============================================================================
+        # PASSO 1b: CACHE DA VISUALIZAÇÃO (evita todas as consultas ao banco)
+        # ============================================================================
+        if not force_update:
+            cached_data = get_cached_view(ticker, range_param)
+            if cached_data is not None:
+                print(f"[OK] Visualização servida do cache - Nenhuma consulta ao banco")
+                print(f"\n{'='*80}\n")
+                return {
+                    "success": True,
+                    "data": {
+                        **cached_data,
+                        "prices_updated": False,
+                        "dividends_updated": False,
+                        "cached": True,
+                        "timestamp": datetime.utcnow().isoformat()
+                    }
+                }
+        
         # ============================================================================
         # PASSO 2: BUSCAR STOCK_ID
         # ============================================================================
@@ -100,6 +367,18 @@ def update_stock_on_page_view(ticker: str, range_param: str, force_update: bool
         
         print(f"[OK] stock_id encontrado: {stock_id}\n")
         
+        # ============================================================================
+        # PASSO 2b: STALE-WHILE-REVALIDATE (responde já, atualiza em segundo plano)
+        # ============================================================================
+        # Datas já lidas pelo passo 2b (não são consultadas de novo)
+        known = {}
+        if stale_while_revalidate and not force_update:
+            stale_response, known = _stale_view(ticker, range_param, stock_id, range_days)
+            if stale_response is not None:
+                print(f"[SWR] Dados desatualizados servidos do banco - Atualização em segundo plano")
+                print(f"\n{'='*80}\n")
+                return stale_response
+        
         # ============================================================================
         # PASSO 3: VERIFICAR E ATUALIZAR PREÇOS
         # ============================================================================
@@ -109,7 +388,10 @@ def update_stock_on_page_view(ticker: str, range_param: str, force_update: bool
         try:
             # PASSO 3a: Buscar data mais recente no cache
             print("[PASSO 3a] Buscando data do preço mais recente no cache...")
-            last_price_date = get_most_recent_price_date(stock_id)
+            if "last_price_date" in known:
+                last_price_date = known["last_price_date"]
+            else:
+                last_price_date = get_most_recent_price_date(stock_id)
             
             if last_price_date:
                 print(f"[OK] Último preço em cache: {last_price_date}")
@@ -130,25 +412,25 @@ def update_stock_on_page_view(ticker: str, range_param: str, force_update: bool
             if needs_update:
                 print("\n[PASSO 3c] Buscando preços da BraAPI...")
                 
-                # Busca preços da API externa
-                prices_from_api = fetch_prices_from_brapi(ticker, range_param)
+                # Com o histórico do range já em cache, busca só a janela faltante
+                # (incremental); force_update, cache vazio ou histórico que não
+                # cobre o range buscam o range completo
+                incremental = (
+                    last_price_date is not None
+                    and not force_update
+                    and _history_covers_range(stock_id, range_days)
+                )
+                since = last_price_date if incremental else None
                 
-                if prices_from_api is None:
-                    print("[ERRO] Erro ao buscar preços da BraAPI - Continuando...")
-                elif len(prices_from_api) == 0:
-                    print("[AVISO] Nenhum preço retornado da BraAPI")
-                else:
-                    # Salva preços no banco
-                    print(f"[INFO] Salvando {len(prices_from_api)} preços no banco...")
-                    saved_count = save_prices(stock_id, prices_from_api)
-                    
-                    if saved_count > 0:
-                        prices_updated = True
-                        print(f"[OK] {saved_count} preços salvos com sucesso")
-                    else:
-                        print("[AVISO] Nenhum preço foi salvo")
+                # Busca preços da API externa e salva (coalescido por ação/range)
+                prices_updated = refresh_flight.do(
+                    ("prices", ticker.upper().strip(), range_param.lower(), since),
+                    lambda: _refresh_prices(stock_id, ticker, range_param, since)
+                )
+                prices_fresh = prices_updated
             else:
                 print("[INFO] Cache de preços está atualizado - Não precisa buscar API")
+                prices_fresh = True
             
             # PASSO 3d: Buscar preços do cache (sempre)
             print("\n[PASSO 3d] Buscando preços do cache...")
@@ -174,12 +456,18 @@ def update_stock_on_page_view(ticker: str, range_param: str, force_update: bool
         try:
             # PASSO 4a: Buscar informações de dividendos
             print("[PASSO 4a] Verificando dividendos no cache...")
-            has_dividends = check_if_dividends_exist(stock_id)
+            if "has_dividends" in known:
+                has_dividends = known["has_dividends"]
+            else:
+                has_dividends = check_if_dividends_exist(stock_id)
             
             last_dividend_date = None
             if has_dividends:
                 print("[OK] Dividendos encontrados em cache")
-                last_dividend_date = get_most_recent_dividend_date(stock_id)
+                if "last_dividend_date" in known:
+                    last_dividend_date = known["last_dividend_date"]
+                else:
+                    last_dividend_date = get_most_recent_dividend_date(stock_id)
                 if last_dividend_date:
                     print(f"[OK] Último dividendo em cache: {last_dividend_date}")
             else:
@@ -199,24 +487,11 @@ def update_stock_on_page_view(ticker: str, range_param: str, force_update: bool
             if needs_update:
                 print("\n[PASSO 4c] Buscando dividendos do Yahoo Finance...")
                 
-                # Busca dividendos da API externa
-                dividends_from_api = fetch_dividends_from_yahoo(ticker)
-                
-                if dividends_from_api is None:
-                    print("[ERRO] Erro ao buscar dividendos do Yahoo Finance - Continuando...")
-                else:
-                    # Salva dividendos no banco (mesmo se lista vazia)
-                    if len(dividends_from_api) == 0:
-                        print("[INFO] Nenhum dividendo retornado (ação pode não pagar dividendos)")
-                    else:
-                        print(f"[INFO] Salvando {len(dividends_from_api)} dividendos no banco...")
-                        saved_count = save_dividends(stock_id, dividends_from_api)
-                        
-                        if saved_count > 0:
-                            dividends_updated = True
-                            print(f"[OK] {saved_count} dividendos salvos com sucesso")
-                        else:
-                            print("[AVISO] Nenhum dividendo foi salvo")
+                # Busca dividendos da API externa e salva (coalescido por ação)
+                dividends_updated = refresh_flight.do(
+                    ("dividends", ticker.upper().strip()),
+                    lambda: _refresh_dividends(stock_id, ticker)
+                )
             else:
                 print("[INFO] Cache de dividendos está atualizado - Não precisa buscar API")
             
@@ -248,10 +523,18 @@ def update_stock_on_page_view(ticker: str, range_param: str, force_update: bool
                 "dividends": dividends_result,
                 "prices_updated": prices_updated,
                 "dividends_updated": dividends_updated,
+                "cached": False,
                 "timestamp": datetime.utcnow().isoformat()
             }
         }
         
+        # Guarda no cache apenas respostas completas (com preços) e atualizadas;
+        # se a BraAPI falhou, os preços antigos não ficam presos no cache
+        if prices_result and prices_fresh:
+            set_cached_view(ticker, range_param, response["data"])
+        elif prices_result:
+            print("[AVISO] Preços desatualizados (falha na BraAPI) - Visualização não guardada no cache")
+        
         print(f"\n[OK] Operação concluída com sucesso!")
         print(f"  - Preços retornados: {len(prices_result)}")
         print(f"  - Dividendos retornados: {len(dividends_result)}")
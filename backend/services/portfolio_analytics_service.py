@@ -0,0 +1,318 @@
+"""
+Análise da carteira: série diária de valor, retorno ponderado no tempo (TWR),
+volatilidade, drawdown máximo e contribuição por ativo
+
+Os cálculos são vetorizados com NumPy sobre a matriz datas x ativos montada a
+partir do histórico em memória (services/price_history_service.py) e das
+transações do usuário - sem laços Python por dia/ativo
+"""
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config.supabase_config import get_supabase_client, get_supabase_admin_client
+from services.price_history_service import load_price_histories
+from services.stock_cache_service import get_ticker
+from utils.pagination import fetch_all_rows
+from utils.price_series import PriceSeries
+
+# Períodos aceitos por /api/portfolio/analytics (dias corridos)
+ANALYTICS_RANGES = {
+    "7d": 7,
+    "1m": 30,
+    "3m": 90,
+    "6m": 180,
+    "1y": 365
+}
+DEFAULT_ANALYTICS_RANGE = "3m"
+
+# Pregões por ano, para anualizar a volatilidade diária
+TRADING_DAYS_PER_YEAR = 252
+
+
+def _date_axis(series_list: List[PriceSeries], start: date, end: date) -> np.ndarray:
+    """Datas com pregão no período: união das datas de preço de todos os ativos"""
+    windows = [series.between(start, end).dates for series in series_list]
+    if not windows:
+        return np.empty(0, dtype='datetime64[D]')
+    return np.unique(np.concatenate(windows))
+
+
+def _price_matrix(series_list: List[PriceSeries], axis: np.ndarray) -> np.ndarray:
+    """
+    Matriz T x N de preços de fechamento, repetindo o último preço conhecido
+    em dias sem cotação do ativo (NaN antes do primeiro preço)
+    """
+    prices = np.full((len(axis), len(series_list)), np.nan)
+    for column, series in enumerate(series_list):
+        if len(series) == 0:
+            continue
+        index = np.searchsorted(series.dates, axis, side='right') - 1
+        known = index >= 0
+        prices[known, column] = series.prices[index[known]]
+    return prices
+
+
+def _position_matrices(
+    axis: np.ndarray,
+    n_assets: int,
+    tx_assets: np.ndarray,
+    tx_dates: np.ndarray,
+    tx_quantities: np.ndarray,
+    tx_prices: np.ndarray,
+    initial_quantities: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Quantidade em carteira e aportes (+) / resgates (-) por dia/ativo
+
+    Transações em dias sem pregão contam no pregão seguinte; as anteriores ao
+    período formam a posição inicial e as posteriores são ignoradas.
+
+    Returns:
+        (quantities T x N, cashflows T x N)
+    """
+    quantities0 = np.zeros(n_assets) if initial_quantities is None else initial_quantities.astype(np.float64)
+    flows = np.zeros((len(axis), n_assets))
+    cashflows = np.zeros((len(axis), n_assets))
+
+    if len(tx_dates) and len(axis):
+        rows = np.searchsorted(axis, tx_dates, side='left')
+        before = tx_dates < axis[0]
+        inside = ~before & (rows < len(axis))
+
+        np.add.at(quantities0, tx_assets[before], tx_quantities[before])
+        np.add.at(flows, (rows[inside], tx_assets[inside]), tx_quantities[inside])
+        np.add.at(cashflows, (rows[inside], tx_assets[inside]), tx_quantities[inside] * tx_prices[inside])
+
+    quantities = quantities0 + np.cumsum(flows, axis=0)
+    return quantities, cashflows
+
+
+def compute_analytics(
+    axis: np.ndarray,
+    prices: np.ndarray,
+    quantities: np.ndarray,
+    cashflows: np.ndarray
+) -> Dict[str, any]:
+    """
+    Métricas da carteira a partir das matrizes de preço e posição
+
+    Retorno diário ponderado no tempo: r_t = ganho_t / V_{t-1}, onde o ganho
+    soma q_{t-1} x variação de preço dos ativos cotados em t-1 e t e, nos
+    ativos cotados em t, (quantidade negociada x preço de t) - aportes. Um
+    ativo que ganha a primeira cotação no meio do período não conta como
+    retorno nesse dia (o valor dele entra só na base dos dias seguintes).
+
+    Args:
+        axis: Datas (T) em datetime64[D]
+        prices: Preços T x N (NaN = ativo ainda sem cotação)
+        quantities: Quantidades T x N
+        cashflows: Aportes (+) e resgates (-) por dia/ativo (T x N)
+
+    Returns:
+        dict com values (T), daily_returns (T), twr, volatility (anualizada),
+        max_drawdown e, por ativo (N), pnl em R$ e contribution ao retorno
+    """
+    n_assets = prices.shape[1]
+    if len(axis) == 0:
+        return {
+            "values": np.empty(0),
+            "daily_returns": np.empty(0),
+            "twr": 0.0,
+            "volatility": None,
+            "max_drawdown": 0.0,
+            "pnl": np.zeros(n_assets),
+            "contribution": np.zeros(n_assets)
+        }
+
+    filled = np.nan_to_num(prices, nan=0.0)
+    holdings = quantities * filled
+    values = holdings.sum(axis=1)
+
+    # Ganho por ativo vindo da variação de preço sobre a posição do dia anterior
+    price_change = np.diff(filled, axis=0)
+    price_change[np.isnan(prices[:-1]) | np.isnan(prices[1:])] = 0.0
+    daily_pnl = quantities[:-1] * price_change
+
+    # Negociações do dia: valor a preço de fechamento menos o que foi pago
+    priced_now = ~np.isnan(prices[1:])
+    traded = np.diff(quantities, axis=0) * filled[1:] - cashflows[1:]
+    daily_gain = daily_pnl + np.where(priced_now, traded, 0.0)
+
+    previous = values[:-1]
+    invested = previous > 0
+    returns = np.zeros(len(axis))
+    returns[1:][invested] = daily_gain.sum(axis=1)[invested] / previous[invested]
+
+    growth = np.cumprod(1 + returns)
+    drawdowns = growth / np.maximum.accumulate(growth) - 1
+
+    active = returns[1:][invested]
+    volatility = float(active.std(ddof=1) * np.sqrt(TRADING_DAYS_PER_YEAR)) if len(active) > 1 else None
+
+    pnl = daily_pnl.sum(axis=0)
+
+    weights = np.zeros_like(daily_pnl)
+    weights[invested] = daily_pnl[invested] / previous[invested, None]
+    contribution = weights.sum(axis=0)
+
+    return {
+        "values": values,
+        "daily_returns": returns,
+        "twr": float(growth[-1] - 1),
+        "volatility": volatility,
+        "max_drawdown": float(drawdowns.min()),
+        "pnl": pnl,
+        "contribution": contribution
+    }
+
+
+def _load_positions(user_id: str):
+    """Quantidades atuais (user_portfolio) e transações do usuário"""
+    portfolio_response = get_supabase_client().table('user_portfolio')\
+        .select('stock_id, quantity')\
+        .eq('user_id', user_id)\
+        .execute()
+
+    # Paginado: históricos longos passam do max-rows do PostgREST
+    supabase = get_supabase_admin_client()
+    transactions = fetch_all_rows(
+        lambda: supabase.table('transactions')
+        .select('stock_id, type, price, quantity, date')
+        .eq('user_id', user_id)
+        .order('id')
+    )
+
+    return portfolio_response.data or [], transactions
+
+
+def get_portfolio_analytics(user_id: str, range_param: str = DEFAULT_ANALYTICS_RANGE) -> Dict[str, any]:
+    """
+    Calcula as métricas da carteira do usuário no período
+
+    A posição de cada ativo vem das transações; ativos da carteira sem
+    transações usam a quantidade atual (user_portfolio) em todo o período.
+
+    Args:
+        user_id: ID do usuário
+        range_param: Período ("7d", "1m", "3m", "6m" ou "1y")
+
+    Returns:
+        dict: {"success": bool, "message": str, "data": {...}}
+
+    Example:
+        >>> result = get_portfolio_analytics("uuid-user", "3m")
+        >>> result["data"]["twr"], result["data"]["max_drawdown"]
+    """
+    range_key = str(range_param or DEFAULT_ANALYTICS_RANGE).lower().strip()
+    range_days = ANALYTICS_RANGES.get(range_key)
+    if range_days is None:
+        return {
+            "success": False,
+            "message": f"range inválido. Use: {', '.join(ANALYTICS_RANGES)}"
+        }
+
+    try:
+        portfolio_rows, transaction_rows = _load_positions(user_id)
+    except Exception as e:
+        print(f"[ERRO] Erro ao carregar posições para análise: {str(e)}")
+        return {"success": False, "message": f"Erro ao carregar carteira: {str(e)}"}
+
+    stock_ids = list(dict.fromkeys(
+        [row['stock_id'] for row in transaction_rows if row.get('stock_id')] +
+        [row['stock_id'] for row in portfolio_rows if row.get('stock_id')]
+    ))
+
+    end = date.today()
+    start = end - timedelta(days=range_days)
+    empty = {
+        "range": range_key,
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat(),
+        "series": [],
+        "twr": 0.0,
+        "volatility": None,
+        "max_drawdown": 0.0,
+        "assets": []
+    }
+    if not stock_ids:
+        return {"success": True, "message": "Carteira vazia", "data": empty}
+
+    histories = load_price_histories(stock_ids)
+    series_list = [histories.get(stock_id) or PriceSeries.empty() for stock_id in stock_ids]
+    column = {stock_id: index for index, stock_id in enumerate(stock_ids)}
+
+    # Transações -> arrays (quantidade com sinal: compra +, venda -)
+    traded = set()
+    valid = []
+    for row in transaction_rows:
+        try:
+            sign = 1.0 if row['type'] == 'buy' else -1.0
+            valid.append((
+                column[row['stock_id']],
+                str(row['date'])[:10],
+                sign * float(row['quantity']),
+                float(row['price'])
+            ))
+            traded.add(row['stock_id'])
+        except (KeyError, TypeError, ValueError):
+            continue
+
+    tx_assets = np.array([item[0] for item in valid], dtype=np.intp)
+    tx_dates = np.array([item[1] for item in valid], dtype='datetime64[D]')
+    tx_quantities = np.array([item[2] for item in valid], dtype=np.float64)
+    tx_prices = np.array([item[3] for item in valid], dtype=np.float64)
+
+    initial = np.zeros(len(stock_ids))
+    for row in portfolio_rows:
+        if row.get('stock_id') and row['stock_id'] not in traded:
+            initial[column[row['stock_id']]] = float(row.get('quantity') or 0)
+
+    axis = _date_axis(series_list, start, end)
+    if len(axis) == 0:
+        return {"success": True, "message": "Sem preços no período", "data": empty}
+
+    prices = _price_matrix(series_list, axis)
+    quantities, cashflows = _position_matrices(
+        axis, len(stock_ids), tx_assets, tx_dates, tx_quantities, tx_prices, initial
+    )
+    metrics = compute_analytics(axis, prices, quantities, cashflows)
+
+    last_prices = np.nan_to_num(prices[-1], nan=0.0)
+    last_values = quantities[-1] * last_prices
+    total_value = float(metrics["values"][-1])
+
+    assets = []
+    for stock_id, index in column.items():
+        if not quantities[:, index].any():
+            continue
+        assets.append({
+            "stock_id": stock_id,
+            "ticker": get_ticker(stock_id),
+            "quantity": float(quantities[-1, index]),
+            "price": float(prices[-1, index]) if not np.isnan(prices[-1, index]) else None,
+            "value": float(last_values[index]),
+            "weight": float(last_values[index] / total_value) if total_value > 0 else 0.0,
+            "pnl": float(metrics["pnl"][index]),
+            "contribution": float(metrics["contribution"][index])
+        })
+    assets.sort(key=lambda item: item["value"], reverse=True)
+
+    return {
+        "success": True,
+        "message": "Análise calculada",
+        "data": {
+            "range": range_key,
+            "start_date": start.isoformat(),
+            "end_date": end.isoformat(),
+            "series": [
+                {"date": day, "value": value}
+                for day, value in zip(axis.astype(str).tolist(), metrics["values"].tolist())
+            ],
+            "twr": metrics["twr"],
+            "volatility": metrics["volatility"],
+            "max_drawdown": metrics["max_drawdown"],
+            "assets": assets
+        }
+    }
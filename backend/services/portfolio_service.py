@@ -1,11 +1,23 @@
 """
 Serviço para gerenciamento de portfolio e watchlist de usuários
 """
+import os
+import time
 from config.supabase_config import get_supabase_client, get_supabase_admin_client
 from datetime import datetime, timedelta
+from services.price_cache_service import get_latest_prices_bulk
+from services.dividend_cache_service import get_latest_dividends_bulk
+from services.group_portfolio_service import invalidate_member_portfolios
+from services.stock_cache_service import get_stock_id, get_stocks_by_tickers
+from utils.parallel import run_with_deadlines
 
+# Limites da atualização paralela feita no login
+LOGIN_REFRESH_MAX_WORKERS = int(os.getenv('LOGIN_REFRESH_MAX_WORKERS', '8'))
+LOGIN_REFRESH_STOCK_TIMEOUT = float(os.getenv('LOGIN_REFRESH_STOCK_TIMEOUT', '15'))
+LOGIN_REFRESH_TOTAL_TIMEOUT = float(os.getenv('LOGIN_REFRESH_TOTAL_TIMEOUT', '25'))
 
-def ensure_stock_data_for_watchlist(stock_id, ticker):
+
+def ensure_stock_data_for_watchlist(stock_id, ticker, price_data=None, fetch_price_if_missing=True):
     """
     Garante que a ação tenha preço atual e dividendos no banco de dados
     (específico para watchlist - busca preço e dividendos)
@@ -13,6 +25,10 @@ def ensure_stock_data_for_watchlist(stock_id, ticker):
     Args:
         stock_id: UUID da ação
         ticker: Código da ação (ex: PETR4)
+        price_data: Preço atual já obtido em lote (formato de get_current_stock_price).
+                    Se None, busca o preço na BraAPI.
+        fetch_price_if_missing: Se False e price_data for None, não consulta a BraAPI
+                    (o lote já tentou e falhou) e atualiza apenas dividendos
         
     Returns:
         bool: True se garantiu os dados, False se houve erro
@@ -24,9 +40,11 @@ def ensure_stock_data_for_watchlist(stock_id, ticker):
         
         print(f"[INFO] Garantindo dados para watchlist: {ticker}...")
         
-        # 1. Buscar e salvar preço atual
-        print(f"[INFO] Buscando preço atual para {ticker}...")
-        current_price_data = get_current_stock_price(ticker)
+        # 1. Buscar (se não veio do lote) e salvar preço atual
+        current_price_data = price_data
+        if current_price_data is None and fetch_price_if_missing:
+            print(f"[INFO] Buscando preço atual para {ticker}...")
+            current_price_data = get_current_stock_price(ticker)
         
         if current_price_data:
             # Converte para formato compatível com save_prices
@@ -70,7 +88,7 @@ def ensure_stock_data_for_watchlist(stock_id, ticker):
         return False
 
 
-def ensure_current_stock_price(stock_id, ticker):
+def ensure_current_stock_price(stock_id, ticker, price_data=None):
     """
     Garante que a ação tenha preço atual no banco de dados (OTIMIZADO)
     
@@ -80,6 +98,8 @@ def ensure_current_stock_price(stock_id, ticker):
     Args:
         stock_id: UUID da ação
         ticker: Código da ação (ex: PETR4)
+        price_data: Preço atual já obtido em lote (formato de get_current_stock_price).
+                    Se None, busca o preço na BraAPI.
         
     Returns:
         bool: True se garantiu preço atual, False se houve erro
@@ -90,8 +110,10 @@ def ensure_current_stock_price(stock_id, ticker):
         
         print(f"[INFO] Garantindo preço atual para {ticker}...")
         
-        # Busca apenas o preço atual (muito mais rápido)
-        current_price_data = get_current_stock_price(ticker)
+        # Busca apenas o preço atual (muito mais rápido), se não veio do lote
+        current_price_data = price_data
+        if current_price_data is None:
+            current_price_data = get_current_stock_price(ticker)
         
         if not current_price_data:
             print(f"[AVISO] Não foi possível buscar preço atual para {ticker}")
@@ -209,17 +231,15 @@ def add_to_portfolio(user_id, ticker, quantity=1):
     try:
         supabase = get_supabase_client()
         
-        # 1. Buscar stock_id pelo ticker
-        stock_response = supabase.table('stocks').select('id').eq('ticker', ticker).execute()
+        # 1. Buscar stock_id pelo ticker (cache em memória)
+        stock_id = get_stock_id(ticker)
         
-        if not stock_response.data or len(stock_response.data) == 0:
+        if stock_id is None:
             return {
                 "success": False,
                 "message": f"Ação {ticker} não encontrada no sistema"
             }
         
-        stock_id = stock_response.data[0]['id']
-        
         # 2. Verificar se já existe na carteira
         existing = supabase.table('user_portfolio')\
             .select('*')\
@@ -237,6 +257,7 @@ def add_to_portfolio(user_id, ticker, quantity=1):
                 .eq('user_id', user_id)\
                 .eq('stock_id', stock_id)\
                 .execute()
+            invalidate_member_portfolios(user_id)
             
             # OTIMIZADO: Garantir preço atual (muito mais rápido)
             ensure_current_stock_price(stock_id, ticker)
@@ -252,6 +273,7 @@ def add_to_portfolio(user_id, ticker, quantity=1):
                 'stock_id': stock_id,
                 'quantity': quantity
             }).execute()
+            invalidate_member_portfolios(user_id)
             
             # OTIMIZADO: Garantir preço atual (muito mais rápido)
             ensure_current_stock_price(stock_id, ticker)
@@ -283,17 +305,15 @@ def add_to_watchlist(user_id, ticker):
     try:
         supabase = get_supabase_client()
         
-        # 1. Buscar stock_id pelo ticker
-        stock_response = supabase.table('stocks').select('id').eq('ticker', ticker).execute()
+        # 1. Buscar stock_id pelo ticker (cache em memória)
+        stock_id = get_stock_id(ticker)
         
-        if not stock_response.data or len(stock_response.data) == 0:
+        if stock_id is None:
             return {
                 "success": False,
                 "message": f"Ação {ticker} não encontrada no sistema"
             }
         
-        stock_id = stock_response.data[0]['id']
-        
         # 2. Verificar se já existe na watchlist
         existing = supabase.table('user_watchlist')\
             .select('*')\
@@ -343,23 +363,22 @@ def remove_from_portfolio(user_id, ticker):
     try:
         supabase = get_supabase_client()
         
-        # 1. Buscar stock_id pelo ticker
-        stock_response = supabase.table('stocks').select('id').eq('ticker', ticker).execute()
+        # 1. Buscar stock_id pelo ticker (cache em memória)
+        stock_id = get_stock_id(ticker)
         
-        if not stock_response.data or len(stock_response.data) == 0:
+        if stock_id is None:
             return {
                 "success": False,
                 "message": f"Ação {ticker} não encontrada no sistema"
             }
         
-        stock_id = stock_response.data[0]['id']
-        
         # 2. Deletar registro
         supabase.table('user_portfolio')\
             .delete()\
             .eq('user_id', user_id)\
             .eq('stock_id', stock_id)\
             .execute()
+        invalidate_member_portfolios(user_id)
         
         return {
             "success": True,
@@ -388,17 +407,15 @@ def remove_from_watchlist(user_id, ticker):
     try:
         supabase = get_supabase_client()
         
-        # 1. Buscar stock_id pelo ticker
-        stock_response = supabase.table('stocks').select('id').eq('ticker', ticker).execute()
+        # 1. Buscar stock_id pelo ticker (cache em memória)
+        stock_id = get_stock_id(ticker)
         
-        if not stock_response.data or len(stock_response.data) == 0:
+        if stock_id is None:
             return {
                 "success": False,
                 "message": f"Ação {ticker} não encontrada no sistema"
             }
         
-        stock_id = stock_response.data[0]['id']
-        
         # 2. Deletar registro
         supabase.table('user_watchlist')\
             .delete()\
@@ -438,17 +455,14 @@ def check_user_stocks_status(user_id, tickers):
     try:
         supabase = get_supabase_client()
         
-        # Buscar stock_ids dos tickers
-        stocks_response = supabase.table('stocks')\
-            .select('id, ticker')\
-            .in_('ticker', tickers)\
-            .execute()
+        # Buscar stock_ids dos tickers (cache em memória)
+        stocks = get_stocks_by_tickers(tickers)
         
-        if not stocks_response.data:
+        if not stocks:
             return {}
         
         # Criar mapa ticker -> stock_id
-        ticker_to_id = {stock['ticker']: stock['id'] for stock in stocks_response.data}
+        ticker_to_id = {ticker: stock['id'] for ticker, stock in stocks.items()}
         stock_ids = list(ticker_to_id.values())
         
         # Buscar ações na carteira
@@ -561,18 +575,154 @@ def get_user_watchlist(user_id):
         return []
 
 
-def update_portfolio_prices_on_login(user_id):
+def _summarize_login_refresh(results):
+    """
+    Consolida o resultado de run_with_deadlines() para as rotas de login
+    
+    Args:
+        results: Dicionário {ticker: {"status": ..., "result": bool, ...}}
+        
+    Returns:
+        dict: {"updated_count": int, "failed": [tickers], "timed_out": [tickers], "partial": bool}
+    """
+    updated_count = 0
+    failed = []
+    timed_out = []
+    
+    for ticker, outcome in results.items():
+        if outcome['status'] == 'ok' and outcome['result']:
+            updated_count += 1
+        elif outcome['status'] in ('timeout', 'not_finished'):
+            timed_out.append(ticker)
+        else:
+            if outcome.get('error'):
+                print(f"[ERRO] Erro ao atualizar {ticker}: {outcome['error']}")
+            failed.append(ticker)
+    
+    return {
+        "updated_count": updated_count,
+        "failed": failed,
+        "timed_out": timed_out,
+        "partial": len(timed_out) > 0
+    }
+
+
+def _fetch_login_prices(stock_ids, max_workers, stock_timeout, total_timeout):
+    """
+    Busca os preços atuais em lotes da BraAPI (lotes em paralelo, com prazo)
+    
+    Args:
+        stock_ids: {ticker: stock_id}
+        
+    Returns:
+        tuple: (results, prices_by_stock) - results tem as ações que já falharam
+        ou estouraram o prazo ({ticker: {"status": ...}}); prices_by_stock está
+        no formato de save_prices_bulk
+    """
+    from services.brapi_price_service import BRAPI_BATCH_CHUNK_SIZE, get_current_stock_prices_batch
+    
+    tickers = list(stock_ids.keys())
+    chunks = [tickers[i:i + BRAPI_BATCH_CHUNK_SIZE] for i in range(0, len(tickers), BRAPI_BATCH_CHUNK_SIZE)]
+    downloads = run_with_deadlines(
+        {
+            f"lote-{index}": (lambda chunk=chunk: get_current_stock_prices_batch(chunk))
+            for index, chunk in enumerate(chunks)
+        },
+        max_workers=max_workers,
+        task_timeout=stock_timeout,
+        total_timeout=total_timeout
+    )
+    
+    results = {}
+    prices_by_stock = {}
+    for index, chunk in enumerate(chunks):
+        download = downloads[f"lote-{index}"]
+        for ticker in chunk:
+            if download['status'] != 'ok':
+                results[ticker] = download
+                continue
+            
+            price_data = download['result'].get(ticker.upper().strip())
+            if price_data is None:
+                print(f"[AVISO] Preço de {ticker} não retornado no lote")
+                results[ticker] = {"status": "error", "result": None, "error": None}
+                continue
+            
+            prices_by_stock[stock_ids[ticker]] = [{
+                "date": price_data["date"],
+                "price": price_data["current_price"]
+            }]
+    
+    return results, prices_by_stock
+
+
+def _save_login_prices(stock_ids, prices_by_stock, results, deadline):
+    """
+    Salva os preços buscados em lote no tempo que sobrou até deadline
+    
+    Registra em results o resultado de cada ação que tinha preço
+    ("ok" com result=True se algum preço foi gravado).
+    """
+    from services.save_service import save_prices_bulk
+    
+    remaining = deadline - time.monotonic()
+    if not prices_by_stock:
+        save = {"status": "ok", "result": {"by_stock": {}}, "error": None}
+    elif remaining <= 0:
+        save = {"status": "not_finished", "result": None, "error": "Prazo global atingido"}
+    else:
+        save = run_with_deadlines(
+            {"save": lambda: save_prices_bulk(prices_by_stock)},
+            max_workers=1,
+            total_timeout=remaining
+        )["save"]
+    
+    for ticker, stock_id in stock_ids.items():
+        if stock_id not in prices_by_stock:
+            continue
+        if save['status'] != 'ok':
+            results[ticker] = save
+            continue
+        
+        outcome = save['result']['by_stock'].get(stock_id, {})
+        results[ticker] = {
+            "status": "ok" if outcome.get('status') == 'ok' else "error",
+            "result": outcome.get('saved', 0) > 0,
+            "error": None if outcome.get('status') == 'ok' else "falha ao salvar no banco"
+        }
+
+
+def update_portfolio_prices_on_login(
+    user_id,
+    max_workers=LOGIN_REFRESH_MAX_WORKERS,
+    stock_timeout=LOGIN_REFRESH_STOCK_TIMEOUT,
+    total_timeout=LOGIN_REFRESH_TOTAL_TIMEOUT
+):
     """
     Atualiza preços de TODAS as ações da carteira (usado apenas no login)
     
     Esta função busca preços atuais da API para todas as ações da carteira
     do usuário. Deve ser chamada apenas quando o usuário faz login.
     
+    Os preços são buscados em lotes na BraAPI (lotes em paralelo, pool
+    limitado) e gravados com save_prices_bulk. Se o prazo global estourar,
+    retorna o que já foi concluído e lista as ações sem resposta em timed_out.
+    
     Args:
         user_id: ID do usuário
+        max_workers: Máximo de lotes da BraAPI buscados ao mesmo tempo
+        stock_timeout: Prazo (segundos) de cada lote da BraAPI
+        total_timeout: Prazo (segundos) de toda a atualização (busca + salvamento)
         
     Returns:
-        dict: {"success": bool, "updated_count": int, "message": str}
+        dict: {
+            "success": bool,
+            "updated_count": int,
+            "failed": [tickers],
+            "timed_out": [tickers],
+            "partial": bool,
+            "message": str
+        }
     """
     try:
         supabase = get_supabase_client()
@@ -587,33 +737,34 @@ def update_portfolio_prices_on_login(user_id):
             return {
                 "success": True,
                 "updated_count": 0,
+                "failed": [],
+                "timed_out": [],
+                "partial": False,
                 "message": "Usuário não tem ações na carteira"
             }
         
         print(f"[LOGIN] Atualizando preços para {len(portfolio_response.data)} ações da carteira...")
+        deadline = time.monotonic() + total_timeout
         
-        updated_count = 0
-        for item in portfolio_response.data:
-            try:
-                if not item.get('stocks'):
-                    continue
-                
-                ticker = item['stocks']['ticker']
-                stock_id = item['stock_id']
-                
-                # Buscar preço atual da API e salvar
-                success = ensure_current_stock_price(stock_id, ticker)
-                if success:
-                    updated_count += 1
-                    
-            except Exception as e:
-                print(f"[ERRO] Erro ao atualizar preço de {ticker}: {str(e)}")
-                continue
+        # 2. Busca os preços atuais em lotes (N/chunk requisições ao invés de N), com prazo
+        stock_ids = {
+            item['stocks']['ticker']: item['stock_id']
+            for item in portfolio_response.data if item.get('stocks')
+        }
+        results, prices_by_stock = _fetch_login_prices(stock_ids, max_workers, stock_timeout, total_timeout)
+        
+        # 3. Salva os preços de todas as ações em lote, no tempo que sobrou
+        _save_login_prices(stock_ids, prices_by_stock, results, deadline)
+        
+        summary = _summarize_login_refresh(results)
         
+        updated_count = summary['updated_count']
+        if summary['partial']:
+            print(f"[LOGIN] ⚠️ Prazo atingido - {len(summary['timed_out'])} ação(ões) sem resposta")
         print(f"[LOGIN] ✅ {updated_count} preços atualizados com sucesso")
         return {
             "success": True,
-            "updated_count": updated_count,
+            **summary,
             "message": f"{updated_count} preços atualizados no login"
         }
         
@@ -622,22 +773,46 @@ def update_portfolio_prices_on_login(user_id):
         return {
             "success": False,
             "updated_count": 0,
+            "failed": [],
+            "timed_out": [],
+            "partial": False,
             "message": f"Erro ao atualizar preços: {str(e)}"
         }
 
 
-def update_watchlist_prices_on_login(user_id):
+def update_watchlist_prices_on_login(
+    user_id,
+    max_workers=LOGIN_REFRESH_MAX_WORKERS,
+    stock_timeout=LOGIN_REFRESH_STOCK_TIMEOUT,
+    total_timeout=LOGIN_REFRESH_TOTAL_TIMEOUT
+):
     """
     Atualiza preços de TODAS as ações da watchlist (usado apenas no login)
     
     Esta função busca preços atuais e dividendos da API para todas as ações 
     da watchlist do usuário. Deve ser chamada apenas quando o usuário faz login.
     
+    Os preços são buscados em lotes na BraAPI (lotes em paralelo, pool
+    limitado) e os dividendos de todas as ações em um único download do
+    Yahoo; tudo é gravado com os salvamentos em lote. Busca, salvamento e
+    dividendos dividem o mesmo prazo global: o que não terminar a tempo vai
+    para timed_out (os preços já salvos ficam no banco).
+    
     Args:
         user_id: ID do usuário
+        max_workers: Máximo de lotes da BraAPI buscados ao mesmo tempo
+        stock_timeout: Prazo (segundos) de cada lote da BraAPI
+        total_timeout: Prazo (segundos) de toda a atualização (preços + dividendos)
         
     Returns:
-        dict: {"success": bool, "updated_count": int, "message": str}
+        dict: {
+            "success": bool,
+            "updated_count": int,
+            "failed": [tickers],
+            "timed_out": [tickers],
+            "partial": bool,
+            "message": str
+        }
     """
     try:
         supabase = get_supabase_client()
@@ -652,33 +827,67 @@ def update_watchlist_prices_on_login(user_id):
             return {
                 "success": True,
                 "updated_count": 0,
+                "failed": [],
+                "timed_out": [],
+                "partial": False,
                 "message": "Usuário não tem ações na watchlist"
             }
         
         print(f"[LOGIN] Atualizando preços para {len(watchlist_response.data)} ações da watchlist...")
+        deadline = time.monotonic() + total_timeout
         
-        updated_count = 0
-        for item in watchlist_response.data:
-            try:
-                if not item.get('stocks'):
-                    continue
-                
-                ticker = item['stocks']['ticker']
-                stock_id = item['stock_id']
-                
-                # Buscar preço atual e dividendos da API e salvar
-                success = ensure_stock_data_for_watchlist(stock_id, ticker)
-                if success:
-                    updated_count += 1
-                    
-            except Exception as e:
-                print(f"[ERRO] Erro ao atualizar dados de {ticker}: {str(e)}")
+        # 2. Busca os preços atuais em lotes (N/chunk requisições ao invés de N), com prazo
+        stock_ids = {
+            item['stocks']['ticker']: item['stock_id']
+            for item in watchlist_response.data if item.get('stocks')
+        }
+        results, prices_by_stock = _fetch_login_prices(stock_ids, max_workers, stock_timeout, total_timeout)
+        
+        # 3. Salva os preços de todas as ações em lote, no tempo que sobrou
+        _save_login_prices(stock_ids, prices_by_stock, results, deadline)
+        
+        # 4. Busca dividendos de todas as ações em um download e salva em lote (no que resta do prazo)
+        from services.yahoo_dividend_service import fetch_dividends_batch
+        from services.save_service import save_dividends_bulk
+        
+        def refresh_dividends():
+            downloaded = fetch_dividends_batch(list(stock_ids.keys()))
+            dividends_by_stock = {}
+            for ticker, stock_id in stock_ids.items():
+                dividends_list = downloaded.get(ticker.upper().strip().replace('.SA', ''))
+                if dividends_list:
+                    dividends_by_stock[stock_id] = dividends_list
+            return save_dividends_bulk(dividends_by_stock)
+        
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            dividends = {"status": "not_finished", "result": None, "error": "Prazo global atingido"}
+        else:
+            dividends = run_with_deadlines(
+                {"dividends": refresh_dividends},
+                max_workers=1,
+                total_timeout=remaining
+            )["dividends"]
+        
+        # Uma ação conta como atualizada se o preço foi gravado e os dividendos
+        # terminaram (mesmo sem dividendos) sem falha ao salvar
+        for ticker, stock_id in stock_ids.items():
+            if results[ticker]['status'] != 'ok':
                 continue
+            if dividends['status'] != 'ok':
+                results[ticker] = dividends
+            elif dividends['result']['by_stock'].get(stock_id, {}).get('status') == 'error':
+                results[ticker] = {"status": "error", "result": None, "error": "falha ao salvar dividendos no banco"}
+        
+        summary = _summarize_login_refresh(results)
         
+        updated_count = summary['updated_count']
+        if summary['partial']:
+            print(f"[LOGIN] ⚠️ Prazo atingido - {len(summary['timed_out'])} ação(ões) sem resposta")
         print(f"[LOGIN] ✅ {updated_count} ações da watchlist atualizadas com sucesso")
         return {
             "success": True,
-            "updated_count": updated_count,
+            **summary,
             "message": f"{updated_count} ações da watchlist atualizadas no login"
         }
         
@@ -687,6 +896,9 @@ def update_watchlist_prices_on_login(user_id):
         return {
             "success": False,
             "updated_count": 0,
+            "failed": [],
+            "timed_out": [],
+            "partial": False,
             "message": f"Erro ao atualizar watchlist: {str(e)}"
         }
 
@@ -714,11 +926,9 @@ def get_user_portfolio_full(user_id, use_admin=False):
     try:
         supabase = get_supabase_admin_client() if use_admin else get_supabase_client()
         
-        # 1. Buscar portfolio com join nas tabelas stocks e stock_prices
-        # Query complexa para buscar:
+        # 1. Buscar portfolio com join na tabela stocks
         # - user_portfolio (quantity)
         # - stocks (ticker, id)
-        # - stock_prices (price mais recente)
         
         portfolio_response = supabase.table('user_portfolio')\
             .select('quantity, stock_id, stocks(ticker, id)')\
@@ -732,7 +942,13 @@ def get_user_portfolio_full(user_id, use_admin=False):
         print(f"[INFO] Carregando carteira para {len(portfolio_response.data)} ações...")
         print(f"[INFO] OTIMIZADO: Usando preços em cache (não busca API)")
         
-        # 2. Para cada ação, buscar preços do cache (sem atualizar da API)
+        # 2. Buscar o preço mais recente de TODAS as ações em uma única consulta
+        latest_prices = get_latest_prices_bulk(
+            [item['stock_id'] for item in portfolio_response.data],
+            supabase=supabase
+        )
+        
+        # 3. Montar resultado
         result = []
         for item in portfolio_response.data:
             try:
@@ -743,20 +959,9 @@ def get_user_portfolio_full(user_id, use_admin=False):
                 stock_id = item['stock_id']
                 quantity = item['quantity']
                 
-                # OTIMIZADO: Não busca API - apenas usa dados do cache
-                
-                # Buscar preço mais recente dessa ação (agora atualizado)
-                price_response = supabase.table('stock_prices')\
-                    .select('price')\
-                    .eq('stock_id', stock_id)\
-                    .order('date', desc=True)\
-                    .limit(1)\
-                    .execute()
-                
                 # Se não encontrou preço, usar None
-                current_price = None
-                if price_response.data and len(price_response.data) > 0:
-                    current_price = float(price_response.data[0]['price'])
+                latest_price = latest_prices.get(stock_id)
+                current_price = latest_price['price'] if latest_price else None
                 
                 # Calcular valor total
                 total_value = None
@@ -818,7 +1023,12 @@ def get_user_watchlist_full(user_id):
         
         print(f"[INFO] Carregando watchlist para {len(watchlist_response.data)} ações...")
         
-        # 2. Para cada ação, buscar preço e último dividendo
+        # 2. Buscar preço e último dividendo de TODAS as ações (uma consulta cada)
+        stock_ids = [item['stock_id'] for item in watchlist_response.data]
+        latest_prices = get_latest_prices_bulk(stock_ids, supabase=supabase)
+        latest_dividends = get_latest_dividends_bulk(stock_ids, supabase=supabase)
+        
+        # 3. Montar resultado
         result = []
         for item in watchlist_response.data:
             try:
@@ -828,41 +1038,12 @@ def get_user_watchlist_full(user_id):
                 ticker = item['stocks']['ticker']
                 stock_id = item['stock_id']
                 
-                # Buscar preço mais recente dessa ação
-                price_response = supabase.table('stock_prices')\
-                    .select('price')\
-                    .eq('stock_id', stock_id)\
-                    .order('date', desc=True)\
-                    .limit(1)\
-                    .execute()
-                
                 # Se não encontrou preço, usar None
-                current_price = None
-                if price_response.data and len(price_response.data) > 0:
-                    current_price = float(price_response.data[0]['price'])
-                
-                # Buscar último dividendo
-                dividend_response = supabase.table('stock_dividends')\
-                    .select('value, payment_date')\
-                    .eq('stock_id', stock_id)\
-                    .order('payment_date', desc=True)\
-                    .limit(1)\
-                    .execute()
+                latest_price = latest_prices.get(stock_id)
+                current_price = latest_price['price'] if latest_price else None
                 
-                last_dividend = None
-                if dividend_response.data and len(dividend_response.data) > 0:
-                    div_data = dividend_response.data[0]
-                    print(f"[DEBUG] Dividendo encontrado para {ticker}: value={div_data.get('value')}, payment_date={div_data.get('payment_date')}")
-                    
-                    # Validar que ambos os campos existem e são válidos
-                    if div_data.get('value') is not None and div_data.get('payment_date') is not None:
-                        last_dividend = {
-                            'value': float(div_data['value']),
-                            'payment_date': div_data['payment_date']
-                        }
-                    else:
-                        print(f"[AVISO] Dividendo para {ticker} tem dados inválidos (value ou payment_date é None)")
-                else:
+                last_dividend = latest_dividends.get(stock_id)
+                if last_dividend is None:
                     print(f"[INFO] Nenhum dividendo encontrado para {ticker}")
                 
                 result.append({
@@ -0,0 +1,378 @@
+"""
+Motor de posições: deriva a carteira (quantidade, custo médio, lucro
+realizado e não realizado) das transações de compra e venda
+
+As posições ficam materializadas em user_positions
+(supabase/migrations/005_user_positions.sql). Uma transação nova no fim do
+histórico é aplicada incrementalmente sobre a linha da ação; edições,
+remoções e transações retroativas reprocessam apenas a ação afetada.
+"""
+import hashlib
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from config.supabase_config import get_supabase_admin_client
+from services.price_cache_service import get_latest_prices_bulk
+from services.stock_cache_service import get_stock_by_id
+from utils.pagination import fetch_all_rows
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _parse_date(value) -> datetime:
+    """Converte a data da transação (ISO, com ou sem fuso) em datetime UTC"""
+    if not value:
+        return _EPOCH
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return _EPOCH
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def _sort_key(transaction: Dict[str, Any]):
+    return _parse_date(transaction.get('date')), str(transaction.get('created_at') or '')
+
+
+def empty_position() -> Dict[str, Any]:
+    return {
+        'quantity': 0.0,
+        'average_cost': 0.0,
+        'cost_basis': 0.0,
+        'realized_pnl': 0.0,
+        'transactions_count': 0,
+        'last_transaction_date': None
+    }
+
+
+def apply_transaction(position: Dict[str, Any], transaction: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Aplica uma transação sobre a posição (método do custo médio)
+
+    Compras somam ao custo; vendas realizam (preço - custo médio) x quantidade
+    e não alteram o custo médio.
+
+    Example:
+        >>> position = apply_transaction(empty_position(), {"type": "buy", "quantity": 10, "price": 20})
+        >>> position = apply_transaction(position, {"type": "sell", "quantity": 4, "price": 25})
+        >>> position["quantity"], position["average_cost"], position["realized_pnl"]
+        (6.0, 20.0, 20.0)
+    """
+    result = dict(position)
+    quantity = float(transaction['quantity'])
+    price = float(transaction['price'])
+
+    if transaction['type'] == 'buy':
+        result['cost_basis'] += quantity * price
+        result['quantity'] += quantity
+    else:
+        sold = min(quantity, result['quantity'])
+        if sold < quantity:
+            print(f"[AVISO] Venda de {quantity} maior que a posição ({result['quantity']}) - limitada à posição")
+        result['realized_pnl'] += sold * (price - result['average_cost'])
+        result['cost_basis'] -= sold * result['average_cost']
+        result['quantity'] -= sold
+
+    if result['quantity'] <= 0:
+        result['quantity'] = 0.0
+        result['cost_basis'] = 0.0
+    result['average_cost'] = result['cost_basis'] / result['quantity'] if result['quantity'] > 0 else 0.0
+    result['transactions_count'] += 1
+    result['last_transaction_date'] = transaction.get('date')
+    return result
+
+
+def replay_transactions(transactions: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Reprocessa o histórico em ordem cronológica
+
+    Returns:
+        Dicionário {stock_id: posição}
+    """
+    positions: Dict[str, Dict[str, Any]] = {}
+    for transaction in sorted(transactions, key=_sort_key):
+        stock_id = transaction.get('stock_id')
+        if not stock_id:
+            continue
+        positions[stock_id] = apply_transaction(positions.get(stock_id) or empty_position(), transaction)
+    return positions
+
+
+def _to_row(user_id: str, stock_id: str, position: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'user_id': user_id,
+        'stock_id': stock_id,
+        'quantity': position['quantity'],
+        'average_cost': position['average_cost'],
+        'cost_basis': position['cost_basis'],
+        'realized_pnl': position['realized_pnl'],
+        'transactions_count': position['transactions_count'],
+        'last_transaction_date': position['last_transaction_date'],
+        'updated_at': datetime.now(timezone.utc).isoformat()
+    }
+
+
+def _from_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'quantity': float(row.get('quantity') or 0),
+        'average_cost': float(row.get('average_cost') or 0),
+        'cost_basis': float(row.get('cost_basis') or 0),
+        'realized_pnl': float(row.get('realized_pnl') or 0),
+        'transactions_count': int(row.get('transactions_count') or 0),
+        'last_transaction_date': row.get('last_transaction_date')
+    }
+
+
+def rebuild_positions(user_id: str, stock_ids: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Reprocessa as transações do usuário e regrava o snapshot
+
+    Args:
+        user_id: ID do usuário
+        stock_ids: Reprocessa apenas estas ações (padrão: todas)
+
+    Returns:
+        Dicionário {stock_id: posição} das ações reprocessadas
+    """
+    supabase = get_supabase_admin_client()
+
+    def build_query():
+        query = supabase.table('transactions')\
+            .select('stock_id, type, price, quantity, date, created_at')\
+            .eq('user_id', user_id)
+        if stock_ids is not None:
+            query = query.in_('stock_id', stock_ids)
+        return query.order('id')
+
+    # Paginado: históricos longos passam do max-rows do PostgREST
+    positions = replay_transactions(fetch_all_rows(build_query))
+
+    if positions:
+        supabase.table('user_positions')\
+            .upsert([_to_row(user_id, stock_id, position) for stock_id, position in positions.items()],
+                    on_conflict='user_id,stock_id')\
+            .execute()
+
+    # Ações sem transações restantes saem do snapshot
+    delete_query = supabase.table('user_positions').delete().eq('user_id', user_id)
+    if stock_ids is not None:
+        removed = [stock_id for stock_id in stock_ids if stock_id not in positions]
+        if removed:
+            delete_query.in_('stock_id', removed).execute()
+    elif positions:
+        delete_query.not_.in_('stock_id', list(positions)).execute()
+    else:
+        delete_query.execute()
+
+    print(f"[OK] Posições reprocessadas: {len(positions)} ação(ões) do usuário {user_id}")
+    return positions
+
+
+def _has_snapshot(supabase, user_id: str) -> bool:
+    """Se o usuário já tem alguma linha em user_positions (histórico já reprocessado)"""
+    response = supabase.table('user_positions')\
+        .select('stock_id')\
+        .eq('user_id', user_id)\
+        .limit(1)\
+        .execute()
+    return bool(response.data)
+
+
+def on_transaction_created(user_id: str, transaction: Dict[str, Any]) -> None:
+    """
+    Atualiza o snapshot depois de uma transação criada
+
+    Se a transação é a mais recente da ação, aplica sobre a posição gravada;
+    se é retroativa (ou o snapshot mudou no meio do caminho), reprocessa a ação.
+    Usuário ainda sem snapshot tem todo o histórico reprocessado, para que as
+    demais ações não fiquem de fora.
+    """
+    stock_id = transaction.get('stock_id')
+    if not stock_id:
+        return
+
+    try:
+        supabase = get_supabase_admin_client()
+        response = supabase.table('user_positions')\
+            .select('quantity, average_cost, cost_basis, realized_pnl, transactions_count, last_transaction_date')\
+            .eq('user_id', user_id)\
+            .eq('stock_id', stock_id)\
+            .limit(1)\
+            .execute()
+
+        if response.data:
+            current = _from_row(response.data[0])
+            if _parse_date(transaction.get('date')) >= _parse_date(current['last_transaction_date']):
+                updated = apply_transaction(current, transaction)
+                # Só grava se ninguém alterou a posição desde a leitura
+                result = supabase.table('user_positions')\
+                    .update(_to_row(user_id, stock_id, updated))\
+                    .eq('user_id', user_id)\
+                    .eq('stock_id', stock_id)\
+                    .eq('transactions_count', current['transactions_count'])\
+                    .execute()
+                if result.data:
+                    return
+        elif not _has_snapshot(supabase, user_id):
+            rebuild_positions(user_id)
+            return
+
+        rebuild_positions(user_id, [stock_id])
+    except Exception as e:
+        print(f"[AVISO] Não foi possível atualizar posições após criação de transação: {str(e)}")
+
+
+def on_transactions_changed(user_id: str, stock_ids: Iterable[Optional[str]]) -> None:
+    """Reprocessa as ações afetadas por uma transação alterada ou removida (ou tudo, se ainda não há snapshot)"""
+    affected = list(dict.fromkeys(stock_id for stock_id in stock_ids if stock_id))
+    if not affected:
+        return
+    try:
+        if not _has_snapshot(get_supabase_admin_client(), user_id):
+            rebuild_positions(user_id)
+            return
+        rebuild_positions(user_id, affected)
+    except Exception as e:
+        print(f"[AVISO] Não foi possível atualizar posições após alteração de transação: {str(e)}")
+
+
+def positions_version(rows: Iterable[Dict[str, Any]]) -> str:
+    """
+    Versão de um conjunto de linhas de user_positions, independente da ordem
+
+    Example:
+        >>> positions_version([])
+        'da39a3ee5e6b4b0d'
+    """
+    keys = sorted(
+        f"{row['stock_id']}:{row.get('transactions_count')}:{row.get('updated_at')}"
+        for row in rows
+    )
+    return hashlib.sha1('|'.join(keys).encode('utf-8')).hexdigest()[:16]
+
+
+def wallet_version(
+    position_rows: Iterable[Dict[str, Any]],
+    portfolio_rows: Iterable[Dict[str, Any]],
+    latest_prices: Dict[str, Dict[str, Any]],
+) -> str:
+    """
+    Versão da carteira exibida: snapshot de posições (transações), quantidades
+    de user_portfolio e último preço de cada ação da carteira
+
+    Example:
+        >>> wallet_version([], [], {})
+        '0765d8472f9ebe21'
+    """
+    holdings = sorted(f"{row['stock_id']}:{row.get('quantity')}" for row in portfolio_rows)
+    prices = sorted(
+        f"{stock_id}:{latest.get('date')}:{latest.get('price')}"
+        for stock_id, latest in latest_prices.items()
+    )
+    raw = '|'.join([positions_version(position_rows), ','.join(holdings), ','.join(prices)])
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+
+
+def get_wallet_version(user_id: str) -> str:
+    """
+    Versão da carteira do usuário, usada como ETag (muda a cada transação,
+    edição direta de user_portfolio ou novo preço de uma ação da carteira)
+    """
+    supabase = get_supabase_admin_client()
+    positions_response = supabase.table('user_positions')\
+        .select('stock_id, transactions_count, updated_at')\
+        .eq('user_id', user_id)\
+        .execute()
+    portfolio_response = supabase.table('user_portfolio')\
+        .select('stock_id, quantity')\
+        .eq('user_id', user_id)\
+        .execute()
+
+    portfolio_rows = portfolio_response.data or []
+    latest_prices = get_latest_prices_bulk([row['stock_id'] for row in portfolio_rows], supabase=supabase)
+    return wallet_version(positions_response.data or [], portfolio_rows, latest_prices)
+
+
+def get_user_positions(
+    user_id: str,
+    include_closed: bool = False,
+    rebuild: bool = False,
+    stock_ids: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """
+    Posições do usuário com custo médio e lucro realizado/não realizado
+
+    Lê o snapshot materializado; se ele ainda não existe (ou rebuild=True),
+    reprocessa o histórico uma vez.
+
+    Args:
+        user_id: ID do usuário
+        include_closed: Inclui ações já zeradas (só lucro realizado)
+        rebuild: Força o reprocessamento de todo o histórico
+        stock_ids: Apenas estas ações (ex: as afetadas por uma transação)
+
+    Returns:
+        dict: {"success": bool, "data": [...], "totals": {...}}
+    """
+    try:
+        if rebuild:
+            positions = rebuild_positions(user_id, stock_ids)
+        else:
+            query = get_supabase_admin_client().table('user_positions')\
+                .select('stock_id, quantity, average_cost, cost_basis, realized_pnl, transactions_count, last_transaction_date')\
+                .eq('user_id', user_id)
+            if stock_ids is not None:
+                query = query.in_('stock_id', stock_ids)
+            response = query.execute()
+            positions = {row['stock_id']: _from_row(row) for row in response.data or []}
+            # Filtrado por ação, ausência é legítima (ação sem transações restantes)
+            if not positions and stock_ids is None:
+                positions = rebuild_positions(user_id)
+
+        latest_prices = get_latest_prices_bulk(list(positions))
+
+        items = []
+        totals = {'cost_basis': 0.0, 'market_value': 0.0, 'realized_pnl': 0.0, 'unrealized_pnl': 0.0}
+        for stock_id, position in positions.items():
+            if position['quantity'] <= 0 and not include_closed:
+                continue
+
+            stock = get_stock_by_id(stock_id) or {}
+            latest = latest_prices.get(stock_id)
+            current_price = latest['price'] if latest else None
+            market_value = position['quantity'] * current_price if current_price is not None else None
+            unrealized = market_value - position['cost_basis'] if market_value is not None else None
+
+            items.append({
+                'stock_id': stock_id,
+                'ticker': stock.get('ticker'),
+                'company_name': stock.get('company_name'),
+                'quantity': position['quantity'],
+                'average_cost': position['average_cost'],
+                'cost_basis': position['cost_basis'],
+                'current_price': current_price,
+                'market_value': market_value,
+                'realized_pnl': position['realized_pnl'],
+                'unrealized_pnl': unrealized,
+                'last_transaction_date': position['last_transaction_date']
+            })
+
+            totals['cost_basis'] += position['cost_basis']
+            totals['realized_pnl'] += position['realized_pnl']
+            if market_value is not None:
+                totals['market_value'] += market_value
+                totals['unrealized_pnl'] += unrealized
+
+        items.sort(key=lambda item: item['ticker'] or '')
+        return {
+            "success": True,
+            "data": items,
+            "totals": totals
+        }
+    except Exception as error:
+        return {
+            "success": False,
+            "message": str(error)
+        }
@@ -2,14 +2,16 @@
 Serviço de cache de preços de ações no Supabase
 Gerencia a leitura de preços armazenados em cache
 """
-from datetime import datetime, timedelta, date
+from datetime import datetime, date
 from typing import List, Dict, Optional
 from config.supabase_config import get_supabase_client
+from services.stock_cache_service import get_stock_id
+from services.price_history_service import get_price_range
 
 
 def get_stock_id_by_ticker(ticker: str) -> Optional[str]:
     """
-    Busca o ID da ação no Supabase pela ticker
+    Busca o ID da ação pela ticker (cache em memória, com fallback no Supabase)
     
     Args:
         ticker: Código da ação (ex: "PETR4")
@@ -22,41 +24,27 @@ def get_stock_id_by_ticker(ticker: str) -> Optional[str]:
         >>> if stock_id:
         ...     print(f"ID encontrado: {stock_id}")
     """
-    try:
-        # Formata o ticker (maiúsculas e sem espaços)
-        ticker = ticker.upper().strip()
-        
-        print(f"[INFO] Buscando ID da ação {ticker} no Supabase...")
-        
-        # Obtém o cliente Supabase
-        supabase = get_supabase_client()
-        
-        # Query: SELECT id FROM stocks WHERE ticker = ticker
-        response = supabase.table('stocks')\
-            .select('id')\
-            .eq('ticker', ticker)\
-            .execute()
-        
-        # Verifica se encontrou algum resultado
-        if not response.data or len(response.data) == 0:
-            print(f"[AVISO] Ação {ticker} não encontrada no banco de dados")
-            return None
-        
-        # Retorna o ID da primeira (e única) ocorrência
-        stock_id = response.data[0]['id']
-        print(f"[OK] ID da ação {ticker} encontrado: {stock_id}")
-        return stock_id
-        
-    except Exception as e:
-        print(f"[ERRO] Erro ao buscar ID da ação {ticker}")
-        print(f"Detalhes: {str(e)}")
+    # Formata o ticker (maiúsculas e sem espaços)
+    ticker = ticker.upper().strip()
+    
+    # Consulta o cache em memória (vai ao banco apenas se o ticker não estiver em cache)
+    stock_id = get_stock_id(ticker)
+    
+    if stock_id is None:
+        print(f"[AVISO] Ação {ticker} não encontrada no banco de dados")
         return None
+    
+    print(f"[OK] ID da ação {ticker} encontrado: {stock_id}")
+    return stock_id
 
 
 def get_prices_from_cache(stock_id: str, range_days: int) -> List[Dict[str, any]]:
     """
     Busca preços do Supabase filtrados por período
     
+    Lê do histórico em memória (services/price_history_service.py): a ação é
+    carregada do banco uma vez e o período é um recorte por busca binária.
+    
     Args:
         stock_id: ID da ação (UUID)
         range_days: Número de dias (ex: 7, 30, 90)
@@ -78,43 +66,16 @@ def get_prices_from_cache(stock_id: str, range_days: int) -> List[Dict[str, any]
     try:
         print(f"[INFO] Buscando preços em cache para stock_id={stock_id}, range_days={range_days}...")
         
-        # Obtém o cliente Supabase
-        supabase = get_supabase_client()
-        
-        # Calcula a data inicial (hoje - range_days)
-        end_date = datetime.now().date()
-        start_date = end_date - timedelta(days=range_days)
-        
-        # Formata as datas para string ISO (YYYY-MM-DD)
-        start_date_str = start_date.isoformat()
-        
-        # Query: SELECT price, date FROM stock_prices 
-        #        WHERE stock_id = stock_id 
-        #        AND date >= (today - range_days)
-        #        ORDER BY date ASC
-        response = supabase.table('stock_prices')\
-            .select('price, date')\
-            .eq('stock_id', stock_id)\
-            .gte('date', start_date_str)\
-            .order('date', desc=False)\
-            .execute()
+        # Recorte dos últimos range_days dias (date >= hoje - range_days), ordenado por data
+        series = get_price_range(stock_id, range_days)
         
         # Verifica se encontrou dados
-        if not response.data or len(response.data) == 0:
+        if series is None or len(series) == 0:
             print(f"[AVISO] Nenhum preço encontrado em cache para stock_id={stock_id}")
             return []
         
         # Formata os dados para o formato esperado
-        prices_list = []
-        for item in response.data:
-            try:
-                prices_list.append({
-                    "date": item['date'],
-                    "price": float(item['price'])
-                })
-            except (KeyError, ValueError, TypeError) as e:
-                print(f"[AVISO] Erro ao processar item do cache: {str(e)}")
-                continue
+        prices_list = series.to_list()
         
         print(f"[OK] {len(prices_list)} preços encontrados em cache")
         return prices_list
@@ -185,3 +146,89 @@ def get_most_recent_price_date(stock_id: str) -> Optional[date]:
         print(f"Detalhes: {str(e)}")
         return None
 
+
+
+def get_oldest_price_date(stock_id: str) -> Optional[date]:
+    """
+    Busca a data do preço mais antigo no banco (até onde o histórico chega)
+    
+    Args:
+        stock_id: ID da ação (UUID)
+        
+    Returns:
+        Data do preço mais antigo (date object) ou None se não houver dados
+    """
+    try:
+        response = get_supabase_client().table('stock_prices')\
+            .select('date')\
+            .eq('stock_id', stock_id)\
+            .order('date')\
+            .limit(1)\
+            .execute()
+        
+        if not response.data:
+            return None
+        
+        date_str = response.data[0]['date']
+        if isinstance(date_str, date):
+            return date_str
+        return datetime.fromisoformat(str(date_str)).date()
+        
+    except Exception as e:
+        print("[ERRO] Erro ao buscar data do preço mais antigo")
+        print(f"Detalhes: {str(e)}")
+        return None
+
+def get_latest_prices_bulk(stock_ids: List[str], supabase=None) -> Dict[str, Dict[str, any]]:
+    """
+    Busca o preço mais recente de VÁRIAS ações em uma única consulta
+    
+    Usa a view latest_stock_prices (supabase/migrations/003), que já
+    devolve uma linha por stock_id, filtrada com IN (...).
+    
+    Args:
+        stock_ids: Lista de IDs de ações (UUID)
+        supabase: Cliente Supabase a usar (padrão: get_supabase_client())
+        
+    Returns:
+        Dicionário {stock_id: {"price": 30.50, "date": "2024-11-05"}}
+        Ações sem preço em cache não aparecem no dicionário
+        
+    Example:
+        >>> latest = get_latest_prices_bulk(["uuid-1", "uuid-2"])
+        >>> print(latest.get("uuid-1", {}).get("price"))
+    """
+    unique_ids = list(dict.fromkeys(stock_id for stock_id in stock_ids if stock_id))
+    if not unique_ids:
+        return {}
+    
+    try:
+        print(f"[INFO] Buscando preços mais recentes de {len(unique_ids)} ações (consulta única)...")
+        
+        if supabase is None:
+            supabase = get_supabase_client()
+        
+        # Query: SELECT stock_id, price, date FROM latest_stock_prices WHERE stock_id IN (...)
+        response = supabase.table('latest_stock_prices')\
+            .select('stock_id, price, date')\
+            .in_('stock_id', unique_ids)\
+            .execute()
+        
+        latest_prices = {}
+        for item in response.data or []:
+            try:
+                latest_prices[item['stock_id']] = {
+                    "price": float(item['price']),
+                    "date": item['date']
+                }
+            except (KeyError, ValueError, TypeError) as e:
+                print(f"[AVISO] Erro ao processar preço mais recente: {str(e)}")
+                continue
+        
+        print(f"[OK] {len(latest_prices)} preços mais recentes encontrados")
+        return latest_prices
+        
+    except Exception as e:
+        print(f"[ERRO] Erro ao buscar preços mais recentes em lote")
+        print(f"Detalhes: {str(e)}")
+        return {}
@@ -0,0 +1,178 @@
+"""
+Histórico de preços em memória, em formato colunar (utils/price_series.py)
+Cada ação é carregada do stock_prices uma vez (em lote quando possível) e
+mantida atualizada por save_service; leituras por período não vão ao banco
+"""
+import os
+import threading
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional
+from config.supabase_config import get_supabase_client
+from utils.cache import TTLCache
+from utils.price_series import PriceSeries
+
+# Dias de histórico mantidos por ação (cobre os ranges da API e as análises de 1 ano)
+PRICE_HISTORY_DAYS = int(os.getenv('PRICE_HISTORY_DAYS', '400'))
+
+# Máximo de ações em memória (LRU) e tempo até recarregar do banco
+# (o TTL limita a defasagem quando outro processo grava preços)
+PRICE_HISTORY_MAX_STOCKS = int(os.getenv('PRICE_HISTORY_MAX_STOCKS', '2000'))
+PRICE_HISTORY_TTL_SECONDS = int(os.getenv('PRICE_HISTORY_TTL_SECONDS', '900'))
+
+# Tamanho da página ao ler stock_prices (limite padrão do PostgREST é 1000)
+_LOAD_PAGE_SIZE = 1000
+
+_series = TTLCache(max_size=PRICE_HISTORY_MAX_STOCKS, default_ttl=PRICE_HISTORY_TTL_SECONDS)
+_lock = threading.Lock()
+# Incrementado a cada gravação: uma carga iniciada antes dela não sobrescreve o dado novo
+_versions: Dict[str, int] = {}
+_epoch = 0
+_loaded_rows = 0
+
+
+def _query_histories(stock_ids: List[str]) -> Optional[Dict[str, PriceSeries]]:
+    """Lê o histórico de várias ações em uma consulta paginada (None se houver erro)"""
+    try:
+        supabase = get_supabase_client()
+        start_date = (date.today() - timedelta(days=PRICE_HISTORY_DAYS)).isoformat()
+
+        rows = []
+        offset = 0
+        while True:
+            response = supabase.table('stock_prices')\
+                .select('stock_id, date, price')\
+                .in_('stock_id', stock_ids)\
+                .gte('date', start_date)\
+                .order('stock_id')\
+                .order('date')\
+                .range(offset, offset + _LOAD_PAGE_SIZE - 1)\
+                .execute()
+
+            page = response.data or []
+            rows.extend(page)
+            if len(page) < _LOAD_PAGE_SIZE:
+                break
+            offset += _LOAD_PAGE_SIZE
+
+    except Exception as e:
+        print(f"[ERRO] Erro ao carregar histórico de preços")
+        print(f"Detalhes: {str(e)}")
+        return None
+
+    by_stock: Dict[str, List[Dict[str, any]]] = {stock_id: [] for stock_id in stock_ids}
+    for row in rows:
+        if row.get('stock_id') in by_stock:
+            by_stock[row['stock_id']].append(row)
+
+    global _loaded_rows
+    with _lock:
+        _loaded_rows += len(rows)
+
+    return {stock_id: PriceSeries.from_rows(items) for stock_id, items in by_stock.items()}
+
+
+def load_price_histories(stock_ids: Iterable[str]) -> Dict[str, PriceSeries]:
+    """
+    Retorna o histórico de várias ações, carregando do banco (em uma consulta)
+    apenas as que não estão em memória
+
+    Args:
+        stock_ids: IDs das ações (UUID)
+
+    Returns:
+        Dicionário {stock_id: PriceSeries}; ações sem preços têm série vazia.
+        Se o banco falhar, as ações não carregadas ficam fora do dicionário
+
+    Example:
+        >>> histories = load_price_histories(["uuid-1", "uuid-2"])
+        >>> histories["uuid-1"].last_days(30).prices.mean()
+    """
+    unique_ids = list(dict.fromkeys(stock_id for stock_id in stock_ids if stock_id))
+    result: Dict[str, PriceSeries] = {}
+    missing = []
+    for stock_id in unique_ids:
+        series = _series.get(stock_id)
+        if series is None:
+            missing.append(stock_id)
+        else:
+            result[stock_id] = series
+
+    if not missing:
+        return result
+
+    with _lock:
+        epoch = _epoch
+        versions = {stock_id: _versions.get(stock_id, 0) for stock_id in missing}
+
+    print(f"[INFO] Carregando histórico de preços de {len(missing)} ação(ões) em memória...")
+    loaded = _query_histories(missing)
+    if loaded is None:
+        return result
+
+    with _lock:
+        for stock_id, series in loaded.items():
+            if _epoch != epoch or _versions.get(stock_id, 0) != versions[stock_id]:
+                # Preços gravados durante a carga: recarrega na próxima leitura
+                continue
+            _series.set(stock_id, series)
+    result.update(loaded)
+    return result
+
+
+def get_price_series(stock_id: str) -> Optional[PriceSeries]:
+    """Histórico completo em memória de uma ação (None se o banco falhar)"""
+    return load_price_histories([stock_id]).get(stock_id)
+
+
+def get_price_range(stock_id: str, range_days: int) -> Optional[PriceSeries]:
+    """
+    Preços dos últimos range_days dias (view dos arrays em memória, sem cópia)
+
+    Example:
+        >>> series = get_price_range("uuid-123", 30)
+        >>> series.to_list()
+        [{"date": "2024-01-15", "price": 28.5}, ...]
+    """
+    series = get_price_series(stock_id)
+    if series is None:
+        return None
+    return series.last_days(range_days)
+
+
+def apply_saved_prices(stock_id: str, prices_list: List[Dict[str, any]]) -> None:
+    """
+    Incorpora preços recém-gravados ao histórico em memória
+
+    Chamado por save_service depois de um UPSERT que inseriu/alterou linhas.
+    Ações que não estão em memória são ignoradas (serão carregadas na próxima leitura).
+    """
+    update = PriceSeries.from_rows(prices_list)
+    with _lock:
+        _versions[stock_id] = _versions.get(stock_id, 0) + 1
+        current = _series.get(stock_id)
+        if current is not None:
+            _series.set(stock_id, current.merge(update))
+
+
+def invalidate_price_history(stock_id: Optional[str] = None) -> None:
+    """Descarta o histórico em memória de uma ação (ou de todas)"""
+    global _epoch
+    with _lock:
+        if stock_id is None:
+            _series.clear()
+            _epoch += 1
+        else:
+            _series.delete(stock_id)
+            _versions[stock_id] = _versions.get(stock_id, 0) + 1
+
+
+def get_price_history_stats() -> Dict[str, any]:
+    """Retorna informações do histórico em memória (para diagnóstico)"""
+    stats = _series.stats()
+    with _lock:
+        stats.update({
+            "history_days": PRICE_HISTORY_DAYS,
+            "ttl_seconds": PRICE_HISTORY_TTL_SECONDS,
+            "loaded_rows": _loaded_rows
+        })
+    return stats
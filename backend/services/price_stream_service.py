@@ -0,0 +1,63 @@
+"""
+Distribuição de atualizações de preço em tempo real
+save_service publica aqui cada preço novo/alterado; as conexões SSE de
+/api/portfolio/stream assinam os stock_ids da carteira do usuário
+"""
+import os
+from datetime import datetime
+from typing import Dict, List
+
+from config.supabase_config import get_supabase_client
+from utils.pubsub import PubSubHub
+
+# Mensagens pendentes por conexão antes de descartar as mais antigas
+PRICE_STREAM_MAX_QUEUE = int(os.getenv('PRICE_STREAM_MAX_QUEUE', '100'))
+
+price_hub = PubSubHub("prices", max_queue=PRICE_STREAM_MAX_QUEUE)
+
+
+def publish_price_update(stock_id: str, prices_list: List[Dict[str, any]]) -> int:
+    """
+    Publica o preço mais recente de uma ação para quem está assinando
+
+    Args:
+        stock_id: UUID da ação
+        prices_list: Preços recém-gravados [{"date": "2024-01-15", "price": 28.50}, ...]
+
+    Returns:
+        Número de conexões que receberam a atualização
+    """
+    if not prices_list or not price_hub.has_subscribers(stock_id):
+        return 0
+
+    latest = max(prices_list, key=lambda item: item['date'])
+
+    from services.stock_cache_service import get_ticker
+
+    return price_hub.publish(stock_id, {
+        "stock_id": stock_id,
+        "ticker": get_ticker(stock_id),
+        "date": latest['date'],
+        "price": float(latest['price']),
+        "published_at": datetime.utcnow().isoformat()
+    })
+
+
+def get_user_holdings(user_id: str) -> Dict[str, str]:
+    """
+    Ações da carteira do usuário (tópicos que a conexão SSE assina)
+
+    Returns:
+        Dicionário {stock_id: ticker}
+    """
+    supabase = get_supabase_client()
+    response = supabase.table('user_portfolio')\
+        .select('stock_id, stocks(ticker)')\
+        .eq('user_id', user_id)\
+        .execute()
+
+    return {
+        item['stock_id']: item['stocks']['ticker']
+        for item in response.data or []
+        if item.get('stock_id') and item.get('stocks')
+    }
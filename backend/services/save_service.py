@@ -2,14 +2,130 @@
 Serviço de salvamento de dados no Supabase
 Implementa o salvamento de preços e dividendos com UPSERT
 """
+import os
 from datetime import datetime
 from typing import List, Dict
 from config.supabase_config import get_supabase_client
+from services.stock_view_cache_service import invalidate_stock_view
+from services.price_stream_service import publish_price_update
+from services.price_history_service import apply_saved_prices
+
+# Máximo de linhas por chamada nos salvamentos em lote (várias ações)
+SAVE_BULK_CHUNK_SIZE = int(os.getenv('SAVE_BULK_CHUNK_SIZE', '500'))
+
+# Códigos de "função não existe" do PostgREST (cache de schema) e do Postgres
+_MISSING_FUNCTION_CODES = ('PGRST202', '42883')
+
+
+def _is_missing_function_error(error: Exception) -> bool:
+    """Se o erro da RPC indica que a função ainda não foi criada (migration não aplicada)"""
+    code = getattr(error, 'code', None)
+    if code in _MISSING_FUNCTION_CODES:
+        return True
+    message = str(error)
+    return any(missing_code in message for missing_code in _MISSING_FUNCTION_CODES)
+
+
+def _price_records(stock_id: str, prices_list: List[Dict[str, any]]) -> List[Dict[str, any]]:
+    """Converte [{"date", "price"}] em registros {"stock_id", "date", "price"}, ignorando itens inválidos"""
+    records = []
+    for item in prices_list:
+        try:
+            # Valida se o item tem as chaves necessárias
+            if 'date' not in item or 'price' not in item:
+                print(f"[AVISO] Item sem chaves necessárias ignorado: {item}")
+                continue
+            
+            records.append({
+                'stock_id': stock_id,
+                'date': item['date'],
+                'price': float(item['price'])
+            })
+            
+        except (ValueError, TypeError) as e:
+            print(f"[AVISO] Erro ao processar item: {item} - {str(e)}")
+            continue
+    return records
+
+
+def upsert_prices(records: List[Dict[str, any]]) -> Dict[str, any]:
+    """
+    Grava preços de uma ou várias ações com UPSERT condicional no banco
+    
+    Uma única chamada (RPC upsert_stock_prices, migration 004) insere datas novas,
+    atualiza apenas preços que mudaram e não toca nas linhas iguais - sem ler
+    os preços existentes antes.
+    
+    Args:
+        records: Lista [{"stock_id": "uuid", "date": "2024-01-15", "price": 28.50}, ...]
+        
+    Returns:
+        dict: {
+            "inserted": int, "updated": int, "unchanged": int,
+            "by_stock": {stock_id: {"inserted": int, "updated": int, "unchanged": int}}
+        }
+        
+    Raises:
+        Exception: Se a gravação falhar (só a ausência da RPC cai no UPSERT simples)
+        
+    Example:
+        >>> upsert_prices([{"stock_id": "uuid-1", "date": "2024-01-15", "price": 28.5}])
+        {"inserted": 1, "updated": 0, "unchanged": 0, "by_stock": {...}}
+    """
+    # Linhas distintas enviadas por ação (a função mantém a última de cada (ação, data))
+    sent_by_stock = {}
+    for record in records:
+        sent_by_stock.setdefault(record['stock_id'], set()).add(record['date'])
+    
+    supabase = get_supabase_client()
+    
+    try:
+        response = supabase.rpc('upsert_stock_prices', {'p_rows': records}).execute()
+        written = {row['stock_id']: row for row in (response.data or [])}
+    except Exception as e:
+        # Timeouts, 5xx e payload inválido são falhas reais: só a ausência da
+        # função (migration 004 não aplicada) cai no UPSERT simples
+        if not _is_missing_function_error(e):
+            raise
+        
+        # UPSERT simples (toda linha conta como gravada); como a RPC, mantém a
+        # última linha de cada (ação, data) - repetidas quebram o ON CONFLICT
+        print(f"[AVISO] RPC upsert_stock_prices indisponível ({str(e)}) - usando UPSERT simples")
+        current_timestamp = datetime.utcnow().isoformat()
+        unique_records = {(record['stock_id'], record['date']): record for record in records}
+        supabase.table('stock_prices')\
+            .upsert(
+                [{**record, 'created_at': current_timestamp} for record in unique_records.values()],
+                on_conflict='stock_id,date'
+            )\
+            .execute()
+        written = {
+            stock_id: {'inserted': 0, 'updated': len(dates)}
+            for stock_id, dates in sent_by_stock.items()
+        }
+    
+    by_stock = {}
+    for stock_id, dates in sent_by_stock.items():
+        row = written.get(stock_id) or {}
+        inserted = int(row.get('inserted') or 0)
+        updated = int(row.get('updated') or 0)
+        by_stock[stock_id] = {
+            'inserted': inserted,
+            'updated': updated,
+            'unchanged': max(0, len(dates) - inserted - updated)
+        }
+    
+    return {
+        'inserted': sum(counts['inserted'] for counts in by_stock.values()),
+        'updated': sum(counts['updated'] for counts in by_stock.values()),
+        'unchanged': sum(counts['unchanged'] for counts in by_stock.values()),
+        'by_stock': by_stock
+    }
 
 
 def save_prices(stock_id: str, prices_list: List[Dict[str, any]]) -> int:
     """
-    Salva preços no Supabase usando UPSERT
+    Salva preços no Supabase usando UPSERT condicional
     
     Args:
         stock_id: UUID da ação
@@ -19,8 +135,9 @@ def save_prices(stock_id: str, prices_list: List[Dict[str, any]]) -> int:
         Número de registros salvos (int) ou 0 se erro
         
     Note:
-        Usa UPSERT para atualizar preços existentes ou inserir novos
-        Quando há conflito em (stock_id, date), atualiza o preço
+        Datas novas são inseridas e preços diferentes atualizados em uma única
+        chamada (ver upsert_prices). Linhas já iguais no banco contam como salvas,
+        mas não invalidam o cache da visualização.
         
     Example:
         >>> prices = [
@@ -43,82 +160,24 @@ def save_prices(stock_id: str, prices_list: List[Dict[str, any]]) -> int:
         
         print(f"[INFO] Salvando {len(prices_list)} preços para stock_id={stock_id}...")
         
-        # Obtém o cliente Supabase
-        supabase = get_supabase_client()
-        
-        # ANTES DO UPSERT: Busca preços existentes para comparação (só das datas que vamos salvar)
-        dates_to_save = [item['date'] for item in prices_list if 'date' in item]
-        existing_prices = {}
-        
-        if dates_to_save:
-            try:
-                response_existing = supabase.table('stock_prices')\
-                    .select('date, price')\
-                    .eq('stock_id', stock_id)\
-                    .in_('date', dates_to_save)\
-                    .execute()
-                
-                if response_existing.data:
-                    existing_prices = {item['date']: float(item['price']) for item in response_existing.data}
-                    print(f"[INFO] Encontrados {len(existing_prices)} preços existentes para comparação")
-            except Exception as e:
-                print(f"[AVISO] Não foi possível buscar preços existentes: {str(e)}")
-        
-        # Prepara os dados para inserção/atualização
-        records_to_insert = []
-        current_timestamp = datetime.utcnow().isoformat()
-        
-        for item in prices_list:
-            try:
-                # Valida se o item tem as chaves necessárias
-                if 'date' not in item or 'price' not in item:
-                    print(f"[AVISO] Item sem chaves necessárias ignorado: {item}")
-                    continue
-                
-                date_str = item['date']
-                new_price = float(item['price'])
-                
-                # Verifica se é INSERT ou UPDATE
-                if date_str in existing_prices:
-                    old_price = existing_prices[date_str]
-                    if abs(old_price - new_price) > 0.01:  # Diferença significativa (mais de R$ 0,01)
-                        print(f"[UPSERT] UPDATE para {date_str}: R$ {old_price:.2f} → R$ {new_price:.2f}")
-                    else:
-                        print(f"[UPSERT] UPDATE para {date_str}: R$ {new_price:.2f} (sem mudança significativa)")
-                else:
-                    print(f"[UPSERT] INSERT novo preço para {date_str}: R$ {new_price:.2f}")
-                
-                # Monta o registro para inserção/atualização
-                # IMPORTANTE: created_at será atualizado no UPDATE também (para rastrear última modificação)
-                record = {
-                    'stock_id': stock_id,
-                    'date': date_str,
-                    'price': new_price,
-                    'created_at': current_timestamp  # Timestamp da última modificação
-                }
-                
-                records_to_insert.append(record)
-                
-            except (ValueError, TypeError) as e:
-                print(f"[AVISO] Erro ao processar item: {item} - {str(e)}")
-                continue
+        records = _price_records(stock_id, prices_list)
         
         # Verifica se há registros válidos para inserir
-        if len(records_to_insert) == 0:
+        if len(records) == 0:
             print("[AVISO] Nenhum registro válido para salvar")
             return 0
         
-        # Faz UPSERT na tabela stock_prices
-        # onConflict especifica que duplicatas em (stock_id, date) serão ATUALIZADAS
-        print(f"[INFO] Executando UPSERT de {len(records_to_insert)} registros...")
-        response = supabase.table('stock_prices')\
-            .upsert(records_to_insert, on_conflict='stock_id,date')\
-            .execute()
+        result = upsert_prices(records)
+        saved_count = result['inserted'] + result['updated'] + result['unchanged']
         
-        # Conta quantos registros foram salvos
-        saved_count = len(response.data) if response.data else 0
+        # Dados novos: descarta visualizações em cache desta ação e avisa quem está assinando
+        if result['inserted'] + result['updated'] > 0:
+            invalidate_stock_view(stock_id=stock_id)
+            apply_saved_prices(stock_id, prices_list)
+            publish_price_update(stock_id, prices_list)
         
-        print(f"[OK] ✓ {saved_count} preços processados com sucesso (INSERT + UPDATE)")
+        print(f"[OK] ✓ {saved_count} preços processados "
+              f"(INSERT: {result['inserted']}, UPDATE: {result['updated']}, sem mudança: {result['unchanged']})")
         return saved_count
         
     except Exception as e:
@@ -201,6 +260,10 @@ def save_dividends(stock_id: str, dividends_list: List[Dict[str, any]]) -> int:
         # Conta quantos registros foram salvos
         saved_count = len(response.data) if response.data else 0
         
+        # Dados novos: descarta visualizações em cache desta ação
+        if saved_count > 0:
+            invalidate_stock_view(stock_id=stock_id)
+        
         print(f"[OK] {saved_count} dividendos salvos com sucesso")
         return saved_count
         
@@ -209,3 +272,176 @@ def save_dividends(stock_id: str, dividends_list: List[Dict[str, any]]) -> int:
         print(f"Detalhes: {str(e)}")
         return 0
 
+
+def _chunk_rows(rows: List[Dict[str, any]], chunk_size: int) -> List[List[Dict[str, any]]]:
+    chunk_size = max(1, int(chunk_size))
+    return [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)]
+
+
+def _new_bulk_outcome(stock_ids) -> Dict[str, any]:
+    return {
+        "saved": 0,
+        "failed_stocks": [],
+        "by_stock": {stock_id: {"status": "ok", "saved": 0} for stock_id in stock_ids}
+    }
+
+
+def _finish_bulk_outcome(outcome: Dict[str, any], changed_stock_ids) -> Dict[str, any]:
+    outcome["failed_stocks"] = [
+        stock_id for stock_id, result in outcome["by_stock"].items() if result["status"] == "error"
+    ]
+    outcome["saved"] = sum(result["saved"] for result in outcome["by_stock"].values())
+    
+    # Dados novos: descarta visualizações em cache das ações alteradas
+    for stock_id in changed_stock_ids:
+        invalidate_stock_view(stock_id=stock_id)
+    
+    return outcome
+
+
+def save_prices_bulk(
+    prices_by_stock: Dict[str, List[Dict[str, any]]],
+    chunk_size: int = SAVE_BULK_CHUNK_SIZE
+) -> Dict[str, any]:
+    """
+    Salva preços de várias ações em poucas chamadas ao banco
+    
+    As linhas de todas as ações são agrupadas em blocos de até chunk_size e
+    gravadas com upsert_prices (UPSERT condicional). Se um bloco falhar, os
+    demais continuam e apenas as ações daquele bloco são marcadas com erro.
+    
+    Args:
+        prices_by_stock: {stock_id: [{"date": "2024-01-15", "price": 28.50}, ...]}
+        chunk_size: Máximo de linhas por chamada (padrão: SAVE_BULK_CHUNK_SIZE)
+        
+    Returns:
+        dict: {
+            "saved": int,
+            "failed_stocks": [stock_ids],
+            "by_stock": {stock_id: {"status": "ok" | "error", "saved": int,
+                                    "inserted": int, "updated": int, "unchanged": int}}
+        }
+        
+    Example:
+        >>> result = save_prices_bulk({
+        ...     "uuid-1": [{"date": "2024-01-15", "price": 28.50}],
+        ...     "uuid-2": [{"date": "2024-01-15", "price": 61.20}]
+        ... })
+        >>> result["failed_stocks"]
+        []
+    """
+    outcome = _new_bulk_outcome(prices_by_stock.keys())
+    for result in outcome["by_stock"].values():
+        result.update({"inserted": 0, "updated": 0, "unchanged": 0})
+    
+    records = []
+    for stock_id, prices_list in prices_by_stock.items():
+        records.extend(_price_records(stock_id, prices_list or []))
+    
+    if not records:
+        print("[AVISO] Nenhum preço válido para salvar em lote")
+        return outcome
+    
+    chunks = _chunk_rows(records, chunk_size)
+    print(f"[INFO] Salvando {len(records)} preços de {len(prices_by_stock)} ações em {len(chunks)} bloco(s)...")
+    
+    changed = set()
+    for index, chunk in enumerate(chunks, start=1):
+        try:
+            result = upsert_prices(chunk)
+        except Exception as e:
+            print(f"[ERRO] Falha ao salvar bloco {index}/{len(chunks)} de preços: {str(e)}")
+            for record in chunk:
+                outcome["by_stock"][record['stock_id']]["status"] = "error"
+            continue
+        
+        for stock_id, counts in result["by_stock"].items():
+            stock_result = outcome["by_stock"][stock_id]
+            for key in ("inserted", "updated", "unchanged"):
+                stock_result[key] += counts[key]
+            stock_result["saved"] += counts["inserted"] + counts["updated"] + counts["unchanged"]
+            if counts["inserted"] + counts["updated"] > 0:
+                changed.add(stock_id)
+    
+    outcome = _finish_bulk_outcome(outcome, changed)
+    for stock_id in changed:
+        apply_saved_prices(stock_id, prices_by_stock[stock_id])
+        publish_price_update(stock_id, prices_by_stock[stock_id])
+    print(f"[OK] ✓ {outcome['saved']} preços processados em lote "
+          f"({len(outcome['failed_stocks'])} ação(ões) com erro)")
+    return outcome
+
+
+def save_dividends_bulk(
+    dividends_by_stock: Dict[str, List[Dict[str, any]]],
+    chunk_size: int = SAVE_BULK_CHUNK_SIZE
+) -> Dict[str, any]:
+    """
+    Salva dividendos de várias ações em poucas chamadas ao banco
+    
+    Mesma estratégia de save_prices_bulk: blocos de até chunk_size linhas,
+    falha de um bloco não impede os demais.
+    
+    Args:
+        dividends_by_stock: {stock_id: [{"payment_date": "2024-03-30", "value": 1.25}, ...]}
+        chunk_size: Máximo de linhas por chamada (padrão: SAVE_BULK_CHUNK_SIZE)
+        
+    Returns:
+        dict: {
+            "saved": int,
+            "failed_stocks": [stock_ids],
+            "by_stock": {stock_id: {"status": "ok" | "error", "saved": int}}
+        }
+    """
+    outcome = _new_bulk_outcome(dividends_by_stock.keys())
+    current_timestamp = datetime.utcnow().isoformat()
+    
+    records = []
+    for stock_id, dividends_list in dividends_by_stock.items():
+        for item in dividends_list or []:
+            try:
+                if 'payment_date' not in item or 'value' not in item:
+                    print(f"[AVISO] Item sem chaves necessárias ignorado: {item}")
+                    continue
+                
+                records.append({
+                    'stock_id': stock_id,
+                    'payment_date': item['payment_date'],
+                    'value': float(item['value']),
+                    'created_at': current_timestamp
+                })
+                
+            except (ValueError, TypeError) as e:
+                print(f"[AVISO] Erro ao processar item: {item} - {str(e)}")
+                continue
+    
+    if not records:
+        print("[AVISO] Nenhum dividendo válido para salvar em lote")
+        return outcome
+    
+    chunks = _chunk_rows(records, chunk_size)
+    print(f"[INFO] Salvando {len(records)} dividendos de {len(dividends_by_stock)} ações em {len(chunks)} bloco(s)...")
+    
+    supabase = get_supabase_client()
+    changed = set()
+    for index, chunk in enumerate(chunks, start=1):
+        try:
+            response = supabase.table('stock_dividends')\
+                .upsert(chunk, on_conflict='stock_id,payment_date')\
+                .execute()
+        except Exception as e:
+            print(f"[ERRO] Falha ao salvar bloco {index}/{len(chunks)} de dividendos: {str(e)}")
+            for record in chunk:
+                outcome["by_stock"][record['stock_id']]["status"] = "error"
+            continue
+        
+        for row in response.data or []:
+            stock_id = row.get('stock_id')
+            if stock_id in outcome["by_stock"]:
+                outcome["by_stock"][stock_id]["saved"] += 1
+                changed.add(stock_id)
+    
+    outcome = _finish_bulk_outcome(outcome, changed)
+    print(f"[OK] {outcome['saved']} dividendos salvos em lote "
+          f"({len(outcome['failed_stocks'])} ação(ões) com erro)")
+    return outcome
@@ -0,0 +1,301 @@
+"""
+Cache em memória do mapeamento ticker <-> stock_id
+Evita consultar a tabela stocks a cada requisição (o mapeamento quase nunca muda)
+"""
+import os
+import threading
+from typing import Dict, Iterable, List, Optional
+from config.supabase_config import get_supabase_client
+from utils.cache import NegativeCache
+
+# Intervalo (segundos) entre recargas completas em segundo plano
+STOCK_CACHE_REFRESH_SECONDS = int(os.getenv('STOCK_CACHE_REFRESH_SECONDS', '3600'))
+
+# Tickers que não existem na tabela stocks são lembrados por pouco tempo
+NEGATIVE_CACHE_DB_TTL_SECONDS = int(os.getenv('NEGATIVE_CACHE_DB_TTL_SECONDS', '60'))
+
+db_negative_cache = NegativeCache("db", ttl=NEGATIVE_CACHE_DB_TTL_SECONDS)
+
+# Tamanho da página ao carregar a tabela stocks (limite padrão do PostgREST é 1000)
+_LOAD_PAGE_SIZE = 1000
+
+_lock = threading.Lock()
+_by_ticker: Dict[str, Dict[str, any]] = {}
+_by_id: Dict[str, Dict[str, any]] = {}
+_loaded = False
+_refresh_thread: Optional[threading.Thread] = None
+_refresh_stop = threading.Event()
+
+
+def _normalize_ticker(ticker: Optional[str]) -> str:
+    return str(ticker or '').upper().strip()
+
+
+def _store(stock: Dict[str, any]) -> Dict[str, any]:
+    entry = {
+        'id': stock['id'],
+        'ticker': _normalize_ticker(stock.get('ticker')),
+        'company_name': stock.get('company_name')
+    }
+    _by_ticker[entry['ticker']] = entry
+    _by_id[entry['id']] = entry
+    return entry
+
+
+def load_stock_cache() -> int:
+    """
+    Carrega TODA a tabela stocks para a memória (substitui o conteúdo atual)
+
+    Returns:
+        Número de ações carregadas (0 se houver erro - o cache anterior é mantido)
+
+    Example:
+        >>> count = load_stock_cache()
+        >>> print(f"{count} ações em cache")
+    """
+    global _by_ticker, _by_id, _loaded
+
+    try:
+        print("[INFO] Carregando mapeamento ticker -> stock_id em memória...")
+        supabase = get_supabase_client()
+
+        rows = []
+        offset = 0
+        while True:
+            response = supabase.table('stocks')\
+                .select('id, ticker, company_name')\
+                .order('ticker')\
+                .range(offset, offset + _LOAD_PAGE_SIZE - 1)\
+                .execute()
+
+            page = response.data or []
+            rows.extend(page)
+            if len(page) < _LOAD_PAGE_SIZE:
+                break
+            offset += _LOAD_PAGE_SIZE
+
+        new_by_ticker = {}
+        new_by_id = {}
+        for stock in rows:
+            if not stock.get('id') or not stock.get('ticker'):
+                continue
+            entry = {
+                'id': stock['id'],
+                'ticker': _normalize_ticker(stock['ticker']),
+                'company_name': stock.get('company_name')
+            }
+            new_by_ticker[entry['ticker']] = entry
+            new_by_id[entry['id']] = entry
+
+        # Troca os mapas de uma vez para que leitores nunca vejam um cache pela metade
+        with _lock:
+            _by_ticker = new_by_ticker
+            _by_id = new_by_id
+            _loaded = True
+        db_negative_cache.clear()
+
+        print(f"[OK] {len(new_by_id)} ações carregadas no cache de stocks")
+        return len(new_by_id)
+
+    except Exception as e:
+        print(f"[ERRO] Erro ao carregar cache de stocks")
+        print(f"Detalhes: {str(e)}")
+        return 0
+
+
+def _fetch_stocks(column: str, values: List[str]) -> Optional[List[Dict[str, any]]]:
+    """Busca no banco as ações que não estão no cache e as adiciona ao cache (None se erro)"""
+    if not values:
+        return []
+
+    try:
+        supabase = get_supabase_client()
+        response = supabase.table('stocks')\
+            .select('id, ticker, company_name')\
+            .in_(column, values)\
+            .execute()
+
+        with _lock:
+            return [_store(stock) for stock in response.data or [] if stock.get('id') and stock.get('ticker')]
+
+    except Exception as e:
+        print(f"[ERRO] Erro ao buscar ações no banco ({column})")
+        print(f"Detalhes: {str(e)}")
+        return None
+
+
+def get_stocks_by_tickers(tickers: Iterable[str]) -> Dict[str, Dict[str, any]]:
+    """
+    Resolve vários tickers de uma vez
+
+    Tickers fora do cache são buscados no banco com UMA consulta (in_).
+    Tickers que o banco acabou de dizer que não existem são lembrados por
+    NEGATIVE_CACHE_DB_TTL_SECONDS e não são consultados de novo nesse período.
+
+    Args:
+        tickers: Códigos das ações (ex: ["PETR4", "VALE3"])
+
+    Returns:
+        Dicionário {ticker: {"id": ..., "ticker": ..., "company_name": ...}}
+        Tickers inexistentes não aparecem no dicionário
+    """
+    normalized = [t for t in dict.fromkeys(_normalize_ticker(t) for t in tickers) if t]
+
+    with _lock:
+        found = {t: _by_ticker[t] for t in normalized if t in _by_ticker}
+
+    missing = [t for t in normalized if t not in found and not db_negative_cache.is_negative(t)]
+    fetched = _fetch_stocks('ticker', missing)
+    if fetched is None:
+        return found
+
+    for stock in fetched:
+        found[stock['ticker']] = stock
+    for ticker in missing:
+        if ticker not in found:
+            db_negative_cache.remember(ticker)
+
+    return found
+
+
+def get_stock_by_ticker(ticker: str) -> Optional[Dict[str, any]]:
+    """
+    Busca uma ação pelo ticker (cache primeiro, banco se não estiver em cache)
+
+    Args:
+        ticker: Código da ação (ex: "PETR4")
+
+    Returns:
+        {"id": ..., "ticker": ..., "company_name": ...} ou None se não existir
+
+    Example:
+        >>> stock = get_stock_by_ticker("petr4")
+        >>> print(stock['id'] if stock else "não encontrada")
+    """
+    ticker = _normalize_ticker(ticker)
+    if not ticker:
+        return None
+    return get_stocks_by_tickers([ticker]).get(ticker)
+
+
+def get_stock_by_id(stock_id: str) -> Optional[Dict[str, any]]:
+    """
+    Busca reversa: ação pelo stock_id (cache primeiro, banco se não estiver em cache)
+
+    Args:
+        stock_id: ID da ação (UUID)
+
+    Returns:
+        {"id": ..., "ticker": ..., "company_name": ...} ou None se não existir
+    """
+    if not stock_id:
+        return None
+
+    with _lock:
+        stock = _by_id.get(stock_id)
+    if stock is not None:
+        return stock
+
+    fetched = _fetch_stocks('id', [stock_id])
+    return fetched[0] if fetched else None
+
+
+def get_stock_id(ticker: str) -> Optional[str]:
+    """Atalho: retorna apenas o stock_id do ticker (ou None)"""
+    stock = get_stock_by_ticker(ticker)
+    return stock['id'] if stock else None
+
+
+def get_ticker(stock_id: str) -> Optional[str]:
+    """Atalho: retorna apenas o ticker do stock_id (ou None)"""
+    stock = get_stock_by_id(stock_id)
+    return stock['ticker'] if stock else None
+
+
+def invalidate_stock_cache(ticker: Optional[str] = None, stock_id: Optional[str] = None) -> None:
+    """
+    Invalida entradas do cache
+
+    Sem argumentos, limpa o cache inteiro (a próxima consulta de cada
+    ticker volta ao banco). Use após inserir, renomear ou remover ações.
+
+    Args:
+        ticker: Remove apenas este ticker
+        stock_id: Remove apenas este stock_id
+    """
+    global _by_ticker, _by_id, _loaded
+
+    with _lock:
+        if ticker is None and stock_id is None:
+            _by_ticker = {}
+            _by_id = {}
+            _loaded = False
+            db_negative_cache.clear()
+            print("[INFO] Cache de stocks invalidado")
+            return
+
+        if ticker is not None:
+            db_negative_cache.forget(_normalize_ticker(ticker))
+
+        entries = []
+        if ticker is not None and _normalize_ticker(ticker) in _by_ticker:
+            entries.append(_by_ticker[_normalize_ticker(ticker)])
+        if stock_id is not None and stock_id in _by_id:
+            entries.append(_by_id[stock_id])
+
+        for entry in entries:
+            _by_ticker.pop(entry['ticker'], None)
+            _by_id.pop(entry['id'], None)
+
+
+def get_stock_cache_stats() -> Dict[str, any]:
+    """Retorna informações do cache (para diagnóstico)"""
+    with _lock:
+        return {
+            "loaded": _loaded,
+            "size": len(_by_id),
+            "refresh_seconds": STOCK_CACHE_REFRESH_SECONDS,
+            "background_refresh": _refresh_thread is not None and _refresh_thread.is_alive()
+        }
+
+
+def start_stock_cache_refresh(interval_seconds: int = STOCK_CACHE_REFRESH_SECONDS) -> None:
+    """
+    Inicia (uma única vez) a thread que recarrega o cache periodicamente
+
+    Args:
+        interval_seconds: Intervalo entre recargas (0 desativa)
+    """
+    global _refresh_thread
+
+    if interval_seconds <= 0:
+        return
+
+    with _lock:
+        if _refresh_thread is not None and _refresh_thread.is_alive():
+            return
+
+        _refresh_stop.clear()
+
+        def _refresh_loop():
+            while not _refresh_stop.wait(interval_seconds):
+                load_stock_cache()
+
+        _refresh_thread = threading.Thread(target=_refresh_loop, name='stock-cache-refresh', daemon=True)
+        _refresh_thread.start()
+
+
+def stop_stock_cache_refresh() -> None:
+    """Interrompe a recarga em segundo plano (útil em testes)"""
+    _refresh_stop.set()
+
+
+def warm_up_stock_cache() -> None:
+    """
+    Carrega o cache e inicia a recarga em segundo plano (chamado em create_app)
+
+    Falhas não impedem a aplicação de subir: sem cache, as consultas
+    caem no banco e preenchem o cache sob demanda.
+    """
+    load_stock_cache()
+    start_stock_cache_refresh()
@@ -0,0 +1,157 @@
+"""
+Cache de leitura (read-through) da visualização de ações
+Guarda a resposta de update_stock_on_page_view por (ticker, range) em dois níveis:
+1. LRU com TTL em memória (por processo)
+2. Cache compartilhado opcional com interface Redis (entre processos)
+"""
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from utils.cache import TTLCache, get_shared_cache_client
+
+# Tempo de vida máximo (segundos) de uma entrada; nunca passa da meia-noite
+VIEW_CACHE_TTL_SECONDS = int(os.getenv('VIEW_CACHE_TTL_SECONDS', '43200'))
+VIEW_CACHE_MAX_SIZE = int(os.getenv('VIEW_CACHE_MAX_SIZE', '512'))
+
+# Com cache compartilhado, o nível local vive pouco: invalidações feitas por
+# outro processo só apagam o nível compartilhado, então isto limita o atraso
+VIEW_CACHE_LOCAL_TTL_SECONDS = int(os.getenv('VIEW_CACHE_LOCAL_TTL_SECONDS', '60'))
+
+# Ranges aceitos por /stocks/<ticker>/view (usados para invalidar todas as chaves do ticker)
+VIEW_RANGES = ("7d", "1m", "3m")
+
+_SHARED_KEY_PREFIX = "fintracker:view"
+
+_local_cache = TTLCache(max_size=VIEW_CACHE_MAX_SIZE, default_ttl=VIEW_CACHE_TTL_SECONDS)
+_shared_cache = get_shared_cache_client()
+
+
+def _normalize_key(ticker: str, range_param: str):
+    return (str(ticker).upper().strip(), str(range_param).lower().strip())
+
+
+def _shared_key(ticker: str, range_param: str) -> str:
+    return f"{_SHARED_KEY_PREFIX}:{ticker}:{range_param}"
+
+
+def _seconds_until_midnight() -> int:
+    """Entradas expiram na virada do dia, quando um novo pregão pode tornar o cache antigo"""
+    now = datetime.now()
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+    return max(1, int((midnight - now).total_seconds()))
+
+
+def _local_ttl(ttl: int) -> int:
+    return min(ttl, VIEW_CACHE_LOCAL_TTL_SECONDS) if _shared_cache is not None else ttl
+
+
+def set_shared_cache(client) -> None:
+    """
+    Define o cliente do cache compartilhado (ex: FakeRedis em testes, None para desativar)
+    """
+    global _shared_cache
+    _shared_cache = client
+
+
+def get_cached_view(ticker: str, range_param: str) -> Optional[Dict[str, any]]:
+    """
+    Busca a visualização em cache (memória local primeiro, depois compartilhado)
+
+    Args:
+        ticker: Código da ação
+        range_param: Período ("7d", "1m" ou "3m")
+
+    Returns:
+        Dicionário "data" de update_stock_on_page_view ou None se não houver cache
+    """
+    key = _normalize_key(ticker, range_param)
+
+    data = _local_cache.get(key)
+    if data is not None:
+        print(f"[CACHE] Visualização de {key[0]} ({key[1]}) encontrada em memória")
+        return data
+
+    if _shared_cache is None:
+        return None
+
+    try:
+        raw = _shared_cache.get(_shared_key(*key))
+        if raw is None:
+            return None
+
+        data = json.loads(raw)
+        # Promove para o nível local
+        _local_cache.set(key, data, ttl=_local_ttl(min(VIEW_CACHE_TTL_SECONDS, _seconds_until_midnight())))
+        print(f"[CACHE] Visualização de {key[0]} ({key[1]}) encontrada no cache compartilhado")
+        return data
+
+    except Exception as e:
+        print(f"[AVISO] Erro ao ler cache compartilhado: {str(e)}")
+        return None
+
+
+def set_cached_view(ticker: str, range_param: str, data: Dict[str, any]) -> None:
+    """
+    Armazena a visualização nos dois níveis de cache
+
+    Args:
+        ticker: Código da ação
+        range_param: Período ("7d", "1m" ou "3m")
+        data: Dicionário "data" retornado por update_stock_on_page_view
+    """
+    key = _normalize_key(ticker, range_param)
+    ttl = min(VIEW_CACHE_TTL_SECONDS, _seconds_until_midnight())
+
+    _local_cache.set(key, data, ttl=_local_ttl(ttl))
+
+    if _shared_cache is None:
+        return
+
+    try:
+        _shared_cache.set(_shared_key(*key), json.dumps(data), ex=ttl)
+    except Exception as e:
+        print(f"[AVISO] Erro ao gravar cache compartilhado: {str(e)}")
+
+
+def invalidate_stock_view(ticker: Optional[str] = None, stock_id: Optional[str] = None) -> None:
+    """
+    Remove do cache todas as visualizações (todos os ranges) de uma ação
+
+    Chamado por save_prices e save_dividends sempre que dados novos são gravados.
+
+    Args:
+        ticker: Código da ação
+        stock_id: ID da ação (resolvido para ticker pelo cache de stocks)
+    """
+    if ticker is None and stock_id is not None:
+        from services.stock_cache_service import get_ticker
+        ticker = get_ticker(stock_id)
+
+    if not ticker:
+        return
+
+    ticker = str(ticker).upper().strip()
+    for range_param in VIEW_RANGES:
+        _local_cache.delete((ticker, range_param))
+
+    if _shared_cache is None:
+        return
+
+    try:
+        _shared_cache.delete(*[_shared_key(ticker, range_param) for range_param in VIEW_RANGES])
+    except Exception as e:
+        print(f"[AVISO] Erro ao invalidar cache compartilhado: {str(e)}")
+
+
+def clear_view_cache() -> None:
+    """Limpa o nível local do cache (o compartilhado expira pelo TTL)"""
+    _local_cache.clear()
+
+
+def get_view_cache_stats() -> Dict[str, any]:
+    """Retorna estatísticas do cache (para diagnóstico)"""
+    stats = _local_cache.stats()
+    stats["shared_cache"] = _shared_cache is not None
+    return stats
@@ -0,0 +1,214 @@
+"""
+Calendário de pregões da B3
+Tabela pré-calculada de feriados, sessões especiais e horário de negociação,
+com consultas O(1) de "último pregão", "próximo pregão" e "mercado aberto"
+"""
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Tuple
+
+# HORÁRIO DO MERCADO BRASILEIRO (B3):
+# - Abertura: 10h00
+# - Fechamento: 17h00 (after-hours até 17h30)
+# - Consideramos fechado após 18h00 para segurança
+SESSION_OPEN = time(10, 0)
+SESSION_CLOSE = time(18, 0)
+
+# Anos cobertos pela tabela pré-calculada (fora dela, o cálculo é feito dia a dia)
+CALENDAR_FIRST_YEAR = 2000
+CALENDAR_LAST_YEAR = 2050
+
+
+def _easter(year: int) -> date:
+    """Domingo de Páscoa (algoritmo de Meeus/Jones/Butcher)"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _b3_holidays(year: int) -> Dict[date, str]:
+    """
+    Dias sem pregão na B3 em um ano (além de sábados e domingos)
+
+    Desde 2022 a B3 negocia nos feriados municipais/estaduais de São Paulo
+    (25/01, 09/07 e 20/11); em 2024 o 20/11 virou feriado nacional.
+    """
+    easter = _easter(year)
+    holidays = {
+        date(year, 1, 1): "Confraternização Universal",
+        easter - timedelta(days=48): "Carnaval",
+        easter - timedelta(days=47): "Carnaval",
+        easter - timedelta(days=2): "Sexta-feira Santa",
+        date(year, 4, 21): "Tiradentes",
+        date(year, 5, 1): "Dia do Trabalho",
+        easter + timedelta(days=60): "Corpus Christi",
+        date(year, 9, 7): "Independência do Brasil",
+        date(year, 10, 12): "Nossa Senhora Aparecida",
+        date(year, 11, 2): "Finados",
+        date(year, 11, 15): "Proclamação da República",
+        date(year, 12, 24): "Véspera de Natal",
+        date(year, 12, 25): "Natal",
+        date(year, 12, 31): "Último dia do ano",
+    }
+
+    if year < 2022:
+        holidays[date(year, 1, 25)] = "Aniversário de São Paulo"
+        holidays[date(year, 7, 9)] = "Revolução Constitucionalista"
+    if year < 2022 or year >= 2024:
+        holidays[date(year, 11, 20)] = "Dia da Consciência Negra"
+
+    return holidays
+
+
+def _special_sessions(year: int) -> Dict[date, Tuple[time, time]]:
+    """Pregões com horário diferente: Quarta-feira de Cinzas abre às 13h"""
+    return {
+        _easter(year) - timedelta(days=46): (time(13, 0), SESSION_CLOSE),
+    }
+
+
+def _build_tables():
+    holidays: Dict[date, str] = {}
+    special: Dict[date, Tuple[time, time]] = {}
+    for year in range(CALENDAR_FIRST_YEAR, CALENDAR_LAST_YEAR + 1):
+        holidays.update(_b3_holidays(year))
+        special.update(_special_sessions(year))
+
+    # Para cada dia corrido: índice do último pregão em ou antes dele
+    sessions: List[date] = []
+    last_index: Dict[date, int] = {}
+    day = date(CALENDAR_FIRST_YEAR, 1, 1)
+    end = date(CALENDAR_LAST_YEAR, 12, 31)
+    while day <= end:
+        if day.weekday() < 5 and day not in holidays:
+            sessions.append(day)
+        last_index[day] = len(sessions) - 1
+        day += timedelta(days=1)
+
+    return holidays, special, sessions, last_index
+
+
+_HOLIDAYS, _SPECIAL_SESSIONS, _SESSIONS, _LAST_SESSION_INDEX = _build_tables()
+
+
+def _in_table(day: date) -> bool:
+    return day in _LAST_SESSION_INDEX and _LAST_SESSION_INDEX[day] >= 0
+
+
+def holiday_name(day: date) -> Optional[str]:
+    """Nome do feriado da B3 na data, ou None"""
+    return _HOLIDAYS.get(day) or (_b3_holidays(day.year).get(day) if not _in_table(day) else None)
+
+
+def is_trading_day(day: date) -> bool:
+    """
+    Verifica se há pregão na data
+
+    Example:
+        >>> is_trading_day(date(2024, 2, 12))  # Carnaval
+        False
+    """
+    return day.weekday() < 5 and holiday_name(day) is None
+
+
+def last_session(day: date) -> date:
+    """
+    Último pregão em ou antes da data
+
+    Example:
+        >>> last_session(date(2024, 2, 13))  # terça de Carnaval
+        datetime.date(2024, 2, 9)
+        >>> last_session(date(2024, 3, 31))  # domingo de Páscoa
+        datetime.date(2024, 3, 28)
+    """
+    if _in_table(day):
+        return _SESSIONS[_LAST_SESSION_INDEX[day]]
+
+    while not is_trading_day(day):
+        day -= timedelta(days=1)
+    return day
+
+
+def previous_session(day: date) -> date:
+    """Último pregão estritamente antes da data"""
+    return last_session(day - timedelta(days=1))
+
+
+def next_session(day: date) -> date:
+    """
+    Próximo pregão estritamente depois da data
+
+    Example:
+        >>> next_session(date(2024, 12, 23))  # 24, 25 sem pregão
+        datetime.date(2024, 12, 26)
+    """
+    if _in_table(day):
+        index = _LAST_SESSION_INDEX[day] + 1
+        if index < len(_SESSIONS):
+            return _SESSIONS[index]
+
+    day += timedelta(days=1)
+    while not is_trading_day(day):
+        day += timedelta(days=1)
+    return day
+
+
+def sessions_between(start: date, end: date) -> int:
+    """
+    Quantidade de pregões em (start, end] - quantos pregões aconteceram depois de start
+
+    Example:
+        >>> sessions_between(date(2024, 2, 9), date(2024, 2, 14))  # sexta -> quarta de cinzas
+        1
+    """
+    if end <= start:
+        return 0
+    if _in_table(start) and _in_table(end):
+        return _LAST_SESSION_INDEX[end] - _LAST_SESSION_INDEX[start]
+
+    count = 0
+    day = start + timedelta(days=1)
+    while day <= end:
+        if is_trading_day(day):
+            count += 1
+        day += timedelta(days=1)
+    return count
+
+
+def session_hours(day: date) -> Optional[Tuple[time, time]]:
+    """Horário (abertura, fechamento) do pregão na data, ou None se não há pregão"""
+    if not is_trading_day(day):
+        return None
+    return _SPECIAL_SESSIONS.get(day, (SESSION_OPEN, SESSION_CLOSE))
+
+
+def is_market_open(now: Optional[datetime] = None) -> bool:
+    """
+    Verifica se o pregão da B3 está em andamento
+
+    Args:
+        now: Data/hora a verificar (padrão: agora)
+
+    Example:
+        >>> is_market_open(datetime(2024, 10, 28, 14, 0))
+        True
+    """
+    now = now or datetime.now()
+    hours = session_hours(now.date())
+    if hours is None:
+        return False
+    return hours[0] <= now.time() < hours[1]
+
+
+def is_after_close(now: Optional[datetime] = None) -> bool:
+    """True se hoje houve pregão e ele já terminou"""
+    now = now or datetime.now()
+    hours = session_hours(now.date())
+    return hours is not None and now.time() >= hours[1]
@@ -1,13 +1,32 @@
 """
 Serviço para gerenciamento de transações de compra e venda.
 """
-from datetime import datetime
+import os
+from datetime import datetime, timedelta
 
 from config.supabase_config import get_supabase_admin_client
+from services.group_portfolio_service import invalidate_member_portfolios
+from services.position_service import on_transaction_created, on_transactions_changed
+from services.price_cache_service import get_latest_prices_bulk
+from services.stock_cache_service import get_stock_by_id, get_stock_by_ticker
+from utils.pagination import decode_cursor, encode_cursor, keyset_after_filter
 
 
 VALID_TRANSACTION_TYPES = {"buy", "sell"}
 
+# Paginação de list_transactions (keyset em date, created_at, id)
+TRANSACTIONS_PAGE_SIZE = int(os.getenv('TRANSACTIONS_PAGE_SIZE', '500'))
+TRANSACTIONS_MAX_PAGE_SIZE = int(os.getenv('TRANSACTIONS_MAX_PAGE_SIZE', '500'))
+
+# Chave de ordenação/cursor de list_transactions (decrescente)
+TRANSACTIONS_CURSOR_KEYS = ('date', 'created_at', 'id')
+
+# Campos que podem ser pedidos em list_transactions(fields=...)
+TRANSACTION_FIELDS = (
+    'id', 'stock_id', 'ticker', 'company_name', 'type', 'price',
+    'quantity', 'total', 'date', 'created_at', 'updated_at'
+)
+
 
 def _normalize_transaction_type(raw_type):
     """Mapeia valores do frontend para o padrão da base."""
@@ -23,29 +42,12 @@ def _normalize_transaction_type(raw_type):
 
 
 def _resolve_stock_id(supabase, stock_id=None, ticker=None):
-    """Resolve stock_id a partir de stock_id informado ou ticker."""
+    """Resolve stock_id a partir de stock_id informado ou ticker (cache em memória)."""
     if stock_id:
-        response = supabase.table('stocks')\
-            .select('id, ticker, company_name')\
-            .eq('id', stock_id)\
-            .limit(1)\
-            .execute()
-
-        if response.data and len(response.data) > 0:
-            return response.data[0]
-
-        return None
+        return get_stock_by_id(stock_id)
 
     if ticker:
-        clean_ticker = str(ticker).strip().upper()
-        response = supabase.table('stocks')\
-            .select('id, ticker, company_name')\
-            .eq('ticker', clean_ticker)\
-            .limit(1)\
-            .execute()
-
-        if response.data and len(response.data) > 0:
-            return response.data[0]
+        return get_stock_by_ticker(ticker)
 
     return None
 
@@ -142,6 +144,9 @@ def create_transaction(user_id, payload):
             }
 
         created = response.data[0]
+        on_transaction_created(user_id, created)
+        invalidate_member_portfolios(user_id)
+
         # After creating transaction, ensure we have a recent price in cache
         try:
             from services.portfolio_service import ensure_current_stock_price
@@ -160,17 +165,8 @@ def create_transaction(user_id, payload):
             print(f"[WARN] Não foi possível garantir preço após criação de transação: {str(e)}")
 
         # Try to include the most recent cached price in the response
-        try:
-            price_resp = supabase.table('stock_prices')\
-                .select('price')\
-                .eq('stock_id', stock['id'])\
-                .order('date', desc=True)\
-                .limit(1)\
-                .execute()
-
-            current_price = float(price_resp.data[0]['price']) if price_resp.data and len(price_resp.data) > 0 else None
-        except Exception:
-            current_price = None
+        latest_price = get_latest_prices_bulk([stock['id']], supabase=supabase).get(stock['id'])
+        current_price = latest_price['price'] if latest_price else None
 
         current_total = None
         try:
@@ -211,42 +207,133 @@ def create_transaction(user_id, payload):
         }
 
 
-def list_transactions(user_id, stock_id=None):
-    """Lista transações do usuário ordenadas por data decrescente."""
+def _parse_filter_date(raw_date, field_name):
     try:
+        return datetime.strptime(str(raw_date).strip(), '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f"{field_name} inválida (use YYYY-MM-DD)")
+
+
+def _parse_fields(fields):
+    if not fields:
+        return list(TRANSACTION_FIELDS)
+    requested = [field.strip() for field in str(fields).split(',') if field.strip()]
+    unknown = [field for field in requested if field not in TRANSACTION_FIELDS]
+    if unknown:
+        raise ValueError(f"fields inválido: {', '.join(unknown)}")
+    return requested
+
+
+def list_transactions(
+    user_id,
+    stock_id=None,
+    limit=None,
+    cursor=None,
+    date_from=None,
+    date_to=None,
+    ticker=None,
+    fields=None
+):
+    """
+    Lista transações do usuário ordenadas por data decrescente.
+
+    Paginação por keyset em (date, created_at, id): cada página devolve
+    next_cursor, que deve ser enviado como cursor para buscar a seguinte.
+    Sem limit e sem cursor, devolve o histórico completo; com cursor e sem
+    limit, a página tem TRANSACTIONS_PAGE_SIZE itens.
+
+    Args:
+        user_id: ID do usuário
+        stock_id / ticker: Filtra por ação
+        limit: Tamanho da página (máximo TRANSACTIONS_MAX_PAGE_SIZE)
+        cursor: next_cursor da página anterior
+        date_from / date_to: Período (YYYY-MM-DD, inclusive)
+        fields: Campos do retorno separados por vírgula (ex: "id,ticker,type,quantity")
+
+    Returns:
+        {"success": True, "data": [...], "next_cursor": str | None, "has_more": bool}
+    """
+    try:
+        requested_fields = _parse_fields(fields)
+        page_size = None
+        if limit is None and cursor:
+            limit = TRANSACTIONS_PAGE_SIZE
+        if limit is not None:
+            page_size = _parse_positive_int(limit, 'limit')
+            page_size = min(page_size, TRANSACTIONS_MAX_PAGE_SIZE)
+
+        if ticker and not stock_id:
+            stock = get_stock_by_ticker(ticker)
+            if not stock:
+                return {
+                    "success": True,
+                    "data": [],
+                    "next_cursor": None,
+                    "has_more": False
+                }
+            stock_id = stock['id']
+
+        # Colunas da projeção + as da chave do cursor; o join com stocks só quando pedido
+        columns = [field for field in requested_fields if field not in ('ticker', 'company_name')]
+        columns += [key for key in ('id', 'date', 'created_at') if key not in columns]
+        stock_columns = [field for field in ('ticker', 'company_name') if field in requested_fields]
+        if stock_columns:
+            columns.append(f"stocks({', '.join(stock_columns)})")
+
         supabase = get_supabase_admin_client()
 
         query = supabase.table('transactions')\
-            .select('id, user_id, stock_id, type, price, quantity, total, date, created_at, updated_at, stocks(ticker, company_name)')\
+            .select(', '.join(columns))\
             .eq('user_id', user_id)
 
         if stock_id:
             query = query.eq('stock_id', stock_id)
 
-        response = query.order('date', desc=True)\
+        if date_from:
+            query = query.gte('date', _parse_filter_date(date_from, 'date_from').isoformat())
+
+        if date_to:
+            next_day = _parse_filter_date(date_to, 'date_to') + timedelta(days=1)
+            query = query.lt('date', next_day.isoformat())
+
+        if cursor:
+            # (date, created_at, id) < cursor, na ordem decrescente
+            values = decode_cursor(cursor, len(TRANSACTIONS_CURSOR_KEYS))
+            query = query.or_(keyset_after_filter(TRANSACTIONS_CURSOR_KEYS, values))
+
+        query = query.order('date', desc=True)\
             .order('created_at', desc=True)\
-            .execute()
+            .order('id', desc=True)
+
+        if page_size is not None:
+            # Um item a mais indica se existe próxima página
+            query = query.limit(page_size + 1)
+
+        response = query.execute()
+        rows = response.data or []
+
+        has_more = page_size is not None and len(rows) > page_size
+        if has_more:
+            rows = rows[:page_size]
 
         items = []
-        for tx in response.data or []:
+        for tx in rows:
             stock = tx.get('stocks') or {}
-            items.append({
-                'id': tx.get('id'),
-                'stock_id': tx.get('stock_id'),
-                'ticker': stock.get('ticker'),
-                'company_name': stock.get('company_name'),
-                'type': tx.get('type'),
-                'price': tx.get('price'),
-                'quantity': tx.get('quantity'),
-                'total': tx.get('total'),
-                'date': tx.get('date'),
-                'created_at': tx.get('created_at'),
-                'updated_at': tx.get('updated_at')
-            })
+            item = {field: tx.get(field) for field in requested_fields if field not in ('ticker', 'company_name')}
+            for field in stock_columns:
+                item[field] = stock.get(field)
+            items.append({field: item.get(field) for field in requested_fields})
 
         return {
             "success": True,
-            "data": items
+            "data": items,
+            "next_cursor": encode_cursor(rows[-1], TRANSACTIONS_CURSOR_KEYS) if has_more else None,
+            "has_more": has_more
+        }
+    except ValueError as error:
+        return {
+            "success": False,
+            "message": str(error)
         }
     except Exception as error:
         return {
@@ -334,13 +421,10 @@ def update_transaction(user_id, transaction_id, payload):
 
         updated = response.data[0]
         stock_id = updated.get('stock_id', existing.get('stock_id'))
+        on_transactions_changed(user_id, [existing.get('stock_id'), stock_id])
+        invalidate_member_portfolios(user_id)
 
-        stock_response = supabase.table('stocks')\
-            .select('ticker, company_name')\
-            .eq('id', stock_id)\
-            .limit(1)\
-            .execute()
-        stock = stock_response.data[0] if stock_response.data else {}
+        stock = get_stock_by_id(stock_id) or {}
 
         return {
             "success": True,
@@ -377,7 +461,7 @@ def delete_transaction(user_id, transaction_id):
         supabase = get_supabase_admin_client()
 
         existing_response = supabase.table('transactions')\
-            .select('id')\
+            .select('id, stock_id')\
             .eq('id', transaction_id)\
             .eq('user_id', user_id)\
             .limit(1)\
@@ -395,6 +479,9 @@ def delete_transaction(user_id, transaction_id):
             .eq('user_id', user_id)\
             .execute()
 
+        on_transactions_changed(user_id, [existing_response.data[0].get('stock_id')])
+        invalidate_member_portfolios(user_id)
+
         return {
             "success": True,
             "message": "Transação removida com sucesso"
@@ -2,41 +2,37 @@
 Serviço de detecção de atualização de dados
 Implementa lógica para verificar quando dados precisam ser atualizados
 """
-from datetime import datetime, timedelta, date
+from datetime import datetime, date
 from typing import Optional
 
+from services.trading_calendar_service import last_session, holiday_name, sessions_between
+
+# Pregões sem novo dividendo em cache antes de consultar o Yahoo de novo (~1 semana)
+DIVIDEND_STALE_SESSIONS = 5
+
 
 def get_last_trading_day() -> date:
     """
-    Retorna o último dia útil (considera fins de semana)
+    Retorna o último dia de pregão da B3 (considera fins de semana e feriados)
     
     Returns:
-        Data do último dia útil (date object)
+        Data do último pregão (date object) - hoje, se hoje há pregão
         
     Example:
         >>> last_day = get_last_trading_day()
-        >>> print(f"Último dia útil: {last_day}")
+        >>> print(f"Último pregão: {last_day}")
     """
     today = datetime.now().date()
-    weekday = today.weekday()
+    last_trading_day = last_session(today)
     
-    # weekday: 0=Segunda, 1=Terça, 2=Quarta, 3=Quinta, 4=Sexta, 5=Sábado, 6=Domingo
+    if last_trading_day == today:
+        print(f"[INFO] Hoje é dia de pregão: {today}")
+    elif today.weekday() >= 5:
+        print(f"[INFO] Hoje é fim de semana, último pregão: {last_trading_day}")
+    else:
+        print(f"[INFO] Hoje é feriado na B3 ({holiday_name(today)}), último pregão: {last_trading_day}")
     
-    if weekday == 5:  # Sábado
-        # Retorna sexta-feira (1 dia atrás)
-        last_trading_day = today - timedelta(days=1)
-        print(f"[INFO] Hoje é sábado, último pregão: {last_trading_day} (sexta)")
-        return last_trading_day
-        
-    elif weekday == 6:  # Domingo
-        # Retorna sexta-feira (2 dias atrás)
-        last_trading_day = today - timedelta(days=2)
-        print(f"[INFO] Hoje é domingo, último pregão: {last_trading_day} (sexta)")
-        return last_trading_day
-        
-    else:  # Dia útil (segunda a sexta)
-        print(f"[INFO] Hoje é dia útil: {today}")
-        return today
+    return last_trading_day
 
 
 def should_update_prices(last_price_date: Optional[date], range_days: int) -> bool:
@@ -66,22 +62,9 @@ def should_update_prices(last_price_date: Optional[date], range_days: int) -> bo
             print(f"[ERRO] Tipo de data inválido: {type(last_price_date)}")
             return True
         
-        # Obtém o último dia de pregão (considera fins de semana)
+        # Obtém o último dia de pregão (considera fins de semana e feriados da B3)
         last_trading_day = get_last_trading_day()
         
-        # Obtém data e hora atual
-        now = datetime.now()
-        today = now.date()
-        
-        # HORÁRIO DO MERCADO BRASILEIRO (B3):
-        # - Abertura: 10h00
-        # - Fechamento: 17h00 (after-hours até 17h30)
-        # - Consideramos fechado após 18h00 para segurança
-        
-        # Define horário de fechamento do mercado (18h00)
-        market_close_hour = 18
-        market_close_minute = 0
-        
         # Verifica se os dados estão atualizados até o último pregão
         if last_price_date < last_trading_day:
             days_missing = (last_trading_day - last_price_date).days
@@ -135,17 +118,18 @@ def should_update_dividends(last_dividend_date: Optional[date], has_dividends: b
         # Obtém a data atual
         today = datetime.now().date()
         
-        # Calcula quantos dias se passaram desde o último dividendo
-        days_since_last = (today - last_dividend_date).days
+        # Conta pregões (não dias corridos) desde o último dividendo: feriados
+        # e fins de semana não geram dividendos novos
+        sessions_since_last = sessions_between(last_dividend_date, today)
         
-        # Se passou mais de 7 dias, tenta atualizar
+        # Se passou mais de uma semana de pregões, tenta atualizar
         # (dividendos não são tão frequentes, mas verifica periodicamente)
-        if days_since_last > 7:
-            print(f"[INFO] Último dividendo há {days_since_last} dias - Precisa atualizar")
+        if sessions_since_last > DIVIDEND_STALE_SESSIONS:
+            print(f"[INFO] Último dividendo há {sessions_since_last} pregões - Precisa atualizar")
             return True
         
         # Cache está recente o suficiente
-        print(f"[INFO] Dividendos atualizados há {days_since_last} dia(s) - Não precisa atualizar")
+        print(f"[INFO] Dividendos atualizados há {sessions_since_last} pregão(ões) - Não precisa atualizar")
         return False
         
     except Exception as e:
@@ -2,14 +2,237 @@
 Serviço de dividendos de ações usando Yahoo Finance
 Busca histórico de dividendos de ações brasileiras
 """
+import os
+import tempfile
 import yfinance as yf
 from datetime import datetime
 from typing import List, Dict, Optional
+from utils.cache import DiskTTLCache, NegativeCache
+from utils.singleflight import SingleFlight
+
+# Coalesce buscas simultâneas de dividendos do mesmo ticker
+yahoo_flight = SingleFlight("yahoo")
+
+# Período baixado do Yahoo (precisa cobrir os últimos 12 dividendos)
+YAHOO_DIVIDEND_PERIOD = os.getenv('YAHOO_DIVIDEND_PERIOD', '5y')
+
+# Máximo de símbolos por chamada de yf.download
+YAHOO_BATCH_CHUNK_SIZE = int(os.getenv('YAHOO_BATCH_CHUNK_SIZE', '50'))
+
+# Cache em disco das respostas do Yahoo (sobrevive a reinícios)
+YAHOO_CACHE_DIR = os.getenv('YAHOO_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'fintracker_yahoo'))
+YAHOO_CACHE_TTL_SECONDS = int(os.getenv('YAHOO_CACHE_TTL_SECONDS', '21600'))
+
+yahoo_disk_cache = DiskTTLCache(YAHOO_CACHE_DIR, ttl=YAHOO_CACHE_TTL_SECONDS)
+
+# Símbolos sem cotações no Yahoo não são baixados de novo por um tempo
+NEGATIVE_CACHE_YAHOO_TTL_SECONDS = int(os.getenv('NEGATIVE_CACHE_YAHOO_TTL_SECONDS', '300'))
+
+yahoo_negative_cache = NegativeCache("yahoo", ttl=NEGATIVE_CACHE_YAHOO_TTL_SECONDS)
+
+_MISSING = object()
+
+# Trechos das mensagens de yf.download que indicam símbolo inexistente; outros
+# erros registrados (rede, limite de requisições) são falhas de download
+_NOT_FOUND_MARKERS = ('delisted', 'no timezone found', 'no data found', 'not found')
+
 
 def fetch_dividends_from_yahoo(ticker: str) -> Optional[List[Dict[str, any]]]:
     """
     Busca o histórico de dividendos de uma ação no Yahoo Finance
     
+    Chamadas simultâneas para o mesmo ticker são coalescidas: apenas uma
+    consulta ao Yahoo é feita e todos recebem o mesmo resultado.
+    
+    Args e retorno: ver _fetch_dividends_from_yahoo()
+    """
+    key = str(ticker).upper().strip().replace('.SA', '')
+    return yahoo_flight.do(key, lambda: _fetch_dividends_from_yahoo(ticker))
+
+
+def _to_yahoo_symbol(ticker: str) -> str:
+    """Formata o ticker para o Yahoo (maiúsculas, sufixo .SA para ações brasileiras)"""
+    ticker = str(ticker).upper().strip()
+    return ticker if ticker.endswith('.SA') else ticker + '.SA'
+
+
+def _symbol_frame(data, symbol: str, single: bool):
+    """Extrai as colunas de um símbolo do DataFrame retornado por yf.download"""
+    columns = getattr(data, 'columns', None)
+    if columns is None:
+        return None
+    if getattr(columns, 'nlevels', 1) > 1:
+        if symbol not in columns.get_level_values(0):
+            return None
+        return data[symbol]
+    return data if single else None
+
+
+def _raw_dividends(frame) -> Optional[List[List[any]]]:
+    """
+    Converte o DataFrame de um símbolo em [[data, valor], ...] (só dividendos > 0)
+    
+    Returns:
+        Lista (possivelmente vazia) ou None se o Yahoo não retornou cotações
+        (ticker inexistente)
+    """
+    if frame is None or 'Close' not in frame or frame['Close'].dropna().empty:
+        return None
+    
+    if 'Dividends' not in frame:
+        return []
+    
+    dividendos = frame['Dividends'].dropna()
+    dividendos = dividendos[dividendos > 0]
+    
+    raw = []
+    for data, valor in dividendos.items():
+        try:
+            raw.append([data.strftime('%Y-%m-%d'), float(valor)])
+        except (ValueError, TypeError, AttributeError) as e:
+            print(f"[AVISO] Erro ao processar dividendo: {str(e)}")
+    return raw
+
+
+def _format_dividends(raw: List[List[any]]) -> List[Dict[str, any]]:
+    """Últimos 12 dividendos no formato [{"payment_date": ..., "value": ...}]"""
+    return [{"payment_date": data, "value": valor} for data, valor in raw[-12:]]
+
+
+def _download_errors() -> Dict[str, str]:
+    """Erros por símbolo registrados pelo último yf.download ({} se indisponível)"""
+    errors = getattr(getattr(yf, 'shared', None), '_ERRORS', None)
+    if not isinstance(errors, dict):
+        return {}
+    return {str(symbol).upper(): str(error) for symbol, error in errors.items()}
+
+
+def _is_not_found_error(error: str) -> bool:
+    error = error.lower()
+    return any(marker in error for marker in _NOT_FOUND_MARKERS)
+
+
+def _download_dividends(symbols: List[str]) -> Dict[str, Optional[List[List[any]]]]:
+    """
+    Baixa cotações + eventos de vários símbolos em uma única chamada ao Yahoo
+    
+    Returns:
+        {symbol: [[data, valor], ...] ou None se o símbolo não existir}
+        Símbolos com erro de download (exceção, ou sem cotações por falha de
+        rede/limite do Yahoo) não aparecem no resultado
+    """
+    print(f"[INFO] Baixando dividendos do Yahoo em lote: {', '.join(symbols)}")
+    
+    try:
+        data = yf.download(
+            tickers=symbols,
+            period=YAHOO_DIVIDEND_PERIOD,
+            interval='1d',
+            actions=True,
+            group_by='ticker',
+            auto_adjust=False,
+            threads=True,
+            progress=False
+        )
+    except Exception as e:
+        print(f"[ERRO] Erro ao baixar dados do Yahoo Finance")
+        print(f"Detalhes: {str(e)}")
+        return {}
+    
+    errors = _download_errors()
+    
+    results = {}
+    for symbol in symbols:
+        try:
+            raw = _raw_dividends(_symbol_frame(data, symbol, single=len(symbols) == 1))
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"[AVISO] Erro ao processar dados de {symbol}: {str(e)}")
+            continue
+        
+        error = errors.get(symbol.upper())
+        if raw is None and error and not _is_not_found_error(error):
+            print(f"[AVISO] Falha ao baixar {symbol} do Yahoo: {error}")
+            continue
+        results[symbol] = raw
+    return results
+
+
+def fetch_dividends_batch(tickers: List[str], chunk_size: int = YAHOO_BATCH_CHUNK_SIZE) -> Dict[str, Optional[List[Dict[str, any]]]]:
+    """
+    Busca o histórico de dividendos de várias ações com downloads em lote
+    
+    Não consulta `Ticker.info` (lento): um símbolo sem cotações no período é
+    considerado inexistente. As respostas do Yahoo com dados ficam em cache em
+    disco por YAHOO_CACHE_TTL_SECONDS, então reinícios não refazem a busca.
+    
+    Args:
+        tickers: Lista de códigos (ex: ["PETR4", "VALE3"]), com ou sem ".SA"
+        chunk_size: Máximo de símbolos por chamada ao Yahoo
+    
+    Returns:
+        Dicionário {TICKER (sem .SA): dividendos}, onde dividendos é:
+        - lista com os últimos 12 [{"payment_date": "2024-03-30", "value": 1.25}, ...]
+        - [] se não houver dividendos ou ocorrer erro
+        - None se o ticker for inválido
+    
+    Example:
+        >>> result = fetch_dividends_batch(["PETR4", "VALE3"])
+        >>> result["PETR4"][-1]
+        {"payment_date": "2024-03-30", "value": 1.25}
+    """
+    symbols = []
+    for ticker in tickers:
+        symbol = _to_yahoo_symbol(ticker)
+        if symbol not in symbols:
+            symbols.append(symbol)
+    
+    raw_by_symbol = {}
+    to_download = []
+    for symbol in symbols:
+        if yahoo_negative_cache.is_negative(symbol):
+            raw_by_symbol[symbol] = None
+            continue
+        
+        cached = yahoo_disk_cache.get(symbol, _MISSING)
+        if cached is _MISSING:
+            to_download.append(symbol)
+        else:
+            raw_by_symbol[symbol] = cached
+    
+    if raw_by_symbol:
+        print(f"[CACHE] Dividendos de {len(raw_by_symbol)} ação(ões) lidos do cache em disco")
+    
+    chunk_size = max(1, int(chunk_size))
+    for i in range(0, len(to_download), chunk_size):
+        downloaded = _download_dividends(to_download[i:i + chunk_size])
+        for symbol, raw in downloaded.items():
+            # Falhas de download não chegam aqui (ficam fora de ambos os caches);
+            # símbolos sem cotações vão para o cache negativo, de TTL curto
+            if raw is not None:
+                yahoo_disk_cache.set(symbol, raw)
+            else:
+                yahoo_negative_cache.remember(symbol)
+            raw_by_symbol[symbol] = raw
+    
+    results = {}
+    for symbol in symbols:
+        ticker = symbol[:-len('.SA')]
+        raw = raw_by_symbol.get(symbol, _MISSING)
+        if raw is _MISSING:
+            results[ticker] = []
+        elif raw is None:
+            print(f"[ERRO] Ticker '{ticker}' não encontrado no Yahoo Finance")
+            results[ticker] = None
+        else:
+            results[ticker] = _format_dividends(raw)
+    
+    return results
+
+
+def _fetch_dividends_from_yahoo(ticker: str) -> Optional[List[Dict[str, any]]]:
+    """
+    Busca o histórico de dividendos de uma ação no Yahoo Finance (sem coalescência)
+    
     Args:
         ticker: Código da ação (ex: "PETR4", "VALE3")
                 O sufixo ".SA" é adicionado automaticamente se não estiver presente
@@ -30,93 +253,16 @@ def fetch_dividends_from_yahoo(ticker: str) -> Optional[List[Dict[str, any]]]:
         ...     for div in dividends:
         ...         print(f"{div['payment_date']}: R$ {div['value']:.2f}")
     """
+    ticker = str(ticker).upper().strip().replace('.SA', '')
+    print(f"[INFO] Buscando dividendos de {ticker}...")
     
-    try:
-        # Formata o ticker (sempre em maiúsculas e sem espaços)
-        ticker = ticker.upper().strip()
-        
-        # Adiciona ".SA" para ações brasileiras se não estiver presente
-        if not ticker.endswith('.SA'):
-            ticker_yahoo = ticker + '.SA'
-        else:
-            ticker_yahoo = ticker
-        
-        print(f"[INFO] Buscando dividendos de {ticker} (Yahoo: {ticker_yahoo})...")
-        
-        # Cria um objeto Ticker do yfinance
-        acao = yf.Ticker(ticker_yahoo)
-        
-        # Tenta obter informações básicas para validar se o ticker existe
-        try:
-            info = acao.info
-            if not info or 'symbol' not in info:
-                print(f"[ERRO] Ticker '{ticker}' não encontrado no Yahoo Finance")
-                return None
-        except Exception as e:
-            print(f"[ERRO] Ticker '{ticker}' inválido ou não encontrado")
-            print(f"Detalhes: {str(e)}")
-            return None
-        
-        # Obtém o histórico de dividendos
-        try:
-            dividendos = acao.dividends
-        except Exception as e:
-            print(f"[ERRO] Erro ao buscar dividendos de {ticker}")
-            print(f"Detalhes: {str(e)}")
-            return []
-        
-        # Verifica se há dividendos
-        if dividendos is None or dividendos.empty:
-            print(f"[AVISO] Nenhum dividendo encontrado para {ticker}")
-            return []
-        
-        # Filtra apenas dividendos com valor maior que 0
-        dividendos_validos = dividendos[dividendos > 0]
-        
-        if dividendos_validos.empty:
-            print(f"[AVISO] Nenhum dividendo com valor válido encontrado para {ticker}")
-            return []
-        
-        # Pega apenas os últimos 12 dividendos válidos
-        ultimos_12 = dividendos_validos.tail(12)
-        
-        # Formata os dados de dividendos
-        dividends_list = []
-        for data, valor in ultimos_12.items():
-            try:
-                # Converte a data para string no formato ISO (YYYY-MM-DD)
-                data_formatada = data.strftime('%Y-%m-%d')
-                valor_float = float(valor)
-                
-                dividends_list.append({
-                    "payment_date": data_formatada,
-                    "value": valor_float
-                })
-            except (ValueError, TypeError, AttributeError) as e:
-                print(f"[AVISO] Erro ao processar dividendo: {str(e)}")
-                continue
-        
-        if not dividends_list:
-            print(f"[AVISO] Nenhum dividendo processado com sucesso para {ticker}")
-            return []
-        
+    dividends_list = fetch_dividends_batch([ticker]).get(ticker, [])
+    
+    if dividends_list:
         print(f"[OK] Sucesso! {len(dividends_list)} dividendos encontrados para {ticker}")
-        return dividends_list
-        
-    except TypeError as e:
-        print(f"[ERRO] Erro de tipo ao buscar dados de {ticker}")
-        print(f"Detalhes: {str(e)}")
-        return []
-        
-    except KeyError as e:
-        print(f"[ERRO] Chave ausente nos dados de {ticker}")
-        print(f"Detalhes: {str(e)}")
-        return []
-        
-    except Exception as e:
-        print(f"[ERRO] Erro inesperado ao buscar dividendos de {ticker}")
-        print(f"Detalhes: {str(e)}")
-        return []
+    elif dividends_list is not None:
+        print(f"[AVISO] Nenhum dividendo encontrado para {ticker}")
+    return dividends_list
 
 
 def get_dividend_summary(ticker: str) -> Optional[Dict[str, any]]:
@@ -8,7 +8,7 @@ import os
 # Adiciona o diretório pai ao path para importar os módulos
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from services.brapi_price_service import fetch_prices_from_brapi, get_price_summary
+from services.brapi_price_service import fetch_prices_from_brapi, get_price_summary, select_range_for_gap
 
 
 def test_fetch_prices():
@@ -69,6 +69,21 @@ def test_invalid_ticker():
         return False
 
 
+def test_incremental_range_selection():
+    """Testa a escolha do range para a busca incremental (sem chamar a API)"""
+    print("\n" + "="*60)
+    print("TESTE 4: Escolher range para a janela faltante")
+    print("="*60)
+    
+    assert select_range_for_gap(1) == "1d"
+    assert select_range_for_gap(3) == "5d"
+    assert select_range_for_gap(20, max_range="3m") == "1mo"
+    assert select_range_for_gap(200, max_range="1m") == "1mo"
+    assert select_range_for_gap(10, max_range="7d") == "7d"
+    
+    print("\n✅ Teste passou! Range proporcional à janela faltante")
+    return True
+
 def main():
     """Executa todos os testes"""
     print("\n" + "="*60)
@@ -81,6 +96,7 @@ def main():
     results.append(("Buscar preços", test_fetch_prices()))
     results.append(("Obter resumo", test_get_summary()))
     results.append(("Ticker inválido", test_invalid_ticker()))
+    results.append(("Range incremental", test_incremental_range_selection()))
     
     # Resumo dos testes
     print("\n" + "="*60)
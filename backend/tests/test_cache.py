@@ -0,0 +1,101 @@
+"""
+Testes do cache LRU/TTL e do cache da visualização de ações
+Execute: python tests/test_cache.py
+"""
+import sys
+import os
+import tempfile
+import time
+
+# Adiciona o diretório pai ao path para importar os módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.cache import TTLCache, FakeRedis, DiskTTLCache, NegativeCache
+from services import stock_view_cache_service as view_cache
+
+
+def test_ttl_cache_expires():
+    """Itens expiram após o TTL"""
+    cache = TTLCache(max_size=10, default_ttl=0.1)
+    cache.set("PETR4", 30.5)
+
+    assert cache.get("PETR4") == 30.5
+    time.sleep(0.15)
+    assert cache.get("PETR4") is None
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    """Ao passar do limite, o item menos usado recentemente sai"""
+    cache = TTLCache(max_size=2, default_ttl=60)
+    cache.set("A", 1)
+    cache.set("B", 2)
+    cache.get("A")
+    cache.set("C", 3)
+
+    assert cache.get("A") == 1
+    assert cache.get("B") is None
+    assert cache.get("C") == 3
+
+
+def test_fake_redis_roundtrip():
+    """FakeRedis segue a interface get/set/delete do redis-py"""
+    client = FakeRedis()
+    client.set("chave", "valor", ex=60)
+
+    assert client.get("chave") == b"valor"
+    assert client.delete("chave", "inexistente") == 1
+    assert client.get("chave") is None
+
+
+def test_disk_cache_survives_new_instance_and_expires():
+    """Valores gravados em disco são lidos por outra instância até o TTL"""
+    with tempfile.TemporaryDirectory() as directory:
+        DiskTTLCache(directory, ttl=60).set("PETR4.SA", [["2024-03-30", 1.25]])
+
+        assert DiskTTLCache(directory, ttl=60).get("PETR4.SA") == [["2024-03-30", 1.25]]
+        assert DiskTTLCache(directory, ttl=-1).get("PETR4.SA") is None
+        assert DiskTTLCache(directory, ttl=60).get("VALE3.SA", "ausente") == "ausente"
+
+
+def test_negative_cache_counts_hits():
+    """Símbolos marcados como inexistentes retornam na hora e contam como acerto negativo"""
+    cache = NegativeCache("brapi", ttl=60)
+    cache.remember("XPTO3")
+
+    assert cache.is_negative("xpto3 ")
+    assert not cache.is_negative("PETR4")
+    assert cache.stats()["negative_hits"] == 1
+
+    cache.forget("XPTO3")
+    assert not cache.is_negative("XPTO3")
+
+
+def test_view_cache_two_tiers_and_invalidation():
+    """Visualização é lida do compartilhado após limpar o local e some ao invalidar"""
+    view_cache.set_shared_cache(FakeRedis())
+    view_cache.clear_view_cache()
+    try:
+        data = {"ticker": "PETR4", "prices": [{"date": "2024-01-15", "price": 28.5}], "dividends": []}
+        view_cache.set_cached_view("petr4", "3M", data)
+
+        assert view_cache.get_cached_view("PETR4", "3m") == data
+
+        # Simula outro processo: nível local vazio, compartilhado preenchido
+        view_cache.clear_view_cache()
+        assert view_cache.get_cached_view("PETR4", "3m") == data
+
+        view_cache.invalidate_stock_view(ticker="PETR4")
+        assert view_cache.get_cached_view("PETR4", "3m") is None
+    finally:
+        view_cache.set_shared_cache(None)
+        view_cache.clear_view_cache()
+
+
+if __name__ == "__main__":
+    test_ttl_cache_expires()
+    test_ttl_cache_evicts_least_recently_used()
+    test_fake_redis_roundtrip()
+    test_disk_cache_survives_new_instance_and_expires()
+    test_negative_cache_counts_hits()
+    test_view_cache_two_tiers_and_invalidation()
+    print("✅ Todos os testes passaram!")
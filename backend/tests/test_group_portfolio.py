@@ -0,0 +1,127 @@
+"""
+Testes da carteira agregada de grupos
+Execute: python tests/test_group_portfolio.py
+"""
+import sys
+import os
+
+# Adiciona o diretório pai ao path para importar os módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services import group_portfolio_service
+from services.group_portfolio_service import (
+    get_member_holdings,
+    invalidate_member_portfolios,
+    summarize_group_portfolio
+)
+
+
+def _holding(stock_id, ticker, quantity, average_cost):
+    return {
+        "stock_id": stock_id,
+        "ticker": ticker,
+        "company_name": ticker,
+        "quantity": quantity,
+        "average_cost": average_cost
+    }
+
+
+def test_member_and_group_totals():
+    """Totais por membro e do grupo; topHoldings soma a mesma ação entre membros"""
+    members = [{"userId": "ana", "name": "Ana"}, {"userId": "bia", "name": "Bia"}]
+    holdings = {
+        "ana": {"positions": [_holding("s-petr", "PETR4", 10, 20.0), _holding("s-vale", "VALE3", 2, 50.0)],
+                "realized_pnl": 15.0},
+        "bia": {"positions": [_holding("s-petr", "PETR4", 5, 30.0)], "realized_pnl": 0.0},
+    }
+    latest = {"s-petr": {"price": 25.0, "date": "2024-03-01"}, "s-vale": {"price": 60.0, "date": "2024-03-01"}}
+
+    result = summarize_group_portfolio(members, holdings, latest, top_holdings=1)
+
+    ana = result["members"][0]
+    assert ana["totals"]["totalValue"] == 370.0
+    assert ana["totals"]["costBasis"] == 300.0
+    assert ana["totals"]["unrealizedPnl"] == 70.0
+    assert ana["totals"]["realizedPnl"] == 15.0
+    assert ana["positions"][0]["ticker"] == "PETR4"
+
+    bia = result["members"][1]
+    assert bia["totals"]["unrealizedPnl"] == -25.0
+
+    totals = result["totals"]
+    assert totals["totalValue"] == 495.0
+    assert totals["unrealizedPnl"] == 45.0
+    assert totals["membersCount"] == 2
+    assert round(totals["returnPct"], 4) == round(45.0 / 450.0 * 100, 4)
+
+    assert len(result["topHoldings"]) == 1
+    top = result["topHoldings"][0]
+    assert top["ticker"] == "PETR4" and top["quantity"] == 15 and top["holders"] == 2
+    assert round(top["weightPct"], 4) == round(375.0 / 495.0 * 100, 4)
+
+
+def test_positions_without_price_stay_out_of_totals():
+    members = [{"userId": "ana", "name": "Ana"}]
+    holdings = {"ana": {"positions": [_holding("s-new", "NEW3", 4, 10.0)], "realized_pnl": 0.0}}
+
+    result = summarize_group_portfolio(members, holdings, {})
+
+    position = result["members"][0]["positions"][0]
+    assert position["marketValue"] is None and position["costBasis"] == 40.0
+    assert result["totals"]["totalValue"] == 0.0
+    assert result["totals"]["returnPct"] is None
+    assert result["topHoldings"][0]["weightPct"] is None
+
+
+def test_unknown_average_cost_stays_out_of_cost_totals():
+    """Ação sem posição/transação: conta no valor, mas não no custo nem no lucro"""
+    members = [{"userId": "ana", "name": "Ana"}]
+    holdings = {"ana": {"positions": [_holding("s-petr", "PETR4", 10, 20.0), _holding("s-vale", "VALE3", 2, None)],
+                        "realized_pnl": 0.0}}
+    latest = {"s-petr": {"price": 25.0, "date": "2024-03-01"}, "s-vale": {"price": 60.0, "date": "2024-03-01"}}
+
+    result = summarize_group_portfolio(members, holdings, latest)
+
+    vale = next(item for item in result["members"][0]["positions"] if item["ticker"] == "VALE3")
+    assert vale["averageCost"] is None and vale["costBasis"] is None and vale["unrealizedPnl"] is None
+    assert vale["marketValue"] == 120.0
+
+    totals = result["totals"]
+    assert totals["totalValue"] == 370.0
+    assert totals["costBasis"] == 200.0
+    assert totals["unrealizedPnl"] == 50.0
+    assert totals["returnPct"] == 25.0
+
+
+def test_cache_reused_until_member_transaction():
+    """O cache do grupo cobre subconjuntos; uma transação de um membro o invalida"""
+    loads = []
+
+    def fake_load(user_ids):
+        loads.append(list(user_ids))
+        return {user_id: {"positions": [], "realized_pnl": 0.0} for user_id in user_ids}
+
+    original = group_portfolio_service.load_member_holdings
+    group_portfolio_service.load_member_holdings = fake_load
+    try:
+        get_member_holdings("grupo-teste", ["ana", "bia"])
+        get_member_holdings("grupo-teste", ["ana"])
+        assert loads == [["ana", "bia"]]
+
+        get_member_holdings("grupo-teste", ["ana", "caio"])
+        assert len(loads) == 2
+
+        invalidate_member_portfolios("caio")
+        get_member_holdings("grupo-teste", ["ana"])
+        assert len(loads) == 3
+    finally:
+        group_portfolio_service.load_member_holdings = original
+        group_portfolio_service.invalidate_group_portfolio("grupo-teste")
+
+
+if __name__ == "__main__":
+    test_member_and_group_totals()
+    test_positions_without_price_stay_out_of_totals()
+    test_unknown_average_cost_stays_out_of_cost_totals()
+    test_cache_reused_until_member_transaction()
+    print("✅ Todos os testes passaram!")
@@ -0,0 +1,150 @@
+"""
+Testes do serviço de grupos com um cliente Supabase falso em memória
+Execute: python tests/test_group_service.py
+"""
+import sys
+import os
+from types import SimpleNamespace
+
+# Adiciona o diretório pai ao path para importar os módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services import group_service
+from utils.request_loader import request_scope
+
+
+class _FakeQuery:
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.filters = []
+        self.operation = 'select'
+        self.payload = None
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def insert(self, payload):
+        self.operation = 'insert'
+        self.payload = payload
+        return self
+
+    def delete(self):
+        self.operation = 'delete'
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def in_(self, column, values):
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def order(self, *args, **kwargs):
+        return self
+
+    def limit(self, count):
+        return self
+
+    def execute(self):
+        rows = self.client.tables.setdefault(self.table, [])
+        self.client.calls.append((self.table, self.operation))
+
+        if self.operation == 'insert':
+            row = {'id': f'{self.table}-{len(rows) + 1}', **self.payload}
+            rows.append(row)
+            return SimpleNamespace(data=[row], count=1)
+
+        matched = [row for row in rows if all(check(row) for check in self.filters)]
+        if self.operation == 'delete':
+            self.client.tables[self.table] = [row for row in rows if row not in matched]
+        return SimpleNamespace(data=matched, count=len(matched))
+
+
+class _FakeSupabase:
+    def __init__(self, tables=None):
+        self.tables = tables or {}
+        self.calls = []
+
+    def table(self, name):
+        return _FakeQuery(self, name)
+
+
+def _with_fake_client(tables=None):
+    client = _FakeSupabase(tables)
+    group_service.get_supabase_admin_client = lambda: client
+    return client
+
+
+def test_create_group_registers_founder():
+    """Criar grupo grava o grupo e o fundador e devolve o grupo serializado"""
+    client = _with_fake_client()
+
+    result = group_service.create_group('user-1', {
+        'name': 'Clube de Dividendos',
+        'visibility': 'publico',
+        'viewPermission': 'todos',
+        'managePermission': 'lideres',
+    })
+
+    assert result['success'], result
+    assert len(client.tables['groups']) == 1
+    founder = client.tables['group_members'][0]
+    assert founder['group_id'] == client.tables['groups'][0]['id']
+    assert founder['user_id'] == 'user-1' and founder['is_founder']
+    assert ('groups', 'delete') not in client.calls
+
+
+def test_direct_invite_batches_memberships_and_profiles():
+    """Vínculos e perfis do convidante e do convidado saem de uma consulta cada"""
+    client = _with_fake_client({
+        'groups': [{'id': 'g1', 'name': 'Grupo'}],
+        'group_members': [
+            {'id': 'm1', 'group_id': 'g1', 'user_id': 'ana', 'is_founder': True, 'is_leader': True,
+             'status': 'active'},
+        ],
+        'users': [{'id': 'ana', 'name': 'Ana'}, {'id': 'bia', 'name': 'Bia'}],
+        'group_invites': [],
+    })
+    group_service.create_notification = lambda **kwargs: None
+
+    with request_scope():
+        result = group_service.create_direct_invite('g1', 'ana', 'bia')
+
+    assert result['success'], result
+    assert client.calls.count(('group_members', 'select')) == 1
+    assert client.calls.count(('users', 'select')) == 1
+
+
+def test_member_wallet_not_modified_skips_loading():
+    """If-None-Match com a versão atual: nada de carteira nem transações"""
+    _with_fake_client({
+        'groups': [{'id': 'g1', 'name': 'Grupo', 'view_permission': 'todos'}],
+        'group_members': [
+            {'id': 'm1', 'group_id': 'g1', 'user_id': 'ana', 'status': 'active'},
+            {'id': 'm2', 'group_id': 'g1', 'user_id': 'bia', 'status': 'active'},
+        ],
+        'users': [{'id': 'bia', 'name': 'Bia'}],
+    })
+    loaded = []
+    group_service.get_wallet_version = lambda user_id: 'v1'
+    group_service.get_user_portfolio_full = lambda *args, **kwargs: loaded.append('portfolio') or []
+    group_service.list_transactions = lambda *args, **kwargs: loaded.append('transactions') or {'success': True}
+
+    result = group_service.get_member_wallet('g1', 'ana', 'bia', known_etags={'v1'})
+    assert result['success'] and result['not_modified'], result
+    assert result['data']['walletEtag'] == 'v1'
+    assert loaded == []
+
+    result = group_service.get_member_wallet('g1', 'ana', 'bia', known_etags={'v0'})
+    assert result['success'] and not result.get('not_modified'), result
+    assert result['data']['walletEtag'] == 'v1'
+    assert loaded == ['portfolio', 'transactions']
+
+
+if __name__ == "__main__":
+    test_create_group_registers_founder()
+    test_direct_invite_batches_memberships_and_profiles()
+    test_member_wallet_not_modified_skips_loading()
+    print("✅ Todos os testes passaram!")
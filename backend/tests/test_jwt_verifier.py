@@ -0,0 +1,79 @@
+"""
+Testes da verificação local de JWT (utils/jwt_verifier.py)
+Execute: python tests/test_jwt_verifier.py
+"""
+import sys
+import os
+import base64
+import hashlib
+import hmac
+import json
+import time
+
+# Adiciona o diretório pai ao path para importar os módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.jwt_verifier import InvalidTokenError, JwtVerifier
+
+SECRET = "segredo-de-teste"
+ISSUER = "https://projeto.supabase.co/auth/v1"
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode('ascii').rstrip('=')
+
+
+def _token(claims, secret=SECRET, alg="HS256"):
+    header = _b64(json.dumps({"alg": alg, "typ": "JWT"}).encode())
+    payload = _b64(json.dumps(claims).encode())
+    signature = hmac.new(secret.encode(), f"{header}.{payload}".encode(), hashlib.sha256).digest()
+    return f"{header}.{payload}.{_b64(signature)}"
+
+
+def _claims(**overrides):
+    claims = {
+        "sub": "uuid-user",
+        "email": "user@example.com",
+        "aud": "authenticated",
+        "iss": ISSUER,
+        "exp": int(time.time()) + 3600
+    }
+    claims.update(overrides)
+    return claims
+
+
+def _expect_invalid(verifier, token):
+    try:
+        verifier.verify(token)
+        assert False, "Deveria ter lançado InvalidTokenError"
+    except InvalidTokenError:
+        pass
+
+
+def test_valid_hs256_token():
+    verifier = JwtVerifier(hs_secret=SECRET, issuer=ISSUER)
+    claims = verifier.verify(_token(_claims()))
+    assert claims["sub"] == "uuid-user"
+    assert claims["email"] == "user@example.com"
+
+
+def test_rejects_bad_signature_expired_and_wrong_audience():
+    verifier = JwtVerifier(hs_secret=SECRET, issuer=ISSUER)
+    _expect_invalid(verifier, _token(_claims(), secret="outro-segredo"))
+    _expect_invalid(verifier, _token(_claims(exp=int(time.time()) - 60)))
+    _expect_invalid(verifier, _token(_claims(aud="anon")))
+    _expect_invalid(verifier, _token(_claims(iss="https://outro.supabase.co/auth/v1")))
+    _expect_invalid(verifier, "nao.e.jwt")
+
+
+def test_unverifiable_token_returns_none():
+    """Sem segredo HS256 (ou com algoritmo desconhecido), a decisão fica para o Supabase Auth"""
+    assert JwtVerifier(hs_secret=None).verify(_token(_claims())) is None
+    assert JwtVerifier(hs_secret=SECRET).verify(_token(_claims(), alg="HS512")) is None
+
+
+if __name__ == "__main__":
+    test_valid_hs256_token()
+    test_rejects_bad_signature_expired_and_wrong_audience()
+    test_unverifiable_token_returns_none()
+    print("✅ Todos os testes passaram!")
@@ -0,0 +1,71 @@
+"""
+Testes do executor paralelo com prazos (utils/parallel.py)
+Execute: python tests/test_parallel.py
+"""
+import sys
+import os
+import time
+
+# Adiciona o diretório pai ao path para importar os módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.parallel import run_with_deadlines
+
+
+def _raise_error():
+    raise ValueError("falhou")
+
+
+def test_all_tasks_complete():
+    """Todas as tarefas rápidas terminam com status ok"""
+    results = run_with_deadlines({f"T{i}": (lambda i=i: i * 2) for i in range(5)}, max_workers=2)
+
+    assert len(results) == 5
+    assert all(r["status"] == "ok" for r in results.values())
+    assert results["T3"]["result"] == 6
+
+
+def test_task_error_is_isolated():
+    """Erro em uma tarefa não afeta as demais"""
+    results = run_with_deadlines({"OK": lambda: True, "ERRO": _raise_error})
+
+    assert results["OK"]["status"] == "ok"
+    assert results["ERRO"]["status"] == "error"
+    assert "falhou" in results["ERRO"]["error"]
+
+
+def test_task_timeout():
+    """Tarefa lenta estoura o prazo individual sem bloquear as outras"""
+    start = time.monotonic()
+    results = run_with_deadlines(
+        {"LENTA": lambda: time.sleep(2), "RAPIDA": lambda: True},
+        max_workers=2,
+        task_timeout=0.3
+    )
+
+    assert time.monotonic() - start < 1.5
+    assert results["LENTA"]["status"] == "timeout"
+    assert results["RAPIDA"]["status"] == "ok"
+
+
+def test_total_timeout_returns_partial_results():
+    """Prazo global devolve resultados parciais"""
+    start = time.monotonic()
+    results = run_with_deadlines(
+        {"RAPIDA": lambda: True, "LENTA1": lambda: time.sleep(2), "LENTA2": lambda: time.sleep(2)},
+        max_workers=1,
+        total_timeout=0.5
+    )
+
+    assert time.monotonic() - start < 1.5
+    assert results["RAPIDA"]["status"] == "ok"
+    assert results["LENTA1"]["status"] == "not_finished"
+    assert results["LENTA2"]["status"] == "not_finished"
+
+
+if __name__ == "__main__":
+    test_all_tasks_complete()
+    test_task_error_is_isolated()
+    test_task_timeout()
+    test_total_timeout_returns_partial_results()
+    print("✅ Todos os testes passaram!")
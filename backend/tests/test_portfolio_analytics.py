@@ -0,0 +1,125 @@
+"""
+Testes dos cálculos vetorizados da análise de carteira
+Execute: python tests/test_portfolio_analytics.py
+"""
+import sys
+import os
+from datetime import date
+
+import numpy as np
+
+# Adiciona o diretório pai ao path para importar os módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.portfolio_analytics_service import (
+    _date_axis,
+    _price_matrix,
+    _position_matrices,
+    compute_analytics
+)
+from utils.price_series import PriceSeries
+
+AXIS = np.array(["2024-01-15", "2024-01-16", "2024-01-17"], dtype='datetime64[D]')
+
+
+def test_constant_position_metrics():
+    """Posição fixa: retorno, drawdown e P&L seguem só o preço"""
+    prices = np.array([[10.0], [11.0], [9.9]])
+    quantities = np.full((3, 1), 10.0)
+
+    metrics = compute_analytics(AXIS, prices, quantities, np.zeros((3, 1)))
+
+    assert np.allclose(metrics["values"], [100.0, 110.0, 99.0])
+    assert np.isclose(metrics["twr"], -0.01)
+    assert np.isclose(metrics["max_drawdown"], -0.1)
+    assert np.isclose(metrics["pnl"][0], -1.0)
+    assert np.isclose(metrics["contribution"][0], 0.0)
+    assert metrics["volatility"] is not None
+
+
+def test_contributions_do_not_count_as_returns():
+    """Aportes aumentam o valor mas não o retorno ponderado no tempo"""
+    tx_assets = np.array([0, 0], dtype=np.intp)
+    tx_dates = np.array(["2024-01-15", "2024-01-16"], dtype='datetime64[D]')
+    quantities, cashflows = _position_matrices(
+        AXIS, 1, tx_assets, tx_dates, np.array([10.0, 10.0]), np.array([10.0, 11.0])
+    )
+    prices = np.array([[10.0], [11.0], [12.0]])
+
+    metrics = compute_analytics(AXIS, prices, quantities, cashflows)
+
+    assert np.allclose(quantities[:, 0], [10.0, 20.0, 20.0])
+    assert np.allclose(metrics["values"], [100.0, 220.0, 240.0])
+    assert np.isclose(metrics["twr"], 0.2)
+
+
+def test_positions_before_range_and_weekend_trades():
+    """Transações antes do período viram posição inicial; fim de semana conta no pregão seguinte"""
+    axis = np.array(["2024-01-12", "2024-01-15", "2024-01-16"], dtype='datetime64[D]')
+    tx_assets = np.array([0, 1], dtype=np.intp)
+    tx_dates = np.array(["2023-12-01", "2024-01-13"], dtype='datetime64[D]')
+    quantities, cashflows = _position_matrices(
+        axis, 2, tx_assets, tx_dates, np.array([5.0, 3.0]), np.array([20.0, 30.0])
+    )
+
+    assert np.allclose(quantities[:, 0], [5.0, 5.0, 5.0])
+    assert np.allclose(quantities[:, 1], [0.0, 3.0, 3.0])
+    assert np.allclose(cashflows[:, 0], [0.0, 0.0, 0.0])
+    assert np.allclose(cashflows[:, 1], [0.0, 90.0, 0.0])
+
+
+def test_first_price_inside_range_is_not_a_return():
+    """Ativo mantido o período todo cuja primeira cotação cai no meio do período não gera retorno"""
+    axis = np.array(["2024-01-15", "2024-01-16", "2024-01-17", "2024-01-18"], dtype='datetime64[D]')
+    prices = np.array([
+        [10.0, np.nan],
+        [10.0, np.nan],
+        [10.0, np.nan],
+        [10.0, 100.0],
+    ])
+    quantities = np.array([[10.0, 10.0]] * 4)
+
+    metrics = compute_analytics(axis, prices, quantities, np.zeros((4, 2)))
+
+    assert np.allclose(metrics["values"], [100.0, 100.0, 100.0, 1100.0])
+    assert np.isclose(metrics["twr"], 0.0)
+    assert np.isclose(metrics["max_drawdown"], 0.0)
+    assert np.allclose(metrics["daily_returns"], 0.0)
+
+
+def test_trade_in_unpriced_asset_is_not_a_loss():
+    """Compra de ativo ainda sem cotação não conta como saída de valor"""
+    prices = np.array([[10.0, np.nan], [11.0, np.nan], [11.0, 50.0]])
+    quantities = np.array([[10.0, 0.0], [10.0, 2.0], [10.0, 2.0]])
+    cashflows = np.array([[0.0, 0.0], [0.0, 80.0], [0.0, 0.0]])
+
+    metrics = compute_analytics(AXIS, prices, quantities, cashflows)
+
+    assert np.allclose(metrics["daily_returns"], [0.0, 0.1, 0.0])
+    assert np.isclose(metrics["twr"], 0.1)
+
+
+def test_price_matrix_forward_fills():
+    """Dias sem cotação repetem o último preço; antes do primeiro preço fica NaN"""
+    first = PriceSeries.from_rows([
+        {"date": "2024-01-12", "price": 9.0},
+        {"date": "2024-01-16", "price": 10.0},
+    ])
+    second = PriceSeries.from_rows([{"date": "2024-01-17", "price": 50.0}])
+
+    axis = _date_axis([first, second], date(2024, 1, 15), date(2024, 1, 17))
+    prices = _price_matrix([first, second], axis)
+
+    assert axis.astype(str).tolist() == ["2024-01-16", "2024-01-17"]
+    assert np.allclose(prices[:, 0], [10.0, 10.0])
+    assert np.isnan(prices[0, 1]) and prices[1, 1] == 50.0
+
+
+if __name__ == "__main__":
+    test_constant_position_metrics()
+    test_contributions_do_not_count_as_returns()
+    test_positions_before_range_and_weekend_trades()
+    test_first_price_inside_range_is_not_a_return()
+    test_trade_in_unpriced_asset_is_not_a_loss()
+    test_price_matrix_forward_fills()
+    print("✅ Todos os testes passaram!")
@@ -0,0 +1,132 @@
+"""
+Testes do motor de posições (custo médio e lucro realizado)
+Execute: python tests/test_position_service.py
+"""
+import sys
+import os
+from types import SimpleNamespace
+
+# Adiciona o diretório pai ao path para importar os módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services import position_service
+from services.position_service import (
+    apply_transaction,
+    empty_position,
+    positions_version,
+    replay_transactions,
+    wallet_version
+)
+
+
+def test_average_cost_and_realized_pnl():
+    """Compras ajustam o custo médio; vendas realizam lucro sem alterá-lo"""
+    position = apply_transaction(empty_position(), {"type": "buy", "quantity": 10, "price": 20})
+    position = apply_transaction(position, {"type": "buy", "quantity": 10, "price": 30})
+    assert position["average_cost"] == 25.0
+
+    position = apply_transaction(position, {"type": "sell", "quantity": 5, "price": 40})
+    assert position["quantity"] == 15.0
+    assert position["average_cost"] == 25.0
+    assert position["realized_pnl"] == 75.0
+    assert position["transactions_count"] == 3
+
+
+def test_closing_position_resets_cost():
+    """Vender tudo zera custo; uma nova compra começa custo médio do zero"""
+    position = apply_transaction(empty_position(), {"type": "buy", "quantity": 4, "price": 10})
+    position = apply_transaction(position, {"type": "sell", "quantity": 4, "price": 12})
+    assert position["quantity"] == 0.0 and position["cost_basis"] == 0.0
+    assert position["realized_pnl"] == 8.0
+
+    position = apply_transaction(position, {"type": "buy", "quantity": 2, "price": 50})
+    assert position["average_cost"] == 50.0
+
+
+def test_replay_orders_by_date_and_matches_incremental():
+    """Reprocessar fora de ordem dá o mesmo resultado que aplicar em ordem"""
+    transactions = [
+        {"stock_id": "uuid-petr4", "type": "sell", "quantity": 5, "price": 40, "date": "2024-03-01T12:00:00+00:00"},
+        {"stock_id": "uuid-petr4", "type": "buy", "quantity": 10, "price": 20, "date": "2024-01-10T12:00:00"},
+        {"stock_id": "uuid-vale3", "type": "buy", "quantity": 3, "price": 60, "date": "2024-02-01T12:00:00+00:00"},
+        {"stock_id": "uuid-petr4", "type": "buy", "quantity": 10, "price": 30, "date": "2024-02-15T12:00:00Z"},
+    ]
+    positions = replay_transactions(transactions)
+
+    incremental = empty_position()
+    for transaction in (transactions[1], transactions[3], transactions[0]):
+        incremental = apply_transaction(incremental, transaction)
+
+    assert positions["uuid-petr4"] == incremental
+    assert positions["uuid-vale3"]["quantity"] == 3.0
+
+
+def test_positions_version_tracks_snapshot_changes():
+    """A versão ignora a ordem das linhas e muda quando uma posição é regravada"""
+    rows = [
+        {"stock_id": "uuid-petr4", "transactions_count": 3, "updated_at": "2024-03-01T12:00:00+00:00"},
+        {"stock_id": "uuid-vale3", "transactions_count": 1, "updated_at": "2024-02-01T12:00:00+00:00"},
+    ]
+    assert positions_version(rows) == positions_version(list(reversed(rows)))
+
+    changed = [dict(rows[0], transactions_count=4), rows[1]]
+    assert positions_version(changed) != positions_version(rows)
+    assert positions_version(rows[1:]) != positions_version(rows)
+
+
+def test_wallet_version_tracks_quantities_and_prices():
+    """Edições diretas de user_portfolio e preços novos também mudam a versão da carteira"""
+    positions = [{"stock_id": "uuid-petr4", "transactions_count": 3, "updated_at": "2024-03-01T12:00:00+00:00"}]
+    portfolio = [{"stock_id": "uuid-petr4", "quantity": 10}]
+    prices = {"uuid-petr4": {"price": 30.5, "date": "2024-03-01"}}
+    version = wallet_version(positions, portfolio, prices)
+
+    assert wallet_version(positions, [{"stock_id": "uuid-petr4", "quantity": 11}], prices) != version
+    assert wallet_version(positions, portfolio, {"uuid-petr4": {"price": 31.0, "date": "2024-03-01"}}) != version
+    assert wallet_version(positions, portfolio, dict(prices)) == version
+
+
+class _EmptyTable:
+    """Cliente falso em que user_positions ainda não tem linhas"""
+
+    def table(self, name):
+        return self
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def eq(self, *args):
+        return self
+
+    def limit(self, *args):
+        return self
+
+    def execute(self):
+        return SimpleNamespace(data=[])
+
+
+def test_first_write_without_snapshot_rebuilds_whole_history():
+    """Sem snapshot, a primeira transação reprocessa todas as ações, não só a afetada"""
+    rebuilt = []
+    original_client = position_service.get_supabase_admin_client
+    original_rebuild = position_service.rebuild_positions
+    position_service.get_supabase_admin_client = lambda: _EmptyTable()
+    position_service.rebuild_positions = lambda user_id, stock_ids=None: rebuilt.append(stock_ids)
+    try:
+        position_service.on_transaction_created("uuid-user", {"stock_id": "uuid-petr4", "date": "2024-03-01"})
+        position_service.on_transactions_changed("uuid-user", ["uuid-vale3"])
+    finally:
+        position_service.get_supabase_admin_client = original_client
+        position_service.rebuild_positions = original_rebuild
+
+    assert rebuilt == [None, None]
+
+
+if __name__ == "__main__":
+    test_average_cost_and_realized_pnl()
+    test_closing_position_resets_cost()
+    test_replay_orders_by_date_and_matches_incremental()
+    test_positions_version_tracks_snapshot_changes()
+    test_wallet_version_tracks_quantities_and_prices()
+    test_first_write_without_snapshot_rebuilds_whole_history()
+    print("✅ Todos os testes passaram!")
@@ -0,0 +1,66 @@
+"""
+Testes da série de preços colunar (utils/price_series.py)
+Execute: python tests/test_price_series.py
+"""
+import sys
+import os
+from datetime import date
+
+# Adiciona o diretório pai ao path para importar os módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.price_series import PriceSeries
+
+
+def test_from_rows_sorts_and_deduplicates():
+    """Linhas fora de ordem e datas repetidas viram uma série ordenada (vence a última)"""
+    series = PriceSeries.from_rows([
+        {"date": "2024-01-16", "price": 28.75},
+        {"date": "2024-01-15", "price": 28.5},
+        {"date": "2024-01-16", "price": 29.0},
+        {"date": "2024-01-17", "price": "invalido"},
+    ])
+
+    assert series.to_list() == [
+        {"date": "2024-01-15", "price": 28.5},
+        {"date": "2024-01-16", "price": 29.0},
+    ]
+    assert series.latest() == (date(2024, 1, 16), 29.0)
+
+
+def test_range_slice_is_a_view():
+    """Recorte por período usa busca binária e não copia os arrays"""
+    series = PriceSeries.from_rows([
+        {"date": f"2024-01-{day:02d}", "price": float(day)} for day in range(1, 31)
+    ])
+
+    window = series.last_days(7, today=date(2024, 1, 30))
+    assert len(window) == 8
+    assert window.to_list()[0] == {"date": "2024-01-23", "price": 23.0}
+    assert window.prices.base is not None
+
+    assert len(series.between(date(2024, 1, 10), date(2024, 1, 12))) == 3
+    assert len(series.since(date(2024, 2, 1))) == 0
+
+
+def test_merge_prefers_new_prices():
+    """Preços recém-gravados substituem os da mesma data e entram na ordem certa"""
+    series = PriceSeries.from_rows([
+        {"date": "2024-01-15", "price": 28.5},
+        {"date": "2024-01-16", "price": 28.75},
+    ])
+    update = PriceSeries.from_rows([
+        {"date": "2024-01-16", "price": 30.0},
+        {"date": "2024-01-17", "price": 30.5},
+    ])
+
+    merged = series.merge(update)
+    assert [item["price"] for item in merged.to_list()] == [28.5, 30.0, 30.5]
+    assert PriceSeries.empty().merge(update) is update
+
+
+if __name__ == "__main__":
+    test_from_rows_sorts_and_deduplicates()
+    test_range_slice_is_a_view()
+    test_merge_prefers_new_prices()
+    print("✅ Todos os testes passaram!")
@@ -0,0 +1,66 @@
+"""
+Testes do hub de publicação/assinatura (utils/pubsub.py)
+Execute: python tests/test_pubsub.py
+"""
+import sys
+import os
+
+# Adiciona o diretório pai ao path para importar os módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.pubsub import PubSubHub
+
+
+def test_publish_reaches_only_topic_subscribers():
+    """Cada assinante recebe apenas os tópicos que assinou"""
+    hub = PubSubHub("teste")
+    petr = hub.subscribe(["uuid-petr4"])
+    vale = hub.subscribe(["uuid-vale3"])
+
+    assert hub.publish("uuid-petr4", {"price": 30.5}) == 1
+    assert petr.get(timeout=0.1) == {"price": 30.5}
+    assert vale.get(timeout=0.01) is None
+
+    # Tópico sem assinantes: nada é entregue
+    assert hub.publish("uuid-itub4", {"price": 33.0}) == 0
+    print("✓ Publicação entregue apenas aos assinantes do tópico")
+
+
+def test_slow_subscriber_drops_oldest():
+    """Fila cheia descarta a mensagem mais antiga sem bloquear o publicador"""
+    hub = PubSubHub("teste", max_queue=2)
+    sub = hub.subscribe(["uuid-petr4"])
+
+    for price in (1.0, 2.0, 3.0):
+        hub.publish("uuid-petr4", {"price": price})
+
+    assert sub.get(timeout=0.1) == {"price": 2.0}
+    assert sub.get(timeout=0.1) == {"price": 3.0}
+    assert sub.dropped == 1
+    print("✓ Assinante lento perde as mensagens mais antigas")
+
+
+def test_unsubscribe_removes_topics():
+    """Após cancelar a assinatura, os tópicos vazios somem do hub"""
+    hub = PubSubHub("teste")
+    first = hub.subscribe(["uuid-petr4", "uuid-vale3"])
+    second = hub.subscribe(["uuid-petr4"])
+    assert hub.stats()["subscribers"] == 2
+
+    hub.unsubscribe(first)
+    assert hub.has_subscribers("uuid-petr4")
+    assert not hub.has_subscribers("uuid-vale3")
+
+    hub.unsubscribe(second)
+    assert hub.stats() == {"topics": 0, "subscribers": 0, "published": 0, "delivered": 0}
+    print("✓ Assinaturas canceladas liberam os tópicos")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("TESTES DO HUB DE PUB/SUB")
+    print("=" * 60)
+    test_publish_reaches_only_topic_subscribers()
+    test_slow_subscriber_drops_oldest()
+    test_unsubscribe_removes_topics()
+    print("\n✅ Todos os testes passaram!")
@@ -0,0 +1,96 @@
+"""
+Testes do mapa de identidade por requisição (utils/request_loader.py)
+Execute: python tests/test_request_loader.py
+"""
+import sys
+import os
+
+# Adiciona o diretório pai ao path para importar os módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.request_loader import BatchLoader, get_loader, request_scope
+
+
+class _FakeUsers:
+    def __init__(self, rows):
+        self.rows = {row["id"]: row for row in rows}
+        self.queries = []
+
+    def batch(self, ids):
+        self.queries.append(list(ids))
+        return {user_id: self.rows[user_id] for user_id in ids if user_id in self.rows}
+
+
+def test_load_many_batches_missing_keys():
+    """Chaves distintas viram uma consulta; as já carregadas não são buscadas de novo"""
+    users = _FakeUsers([{"id": "u1"}, {"id": "u2"}, {"id": "u3"}])
+    loader = BatchLoader(users.batch)
+
+    result = loader.load_many(["u1", "u2", "u1"])
+    assert list(result) == ["u1", "u2"]
+    assert loader.load("u1") is result["u1"]
+    loader.load_many(["u2", "u3"])
+
+    assert users.queries == [["u1", "u2"], ["u3"]]
+
+
+def test_missing_rows_are_cached_as_none():
+    users = _FakeUsers([])
+    loader = BatchLoader(users.batch)
+
+    assert loader.load("ghost") is None
+    assert loader.load("ghost") is None
+    assert users.queries == [["ghost"]]
+
+
+def test_clear_after_write_forces_reload():
+    users = _FakeUsers([{"id": "u1"}])
+    loader = BatchLoader(users.batch)
+    loader.load("u1")
+
+    loader.clear("u1")
+    loader.load("u1")
+    loader.prime("u2", {"id": "u2"})
+    assert loader.load("u2") == {"id": "u2"}
+    assert users.queries == [["u1"], ["u1"]]
+
+
+def test_clear_where_drops_matching_keys():
+    """Vínculos são chaveados por (grupo, usuário); uma escrita descarta o grupo inteiro"""
+    memberships = BatchLoader(lambda keys: {key: {"key": key} for key in keys})
+    memberships.load_many([("g1", "u1"), ("g1", "u2"), ("g2", "u1")])
+
+    memberships.clear_where(lambda key: key[0] == "g1")
+    assert memberships.hits == 0
+    memberships.load(("g2", "u1"))
+    assert memberships.hits == 1
+    assert memberships.batches == 1
+    memberships.load(("g1", "u1"))
+    assert memberships.batches == 2
+
+
+def test_scope_shares_loader_until_closed():
+    """Dentro do escopo o loader é o mesmo; fora dele nada é reaproveitado"""
+    users = _FakeUsers([{"id": "u1"}])
+
+    with request_scope():
+        get_loader("users", users.batch).load("u1")
+        get_loader("users", users.batch).load("u1")
+    assert users.queries == [["u1"]]
+
+    get_loader("users", users.batch).load("u1")
+    get_loader("users", users.batch).load("u1")
+    assert len(users.queries) == 3
+
+    with request_scope():
+        get_loader("users", users.batch).load("u1")
+    assert len(users.queries) == 4
+
+
+if __name__ == "__main__":
+    test_load_many_batches_missing_keys()
+    test_missing_rows_are_cached_as_none()
+    test_clear_after_write_forces_reload()
+    test_clear_where_drops_matching_keys()
+    test_scope_shares_loader_until_closed()
+    print("✅ Todos os testes passaram!")
@@ -0,0 +1,52 @@
+"""
+Testes do backoff e do circuit breaker (utils/resilience.py)
+Execute: python tests/test_resilience.py
+"""
+import sys
+import os
+import time
+
+# Adiciona o diretório pai ao path para importar os módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.resilience import CircuitBreaker, CircuitOpenError, backoff_delay
+
+
+def test_backoff_delay_is_bounded():
+    """A espera fica entre 0 e min(cap, base * 2^tentativa)"""
+    for attempt in range(6):
+        wait = backoff_delay(attempt, base=0.5, cap=4.0)
+        assert 0 <= wait <= min(4.0, 0.5 * 2 ** attempt)
+
+
+def test_circuit_opens_and_recovers():
+    """Abre após N falhas, libera uma chamada de teste depois do reset e fecha com sucesso"""
+    breaker = CircuitBreaker("teste", failure_threshold=2, reset_timeout=0.1)
+    breaker.record_failure()
+    breaker.before_call()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    try:
+        breaker.before_call()
+        assert False, "Circuito aberto deveria recusar a chamada"
+    except CircuitOpenError:
+        pass
+
+    time.sleep(0.15)
+    breaker.before_call()  # chamada de teste (meio-aberto)
+    try:
+        breaker.before_call()
+        assert False, "Só uma chamada de teste por vez"
+    except CircuitOpenError:
+        pass
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.stats()["rejected"] == 2
+
+
+if __name__ == "__main__":
+    test_backoff_delay_is_bounded()
+    test_circuit_opens_and_recovers()
+    print("✅ Todos os testes passaram!")
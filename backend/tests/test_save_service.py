@@ -0,0 +1,80 @@
+"""
+Testes do UPSERT de preços (services/save_service.py) com um cliente Supabase falso
+Execute: python tests/test_save_service.py
+"""
+import sys
+import os
+from types import SimpleNamespace
+
+# Adiciona o diretório pai ao path para importar os módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services import save_service
+
+
+class _RpcError(Exception):
+    def __init__(self, message, code):
+        super().__init__(message)
+        self.code = code
+
+
+class _FakeSupabase:
+    """RPC que sempre falha com o erro dado; registra os UPSERTs na tabela"""
+
+    def __init__(self, rpc_error):
+        self.rpc_error = rpc_error
+        self.upserts = []
+
+    def rpc(self, name, params):
+        return self
+
+    def table(self, name):
+        return self
+
+    def upsert(self, rows, on_conflict=None):
+        self.upserts.append(rows)
+        return self
+
+    def execute(self):
+        if not self.upserts:
+            raise self.rpc_error
+        return SimpleNamespace(data=self.upserts[-1])
+
+
+def _with_fake_client(rpc_error):
+    client = _FakeSupabase(rpc_error)
+    save_service.get_supabase_client = lambda: client
+    return client
+
+
+def test_rpc_failure_is_not_hidden_by_fallback():
+    """Timeout/5xx da RPC sobem como erro; nada é regravado"""
+    client = _with_fake_client(_RpcError("canceling statement due to statement timeout", "57014"))
+
+    try:
+        save_service.upsert_prices([{"stock_id": "s1", "date": "2024-01-15", "price": 28.5}])
+        assert False, "Deveria ter lançado a exceção da RPC"
+    except _RpcError:
+        pass
+    assert client.upserts == []
+
+
+def test_missing_function_falls_back_with_unique_keys():
+    """Sem a migration 004: UPSERT simples com uma linha por (ação, data), a última enviada"""
+    client = _with_fake_client(_RpcError("Could not find the function public.upsert_stock_prices", "PGRST202"))
+
+    result = save_service.upsert_prices([
+        {"stock_id": "s1", "date": "2024-01-15", "price": 28.5},
+        {"stock_id": "s1", "date": "2024-01-15", "price": 28.7},
+        {"stock_id": "s1", "date": "2024-01-16", "price": 29.0},
+    ])
+
+    rows = client.upserts[0]
+    assert [(row["date"], row["price"]) for row in rows] == [("2024-01-15", 28.7), ("2024-01-16", 29.0)]
+    assert result["updated"] == 2 and result["by_stock"]["s1"]["unchanged"] == 0
+
+
+if __name__ == "__main__":
+    test_rpc_failure_is_not_hidden_by_fallback()
+    test_missing_function_falls_back_with_unique_keys()
+    print("✅ Todos os testes passaram!")
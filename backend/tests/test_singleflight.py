@@ -0,0 +1,62 @@
+"""
+Testes da coalescência de chamadas concorrentes (utils/singleflight.py)
+Execute: python tests/test_singleflight.py
+"""
+import sys
+import os
+import threading
+import time
+
+# Adiciona o diretório pai ao path para importar os módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    """Chamadas simultâneas com a mesma chave executam a função uma única vez"""
+    flight = SingleFlight("teste")
+    executions = []
+    results = []
+
+    def slow_fetch():
+        executions.append(1)
+        time.sleep(0.2)
+        return [{"date": "2024-01-15", "price": 28.5}]
+
+    threads = [
+        threading.Thread(target=lambda: results.append(flight.do(("PETR4", "3mo"), slow_fetch)))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(executions) == 1
+    assert len(results) == 5
+    assert all(result is results[0] for result in results)
+    assert flight.stats()["coalesced"] == 4
+
+
+def test_error_is_shared_and_not_cached():
+    """Erro é repassado a quem esperava e a próxima chamada executa de novo"""
+    flight = SingleFlight("teste")
+
+    def failing_fetch():
+        raise RuntimeError("BraAPI fora do ar")
+
+    try:
+        flight.do("PETR4", failing_fetch)
+        assert False, "Deveria ter lançado exceção"
+    except RuntimeError:
+        pass
+
+    assert flight.do("PETR4", lambda: 42) == 42
+    assert flight.stats()["executions"] == 2
+
+
+if __name__ == "__main__":
+    test_concurrent_calls_share_one_execution()
+    test_error_is_shared_and_not_cached()
+    print("✅ Todos os testes passaram!")
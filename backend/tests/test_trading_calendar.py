@@ -0,0 +1,53 @@
+"""
+Testes do calendário de pregões da B3 (services/trading_calendar_service.py)
+Execute: python tests/test_trading_calendar.py
+"""
+import sys
+import os
+from datetime import date, datetime
+
+# Adiciona o diretório pai ao path para importar os módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.trading_calendar_service import (
+    is_trading_day,
+    last_session,
+    next_session,
+    sessions_between,
+    is_market_open
+)
+
+
+def test_holidays_are_not_sessions():
+    """Feriados móveis e fixos da B3 não têm pregão"""
+    assert not is_trading_day(date(2024, 2, 12))   # Carnaval
+    assert not is_trading_day(date(2024, 3, 29))   # Sexta-feira Santa
+    assert not is_trading_day(date(2024, 5, 30))   # Corpus Christi
+    assert not is_trading_day(date(2024, 11, 20))  # Consciência Negra (nacional desde 2024)
+    assert is_trading_day(date(2023, 11, 20))      # 2023: B3 abriu
+    assert is_trading_day(date(2024, 10, 28))
+
+
+def test_last_and_next_session_skip_holidays():
+    """Último/próximo pregão pulam fins de semana e feriados"""
+    assert last_session(date(2024, 2, 13)) == date(2024, 2, 9)
+    assert last_session(date(2024, 10, 28)) == date(2024, 10, 28)
+    assert next_session(date(2024, 12, 23)) == date(2024, 12, 26)
+    assert next_session(date(2024, 12, 30)) == date(2025, 1, 2)
+    assert sessions_between(date(2024, 2, 9), date(2024, 2, 14)) == 1
+
+
+def test_market_hours():
+    """Mercado aberto só no horário do pregão (Quarta-feira de Cinzas abre às 13h)"""
+    assert is_market_open(datetime(2024, 10, 28, 14, 0))
+    assert not is_market_open(datetime(2024, 10, 28, 18, 30))
+    assert not is_market_open(datetime(2024, 2, 13, 14, 0))
+    assert not is_market_open(datetime(2024, 2, 14, 11, 0))
+    assert is_market_open(datetime(2024, 2, 14, 13, 30))
+
+
+if __name__ == "__main__":
+    test_holidays_are_not_sessions()
+    test_last_and_next_session_skip_holidays()
+    test_market_hours()
+    print("✅ Todos os testes passaram!")
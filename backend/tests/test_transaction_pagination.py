@@ -0,0 +1,153 @@
+"""
+Testes dos auxiliares de paginação (utils/pagination.py) e da projeção de transações
+Execute: python tests/test_transaction_pagination.py
+"""
+import sys
+import os
+from types import SimpleNamespace
+
+# Adiciona o diretório pai ao path para importar os módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services import transaction_service
+from services.transaction_service import _parse_fields, TRANSACTION_FIELDS, TRANSACTIONS_CURSOR_KEYS
+from utils.pagination import decode_cursor, encode_cursor, fetch_all_rows, keyset_after_filter
+
+
+def test_cursor_round_trip():
+    """O cursor é opaco mas devolve exatamente a chave (date, created_at, id)"""
+    transaction = {
+        "id": "uuid-tx",
+        "date": "2024-01-15T12:00:00+00:00",
+        "created_at": "2024-01-15T13:04:05.123+00:00",
+        "price": 28.5
+    }
+    cursor = encode_cursor(transaction, TRANSACTIONS_CURSOR_KEYS)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor, 3) == ["2024-01-15T12:00:00+00:00", "2024-01-15T13:04:05.123+00:00", "uuid-tx"]
+
+
+def test_falsy_key_values_round_trip():
+    """0 e "" são valores válidos da chave; o cursor emitido é aceito de volta"""
+    cursor = encode_cursor({"date": "2024-01-15", "created_at": "", "id": 0}, TRANSACTIONS_CURSOR_KEYS)
+    assert decode_cursor(cursor, 3) == ["2024-01-15", "", 0]
+
+
+def test_invalid_cursor_is_rejected():
+    for cursor in ("nao-e-cursor", encode_cursor({"id": "uuid-tx"}, TRANSACTIONS_CURSOR_KEYS)):
+        try:
+            decode_cursor(cursor, 3)
+            assert False, "Deveria ter lançado ValueError"
+        except ValueError:
+            pass
+
+
+def test_keyset_filter():
+    """Filtro "depois do cursor" em ordem decrescente, com aspas nos valores"""
+    assert keyset_after_filter(["date", "created_at", "id"], ["d", "c", "i"]) == (
+        'date.lt."d",'
+        'and(date.eq."d",created_at.lt."c"),'
+        'and(date.eq."d",created_at.eq."c",id.lt."i")'
+    )
+
+
+def test_fields_projection():
+    assert _parse_fields(None) == list(TRANSACTION_FIELDS)
+    assert _parse_fields("id, ticker,quantity") == ["id", "ticker", "quantity"]
+    try:
+        _parse_fields("id,senha")
+        assert False, "Deveria ter lançado ValueError"
+    except ValueError as error:
+        assert "senha" in str(error)
+
+
+class _FakeTransactions:
+    """Tabela transactions em memória; registra o limit pedido"""
+
+    def __init__(self, count):
+        self.rows = [
+            {"id": f"tx-{i:03d}", "date": "2024-01-15", "created_at": f"2024-01-15T10:{i % 60:02d}:00"}
+            for i in range(count)
+        ]
+        self.limits = []
+
+    def table(self, name):
+        return self
+
+    def select(self, *args):
+        return self
+
+    def eq(self, *args):
+        return self
+
+    def or_(self, *args):
+        return self
+
+    def order(self, *args, **kwargs):
+        return self
+
+    def limit(self, count):
+        self.limits.append(count)
+        return self
+
+    def execute(self):
+        count = self.limits[-1] if self.limits else len(self.rows)
+        return SimpleNamespace(data=self.rows[:count])
+
+
+def test_without_limit_or_cursor_returns_everything():
+    """Clientes antigos (sem limit/cursor) continuam recebendo o histórico completo"""
+    fake = _FakeTransactions(transaction_service.TRANSACTIONS_PAGE_SIZE + 5)
+    transaction_service.get_supabase_admin_client = lambda: fake
+
+    result = transaction_service.list_transactions("user-1", fields="id")
+    assert result["success"], result
+    assert len(result["data"]) == len(fake.rows)
+    assert result["next_cursor"] is None and not result["has_more"]
+    assert fake.limits == []
+
+    cursor = encode_cursor(fake.rows[0], TRANSACTIONS_CURSOR_KEYS)
+    result = transaction_service.list_transactions("user-1", cursor=cursor, fields="id")
+    assert fake.limits == [transaction_service.TRANSACTIONS_PAGE_SIZE + 1]
+    assert result["has_more"] and result["next_cursor"]
+
+
+class _RangedQuery:
+    """Consulta que só devolve o intervalo pedido em .range()"""
+
+    def __init__(self, rows, requests):
+        self.rows = rows
+        self.requests = requests
+
+    def range(self, start, end):
+        self.requests.append((start, end))
+        self.page = self.rows[start:end + 1]
+        return self
+
+    def execute(self):
+        return SimpleNamespace(data=self.page)
+
+
+def test_fetch_all_rows_reads_every_page():
+    """Lê páginas até vir uma incompleta (inclusive quando o total é múltiplo da página)"""
+    for total in (7, 6, 0):
+        rows = [{"id": index} for index in range(total)]
+        requests = []
+
+        result = fetch_all_rows(lambda: _RangedQuery(rows, requests), page_size=3)
+
+        assert result == rows
+        assert requests[0] == (0, 2)
+        assert len(requests) == total // 3 + 1
+
+
+if __name__ == "__main__":
+    test_cursor_round_trip()
+    test_falsy_key_values_round_trip()
+    test_invalid_cursor_is_rejected()
+    test_keyset_filter()
+    test_fields_projection()
+    test_without_limit_or_cursor_returns_everything()
+    test_fetch_all_rows_reads_every_page()
+    print("✅ Todos os testes passaram!")
@@ -3,13 +3,44 @@ Utilitarios de contexto de autenticacao para rotas protegidas.
 
 Permite validar o JWT do Supabase quando o frontend enviar Authorization: Bearer
 e, durante a migracao, aceitar user_id legado vindo em query string ou body.
+
+O JWT e verificado localmente (utils/jwt_verifier.py) e tokens ja verificados
+ficam em cache ate expirarem; o Supabase Auth so e consultado quando nao ha
+chave para verificar localmente (AUTH_REMOTE_FALLBACK).
 """
+import hashlib
+import os
+import threading
+import time
 from functools import wraps
 from typing import Any, Dict, Optional, Tuple
 
 from flask import g, jsonify, request
 
 from config.supabase_config import get_supabase_admin_client
+from utils.cache import TTLCache
+from utils.jwt_verifier import InvalidTokenError, JwtVerifier, decode_unverified
+
+# Verificacao local do JWT: segredo HS256 do projeto e/ou JWKS (chaves assimetricas)
+AUTH_LOCAL_JWT_VERIFY = os.getenv('AUTH_LOCAL_JWT_VERIFY', 'true').lower() == 'true'
+AUTH_REMOTE_FALLBACK = os.getenv('AUTH_REMOTE_FALLBACK', 'true').lower() == 'true'
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv('AUTH_TOKEN_CACHE_SIZE', '10000'))
+AUTH_JWKS_TTL_SECONDS = int(os.getenv('AUTH_JWKS_TTL_SECONDS', '3600'))
+
+_supabase_url = (os.getenv('SUPABASE_URL') or '').rstrip('/')
+
+jwt_verifier = JwtVerifier(
+    hs_secret=os.getenv('SUPABASE_JWT_SECRET'),
+    jwks_url=os.getenv('SUPABASE_JWKS_URL') or (f'{_supabase_url}/auth/v1/.well-known/jwks.json' if _supabase_url else None),
+    audience=os.getenv('SUPABASE_JWT_AUDIENCE', 'authenticated') or None,
+    issuer=f'{_supabase_url}/auth/v1' if _supabase_url else None,
+    jwks_ttl=AUTH_JWKS_TTL_SECONDS,
+)
+
+# Tokens ja verificados (chave: hash do token) ate o exp de cada um
+_verified_tokens = TTLCache(max_size=AUTH_TOKEN_CACHE_SIZE, default_ttl=3600)
+_stats_lock = threading.Lock()
+_auth_stats = {'local_verified': 0, 'remote_verified': 0, 'rejected': 0}
 
 
 def _extract_bearer_token() -> Optional[str]:
@@ -66,6 +97,77 @@ def _extract_user_from_response(response: Any) -> Optional[Dict[str, Any]]:
     }
 
 
+def _count(stat: str) -> None:
+    with _stats_lock:
+        _auth_stats[stat] += 1
+
+
+def _verify_token(token: str) -> Optional[Dict[str, Any]]:
+    """
+    Retorna {'id', 'email'} do usuario do token, ou None se o Supabase Auth rejeitar.
+
+    Ordem: cache de tokens verificados -> verificacao local -> Supabase Auth.
+    Levanta InvalidTokenError se a verificacao local rejeitar o token.
+    """
+    cache_key = hashlib.sha256(token.encode('utf-8')).hexdigest()
+    cached = _verified_tokens.get(cache_key)
+    if cached is not None:
+        return cached
+
+    user = None
+    expires_at = None
+
+    if AUTH_LOCAL_JWT_VERIFY:
+        try:
+            claims = jwt_verifier.verify(token)
+        except InvalidTokenError:
+            _count('rejected')
+            raise
+        if claims is not None:
+            user = {'id': claims['sub'], 'email': claims.get('email')}
+            expires_at = claims.get('exp')
+            _count('local_verified')
+
+    if user is None:
+        if not AUTH_REMOTE_FALLBACK:
+            _count('rejected')
+            raise InvalidTokenError('Token nao pode ser verificado localmente')
+
+        supabase_admin = get_supabase_admin_client()
+        auth_response = supabase_admin.auth.get_user(token)
+        user = _extract_user_from_response(auth_response)
+        if not user or not user.get('id'):
+            _count('rejected')
+            return None
+
+        user = {'id': user['id'], 'email': user.get('email')}
+        _count('remote_verified')
+        try:
+            expires_at = decode_unverified(token)[1].get('exp')
+        except InvalidTokenError:
+            expires_at = None
+
+    if isinstance(expires_at, (int, float)):
+        ttl = expires_at - time.time()
+        if ttl > 0:
+            _verified_tokens.set(cache_key, user, ttl=ttl)
+
+    return user
+
+
+def get_auth_stats() -> Dict[str, Any]:
+    """Contadores da verificacao de tokens (para diagnostico)."""
+    with _stats_lock:
+        stats = dict(_auth_stats)
+    stats.update({
+        'local_verify': AUTH_LOCAL_JWT_VERIFY,
+        'remote_fallback': AUTH_REMOTE_FALLBACK,
+        'token_cache': _verified_tokens.stats(),
+        'verifier': jwt_verifier.stats(),
+    })
+    return stats
+
+
 def resolve_authenticated_user(
     requested_user_id: Optional[str] = None,
     allow_legacy: bool = True
@@ -84,9 +186,7 @@ def resolve_authenticated_user(
 
     if token:
         try:
-            supabase_admin = get_supabase_admin_client()
-            auth_response = supabase_admin.auth.get_user(token)
-            user = _extract_user_from_response(auth_response)
+            user = _verify_token(token)
 
             if not user or not user.get('id'):
                 return None, (jsonify({
@@ -0,0 +1,271 @@
+"""
+Estruturas de cache em memória reutilizáveis
+- TTLCache: LRU com expiração por item (thread-safe)
+- FakeRedis: subconjunto da interface do redis-py, em memória (para testes/desenvolvimento)
+- DiskTTLCache: valores JSON em disco com TTL (sobrevive a reinícios do processo)
+- NegativeCache: lembra por pouco tempo chaves que "não existem" em uma fonte
+- get_shared_cache_client: cliente Redis opcional (REDIS_URL)
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Cache LRU com tempo de vida (TTL) por item
+
+    Example:
+        >>> cache = TTLCache(max_size=2, default_ttl=60)
+        >>> cache.set("PETR4", 30.5)
+        >>> cache.get("PETR4")
+        30.5
+    """
+
+    def __init__(self, max_size: int = 1024, default_ttl: float = 300):
+        self.max_size = max(1, int(max_size))
+        self.default_ttl = default_ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Retorna o valor (e o marca como usado recentemente) ou default se ausente/expirado"""
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                self.misses += 1
+                return default
+
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Armazena o valor; ttl=None usa default_ttl, ttl<=0 não armazena"""
+        ttl = self.default_ttl if ttl is None else ttl
+        if ttl is not None and ttl <= 0:
+            return
+
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> bool:
+        """Remove a chave; retorna True se existia"""
+        with self._lock:
+            return self._data.pop(key, _MISSING) is not _MISSING
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+
+class NegativeCache:
+    """
+    Cache de resultados negativos (ticker inexistente/rejeitado) de uma fonte
+
+    Consultas repetidas de um símbolo inválido retornam na hora, sem ir ao
+    banco ou à rede, até o TTL expirar.
+
+    Example:
+        >>> brapi_negative = NegativeCache("brapi", ttl=600)
+        >>> brapi_negative.remember("XPTO3")
+        >>> brapi_negative.is_negative("xpto3")
+        True
+    """
+
+    def __init__(self, source: str, ttl: float = 300, max_size: int = 4096):
+        self.source = source
+        self._cache = TTLCache(max_size=max_size, default_ttl=ttl)
+        self._lock = threading.Lock()
+        self.negative_hits = 0
+        self.remembered = 0
+
+    @staticmethod
+    def _key(key: Hashable) -> Hashable:
+        return key.upper().strip() if isinstance(key, str) else key
+
+    def is_negative(self, key: Hashable) -> bool:
+        """True se a chave foi marcada como inexistente há menos de ttl segundos"""
+        if self._cache.get(self._key(key)) is None:
+            return False
+        with self._lock:
+            self.negative_hits += 1
+        print(f"[CACHE] {key} marcado como inexistente em {self.source} (cache negativo)")
+        return True
+
+    def remember(self, key: Hashable) -> None:
+        """Marca a chave como inexistente nesta fonte"""
+        self._cache.set(self._key(key), True)
+        with self._lock:
+            self.remembered += 1
+
+    def forget(self, key: Hashable) -> None:
+        self._cache.delete(self._key(key))
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            negative_hits = self.negative_hits
+            remembered = self.remembered
+        return {
+            "source": self.source,
+            "ttl": self._cache.default_ttl,
+            "entries": len(self._cache),
+            "negative_hits": negative_hits,
+            "remembered": remembered
+        }
+
+
+class FakeRedis:
+    """
+    Implementação em memória de get/set/delete do redis-py
+
+    Usada em testes e quando não há Redis configurado mas se quer
+    exercitar o caminho do cache compartilhado.
+    """
+
+    def __init__(self):
+        self._cache = TTLCache(max_size=100000, default_ttl=None)
+
+    def get(self, name: str) -> Optional[bytes]:
+        return self._cache.get(name)
+
+    def set(self, name: str, value: Any, ex: Optional[int] = None) -> bool:
+        if isinstance(value, str):
+            value = value.encode('utf-8')
+        self._cache.set(name, value, ttl=ex)
+        return True
+
+    def delete(self, *names: str) -> int:
+        return sum(1 for name in names if self._cache.delete(name))
+
+    def flushdb(self) -> bool:
+        self._cache.clear()
+        return True
+
+
+class DiskTTLCache:
+    """
+    Cache de valores JSON em disco, um arquivo por chave, com TTL
+
+    A idade é medida pelo horário gravado no próprio arquivo; escritas são
+    atômicas (arquivo temporário + rename), então leitores nunca veem um
+    arquivo pela metade.
+
+    Example:
+        >>> cache = DiskTTLCache("/tmp/fintracker_yahoo", ttl=3600)
+        >>> cache.set("PETR4.SA", [["2024-03-30", 1.25]])
+        >>> cache.get("PETR4.SA")
+        [['2024-03-30', 1.25]]
+    """
+
+    def __init__(self, directory: str, ttl: float = 3600):
+        self.directory = directory
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha1(str(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Retorna o valor gravado há menos de ttl segundos, ou default"""
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return default
+
+        if time.time() - entry.get("stored_at", 0) > self.ttl:
+            self.misses += 1
+            return default
+
+        self.hits += 1
+        return entry.get("value")
+
+    def set(self, key: str, value: Any) -> None:
+        """Grava o valor (precisa ser serializável em JSON); erros de disco são ignorados"""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({"key": key, "stored_at": time.time(), "value": value}, f)
+            os.replace(tmp_path, self._path(key))
+        except (OSError, TypeError, ValueError) as e:
+            print(f"[AVISO] Não foi possível gravar cache em disco: {str(e)}")
+
+    def delete(self, key: str) -> bool:
+        try:
+            os.remove(self._path(key))
+            return True
+        except OSError:
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "directory": self.directory,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+def get_shared_cache_client():
+    """
+    Retorna um cliente Redis se REDIS_URL estiver configurado
+
+    Returns:
+        Cliente redis (ou None se REDIS_URL não estiver definido ou o pacote
+        redis não estiver instalado - nesse caso, apenas o cache local é usado)
+    """
+    redis_url = os.getenv('REDIS_URL')
+    if not redis_url:
+        return None
+
+    try:
+        import redis
+    except ImportError:
+        print("[AVISO] REDIS_URL configurado, mas o pacote 'redis' não está instalado - usando apenas cache local")
+        return None
+
+    try:
+        return redis.Redis.from_url(redis_url, socket_timeout=0.5, socket_connect_timeout=0.5)
+    except Exception as e:
+        print(f"[AVISO] Não foi possível conectar ao Redis: {str(e)} - usando apenas cache local")
+        return None
@@ -0,0 +1,148 @@
+"""
+Cliente HTTP compartilhado para APIs de dados de mercado
+Reaproveita conexões (keep-alive) com um requests.Session por serviço, refaz
+requisições que falham de forma transitória (429/5xx, timeout, conexão) com
+backoff exponencial e protege o serviço com um circuit breaker
+"""
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.resilience import CircuitBreaker, backoff_delay
+
+# Status que valem nova tentativa
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+# Status que contam como falha do serviço para o circuit breaker
+# (429 é limite de plano, não indisponibilidade)
+BREAKER_STATUS_CODES = frozenset({500, 502, 503, 504})
+
+
+class MarketDataHttpClient:
+    """
+    Cliente HTTP com pool de conexões, retries com jitter e circuit breaker
+
+    Example:
+        >>> client = MarketDataHttpClient("brapi", pool_maxsize=10)
+        >>> response = client.get("https://brapi.dev/api/quote/PETR4", params={"token": "..."})
+    """
+
+    def __init__(
+        self,
+        name: str,
+        pool_connections: int = 2,
+        pool_maxsize: int = 10,
+        max_retries: int = 2,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        breaker_threshold: int = 5,
+        breaker_reset_timeout: float = 30.0,
+        timeout: float = 10.0
+    ):
+        self.name = name
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.breaker = CircuitBreaker(name, breaker_threshold, breaker_reset_timeout)
+
+        # Retries são feitos aqui (com backoff e breaker), não pelo urllib3
+        self._adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session = requests.Session()
+        self.session.mount("https://", self._adapter)
+        self.session.mount("http://", self._adapter)
+
+        self._lock = threading.Lock()
+        self.requests_sent = 0
+        self.retries = 0
+
+    def _retry_wait(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        wait = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            wait = max(wait, min(float(retry_after), self.backoff_max))
+        return wait
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None,
+            timeout: Optional[float] = None) -> requests.Response:
+        """
+        Faz um GET com retries e circuit breaker
+
+        Args:
+            url: URL completa
+            params: Query string
+            headers: Cabeçalhos HTTP
+            timeout: Timeout por tentativa em segundos (padrão: self.timeout)
+
+        Returns:
+            A resposta da última tentativa (inclusive 429/5xx se as tentativas acabarem)
+
+        Raises:
+            CircuitOpenError: Se o circuito do serviço está aberto
+            requests.exceptions.RequestException: Timeout/erro de conexão após esgotar as tentativas,
+                ou outro erro da requisição (sem nova tentativa)
+        """
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+
+            with self._lock:
+                self.requests_sent += 1
+
+            try:
+                response = self.session.get(url, params=params, headers=headers, timeout=timeout or self.timeout)
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+                self.breaker.record_failure()
+                if attempt >= self.max_retries:
+                    raise
+                wait = self._retry_wait(attempt)
+            except Exception:
+                # Outros erros (ChunkedEncodingError, TooManyRedirects, InvalidURL...)
+                # não são repetidos, mas encerram a chamada de teste do HALF_OPEN
+                self.breaker.record_failure()
+                raise
+            else:
+                if response.status_code in BREAKER_STATUS_CODES:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                    return response
+                wait = self._retry_wait(attempt, response)
+
+            with self._lock:
+                self.retries += 1
+            print(f"[INFO] {self.name}: nova tentativa em {wait:.2f}s ({attempt + 1}/{self.max_retries})")
+            time.sleep(wait)
+            attempt += 1
+
+    def _pool_counters(self) -> Dict[str, int]:
+        """Soma conexões abertas e requisições feitas em todos os pools do urllib3"""
+        created = 0
+        served = 0
+        pools = self._adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            created += getattr(pool, "num_connections", 0)
+            served += getattr(pool, "num_requests", 0)
+        return {"connections_created": created, "pool_requests": served}
+
+    def stats(self) -> Dict[str, Any]:
+        counters = self._pool_counters()
+        with self._lock:
+            requests_sent = self.requests_sent
+            retries = self.retries
+        return {
+            "requests": requests_sent,
+            "retries": retries,
+            "connections_created": counters["connections_created"],
+            "connections_reused": max(0, counters["pool_requests"] - counters["connections_created"]),
+            "circuit_breaker": self.breaker.stats()
+        }
+
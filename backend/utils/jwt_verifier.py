@@ -0,0 +1,195 @@
+"""
+Verificacao local de access tokens (JWT) do Supabase Auth.
+
+HS256 e verificado com o segredo do projeto (SUPABASE_JWT_SECRET) usando so a
+biblioteca padrao. Chaves assimetricas (RS256/ES256) vem do JWKS do projeto,
+mantido em cache, e exigem o pacote opcional PyJWT. Quando nao ha como
+verificar localmente, verify() retorna None e quem chama decide se consulta
+o Supabase Auth.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+class InvalidTokenError(Exception):
+    """Token verificado localmente e rejeitado (assinatura, expiracao, audiencia)."""
+
+
+def _b64url_decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + '=' * (-len(segment) % 4))
+
+
+def decode_unverified(token: str):
+    """Separa header, claims e assinatura sem verificar nada."""
+    try:
+        header_segment, payload_segment, signature_segment = token.split('.')
+        header = json.loads(_b64url_decode(header_segment))
+        claims = json.loads(_b64url_decode(payload_segment))
+        signature = _b64url_decode(signature_segment)
+    except (ValueError, TypeError):
+        raise InvalidTokenError('Token malformado')
+
+    if not isinstance(header, dict) or not isinstance(claims, dict):
+        raise InvalidTokenError('Token malformado')
+
+    signing_input = f'{header_segment}.{payload_segment}'.encode('ascii')
+    return header, claims, signature, signing_input
+
+
+class JwtVerifier:
+    """
+    Verifica assinatura e claims de tokens do Supabase sem chamada de rede
+    (exceto a busca periodica do JWKS).
+
+    Example:
+        >>> verifier = JwtVerifier(hs_secret='segredo-do-projeto', audience='authenticated')
+        >>> claims = verifier.verify(token)
+        >>> claims['sub']
+        'uuid-do-usuario'
+    """
+
+    def __init__(
+        self,
+        hs_secret: Optional[str] = None,
+        jwks_url: Optional[str] = None,
+        audience: Optional[str] = 'authenticated',
+        issuer: Optional[str] = None,
+        leeway: float = 10,
+        jwks_ttl: float = 3600,
+        jwks_fetcher: Optional[Callable[[str], Dict[str, Any]]] = None,
+    ):
+        self.hs_secret = hs_secret.encode('utf-8') if hs_secret else None
+        self.jwks_url = jwks_url
+        self.audience = audience
+        self.issuer = issuer
+        self.leeway = leeway
+        self.jwks_ttl = jwks_ttl
+        self._jwks_fetcher = jwks_fetcher or self._fetch_jwks
+        self._lock = threading.Lock()
+        self._keys: Dict[str, Dict[str, Any]] = {}
+        self._keys_fetched_at: Optional[float] = None
+
+    @staticmethod
+    def _fetch_jwks(url: str) -> Dict[str, Any]:
+        import requests
+
+        response = requests.get(url, timeout=5)
+        response.raise_for_status()
+        return response.json()
+
+    def _signing_key(self, kid: Optional[str]) -> Optional[Dict[str, Any]]:
+        """JWK do kid; recarrega o JWKS se expirou ou se o kid e desconhecido (no maximo a cada 60s)."""
+        if not self.jwks_url:
+            return None
+
+        with self._lock:
+            key = self._keys.get(kid)
+            if self._keys_fetched_at is None:
+                stale = True
+            else:
+                age = time.monotonic() - self._keys_fetched_at
+                stale = age > self.jwks_ttl or (key is None and age > 60)
+
+        if stale:
+            try:
+                jwks = self._jwks_fetcher(self.jwks_url)
+                keys = {item.get('kid'): item for item in jwks.get('keys', []) if isinstance(item, dict)}
+            except Exception as e:
+                print(f'[AVISO] Nao foi possivel carregar o JWKS: {str(e)}')
+                keys = None
+
+            with self._lock:
+                # Marca a tentativa mesmo em caso de erro para nao refazer a cada requisicao
+                self._keys_fetched_at = time.monotonic()
+                if keys is not None:
+                    self._keys = keys
+                key = self._keys.get(kid)
+
+        return key
+
+    def _verify_asymmetric(self, token: str, header: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        try:
+            import jwt
+        except ImportError:
+            return None
+
+        jwk = self._signing_key(header.get('kid'))
+        if jwk is None:
+            return None
+
+        try:
+            key = jwt.PyJWK(jwk).key
+            return jwt.decode(
+                token,
+                key,
+                algorithms=[header['alg']],
+                options={'verify_aud': False, 'verify_exp': False},
+            )
+        except jwt.InvalidTokenError as e:
+            raise InvalidTokenError(str(e))
+
+    def _check_claims(self, claims: Dict[str, Any]) -> None:
+        now = time.time()
+
+        exp = claims.get('exp')
+        if not isinstance(exp, (int, float)) or exp + self.leeway < now:
+            raise InvalidTokenError('Token expirado')
+
+        nbf = claims.get('nbf')
+        if isinstance(nbf, (int, float)) and nbf - self.leeway > now:
+            raise InvalidTokenError('Token ainda nao valido')
+
+        if self.audience:
+            aud = claims.get('aud')
+            audiences = aud if isinstance(aud, list) else [aud]
+            if self.audience not in audiences:
+                raise InvalidTokenError('Audiencia invalida')
+
+        if self.issuer and claims.get('iss') != self.issuer:
+            raise InvalidTokenError('Emissor invalido')
+
+        if not claims.get('sub'):
+            raise InvalidTokenError('Token sem usuario')
+
+    def verify(self, token: str) -> Optional[Dict[str, Any]]:
+        """
+        Verifica o token localmente.
+
+        Returns:
+            Claims do token, ou None se nao ha chave/biblioteca para verificar localmente
+
+        Raises:
+            InvalidTokenError: token invalido, expirado ou de outra audiencia
+        """
+        header, claims, signature, signing_input = decode_unverified(token)
+        alg = header.get('alg')
+
+        if alg == 'HS256':
+            if self.hs_secret is None:
+                return None
+            expected = hmac.new(self.hs_secret, signing_input, hashlib.sha256).digest()
+            if not hmac.compare_digest(expected, signature):
+                raise InvalidTokenError('Assinatura invalida')
+        elif alg in ('RS256', 'ES256'):
+            verified = self._verify_asymmetric(token, header)
+            if verified is None:
+                return None
+            claims = verified
+        else:
+            return None
+
+        self._check_claims(claims)
+        return claims
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'hs256': self.hs_secret is not None,
+                'jwks_url': self.jwks_url,
+                'jwks_keys': len(self._keys),
+            }
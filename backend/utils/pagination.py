@@ -0,0 +1,82 @@
+"""
+Auxiliares de paginação sobre o PostgREST: keyset (cursor opaco) e leitura
+completa de tabelas em páginas
+"""
+import base64
+import json
+from typing import Any, Callable, Dict, List, Sequence
+
+# Linhas por página ao ler uma consulta inteira (max-rows padrão do PostgREST/Supabase)
+READ_ALL_PAGE_SIZE = 1000
+
+
+def encode_cursor(row: Dict[str, Any], keys: Sequence[str]) -> str:
+    """Cursor opaco com os valores da chave de ordenação da última linha da página"""
+    raw = json.dumps([row.get(key) for key in keys])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """
+    Valores da chave guardados no cursor
+
+    Valores "falsos" (0, "") são válidos; só null invalida o cursor (as
+    colunas da chave são NOT NULL, ver supabase/migrations/008).
+
+    Raises:
+        ValueError: cursor malformado ou com valores ausentes
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError, UnicodeError):
+        raise ValueError("cursor inválido")
+    if not isinstance(values, list) or len(values) != size or any(value is None for value in values):
+        raise ValueError("cursor inválido")
+    return values
+
+
+def quote_filter_value(value: Any) -> str:
+    """Aspas para valores com ':' '.' ',' dentro de filtros or=(...) do PostgREST"""
+    return '"' + str(value).replace('"', '\\"') + '"'
+
+
+def keyset_after_filter(columns: Sequence[str], values: Sequence[Any]) -> str:
+    """
+    Filtro or=(...) para "linhas depois do cursor" em ordem decrescente de todas as colunas
+
+    Example:
+        >>> keyset_after_filter(["created_at", "id"], ["2024-01-15T12:00:00", "uuid"])
+        'created_at.lt."2024-01-15T12:00:00",and(created_at.eq."2024-01-15T12:00:00",id.lt."uuid")'
+    """
+    quoted = [quote_filter_value(value) for value in values]
+    conditions = []
+    for index, column in enumerate(columns):
+        equals = [f"{columns[prefix]}.eq.{quoted[prefix]}" for prefix in range(index)]
+        condition = equals + [f"{column}.lt.{quoted[index]}"]
+        conditions.append(condition[0] if len(condition) == 1 else f"and({','.join(condition)})")
+    return ','.join(conditions)
+
+
+def fetch_all_rows(build_query: Callable[[], Any], page_size: int = READ_ALL_PAGE_SIZE) -> List[Dict[str, Any]]:
+    """
+    Todas as linhas de uma consulta, em páginas com .range()
+
+    O PostgREST corta respostas em max-rows sem avisar; aqui as páginas são
+    lidas até vir uma incompleta. build_query deve devolver uma consulta nova
+    a cada chamada, com ordem total (ex: .order('id')) para as páginas não se
+    sobreporem.
+
+    Example:
+        >>> rows = fetch_all_rows(lambda: supabase.table('transactions')
+        ...     .select('stock_id, quantity').eq('user_id', user_id).order('id'))
+    """
+    rows = []
+    offset = 0
+    while True:
+        response = build_query().range(offset, offset + page_size - 1).execute()
+        page = response.data or []
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+        offset += page_size
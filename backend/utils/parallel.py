@@ -0,0 +1,108 @@
+"""
+Execução paralela limitada com prazos por tarefa e prazo global
+"""
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional
+
+# Intervalo máximo entre verificações de prazo (segundos)
+_POLL_INTERVAL = 0.25
+
+
+def run_with_deadlines(
+    tasks: Dict[str, Callable[[], Any]],
+    max_workers: int = 8,
+    task_timeout: Optional[float] = None,
+    total_timeout: Optional[float] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Executa tarefas independentes em um pool de threads limitado
+
+    Args:
+        tasks: Dicionário {chave: função sem argumentos}
+        max_workers: Número máximo de tarefas executando ao mesmo tempo
+        task_timeout: Prazo (segundos) de cada tarefa a partir do seu início
+        total_timeout: Prazo (segundos) de toda a execução
+
+    Returns:
+        Dicionário {chave: {"status": ..., "result": ..., "error": ...}} onde status é:
+        - "ok": tarefa concluída (result contém o retorno)
+        - "error": tarefa lançou exceção (error contém a mensagem)
+        - "timeout": tarefa excedeu task_timeout
+        - "not_finished": prazo global atingido antes da tarefa terminar
+
+    Note:
+        Threads não podem ser interrompidas: tarefas que estouram o prazo continuam
+        rodando em segundo plano, mas o resultado delas é descartado e a chamada
+        retorna assim que o prazo é atingido (resultados parciais).
+
+    Example:
+        >>> results = run_with_deadlines({"PETR4": lambda: 1}, max_workers=4, total_timeout=5)
+        >>> results["PETR4"]["status"]
+        'ok'
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    if not tasks:
+        return results
+
+    started_at: Dict[str, float] = {}
+
+    def _wrap(key: str, func: Callable[[], Any]) -> Callable[[], Any]:
+        def runner():
+            started_at[key] = time.monotonic()
+            return func()
+        return runner
+
+    executor = ThreadPoolExecutor(max_workers=max(1, int(max_workers)))
+    overall_deadline = time.monotonic() + total_timeout if total_timeout else None
+
+    try:
+        future_to_key = {
+            executor.submit(_wrap(key, func)): key
+            for key, func in tasks.items()
+        }
+        pending = set(future_to_key)
+
+        while pending:
+            now = time.monotonic()
+            if overall_deadline is not None and now >= overall_deadline:
+                break
+
+            wait_timeout = _POLL_INTERVAL
+            if overall_deadline is not None:
+                wait_timeout = min(wait_timeout, overall_deadline - now)
+
+            done, pending = wait(pending, timeout=wait_timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                key = future_to_key[future]
+                try:
+                    results[key] = {"status": "ok", "result": future.result(), "error": None}
+                except Exception as e:
+                    results[key] = {"status": "error", "result": None, "error": str(e)}
+
+            if task_timeout:
+                now = time.monotonic()
+                for future in list(pending):
+                    key = future_to_key[future]
+                    start = started_at.get(key)
+                    if start is not None and now - start >= task_timeout:
+                        pending.discard(future)
+                        results[key] = {
+                            "status": "timeout",
+                            "result": None,
+                            "error": f"Tarefa excedeu {task_timeout}s"
+                        }
+
+        for future in pending:
+            future.cancel()
+            results[future_to_key[future]] = {
+                "status": "not_finished",
+                "result": None,
+                "error": "Prazo global atingido"
+            }
+    finally:
+        # Não espera threads em atraso: a requisição retorna com resultados parciais
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return results
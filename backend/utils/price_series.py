@@ -0,0 +1,105 @@
+"""
+Série de preços colunar (NumPy)
+Datas em datetime64[D] e preços em float64, ordenados por data e sem datas
+repetidas; recortes por período são busca binária e devolvem views (sem cópia)
+"""
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+def _normalize(dates: np.ndarray, prices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Ordena por data e mantém a última ocorrência de cada data"""
+    if len(dates) == 0:
+        return dates, prices
+
+    order = np.argsort(dates, kind='stable')
+    dates, prices = dates[order], prices[order]
+
+    keep = np.ones(len(dates), dtype=bool)
+    keep[:-1] = dates[1:] != dates[:-1]
+    if keep.all():
+        return dates, prices
+    return dates[keep], prices[keep]
+
+
+class PriceSeries:
+    """
+    Histórico de preços de uma ação em dois arrays paralelos
+
+    Example:
+        >>> series = PriceSeries.from_rows([
+        ...     {"date": "2024-01-15", "price": 28.5},
+        ...     {"date": "2024-01-16", "price": 28.75}
+        ... ])
+        >>> series.since(date(2024, 1, 16)).to_list()
+        [{'date': '2024-01-16', 'price': 28.75}]
+    """
+
+    __slots__ = ("dates", "prices")
+
+    def __init__(self, dates: np.ndarray, prices: np.ndarray):
+        self.dates = dates
+        self.prices = prices
+
+    @classmethod
+    def empty(cls) -> "PriceSeries":
+        return cls(np.empty(0, dtype='datetime64[D]'), np.empty(0, dtype=np.float64))
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, Any]]) -> "PriceSeries":
+        """Monta a série a partir de [{"date", "price"}], ignorando itens inválidos"""
+        raw_dates: List[str] = []
+        raw_prices: List[float] = []
+        for item in rows:
+            try:
+                price = float(item['price'])
+                day = str(item['date'])[:10]
+            except (KeyError, ValueError, TypeError):
+                continue
+            raw_dates.append(day)
+            raw_prices.append(price)
+
+        dates = np.array(raw_dates, dtype='datetime64[D]')
+        prices = np.array(raw_prices, dtype=np.float64)
+        return cls(*_normalize(dates, prices))
+
+    def merge(self, other: "PriceSeries") -> "PriceSeries":
+        """Nova série com os pontos das duas; em datas repetidas vence other"""
+        if len(other) == 0:
+            return self
+        if len(self) == 0:
+            return other
+        dates = np.concatenate((self.dates, other.dates))
+        prices = np.concatenate((self.prices, other.prices))
+        return PriceSeries(*_normalize(dates, prices))
+
+    def between(self, start: Optional[date] = None, end: Optional[date] = None) -> "PriceSeries":
+        """Pontos com start <= data <= end (views sobre os arrays originais)"""
+        lo = 0 if start is None else int(np.searchsorted(self.dates, np.datetime64(start, 'D'), side='left'))
+        hi = len(self.dates) if end is None else int(np.searchsorted(self.dates, np.datetime64(end, 'D'), side='right'))
+        return PriceSeries(self.dates[lo:hi], self.prices[lo:hi])
+
+    def since(self, start: date) -> "PriceSeries":
+        return self.between(start=start)
+
+    def last_days(self, range_days: int, today: Optional[date] = None) -> "PriceSeries":
+        """Pontos dos últimos range_days dias corridos (mesmo corte de get_prices_from_cache)"""
+        today = today or date.today()
+        return self.since(today - timedelta(days=range_days))
+
+    def latest(self) -> Optional[Tuple[date, float]]:
+        if len(self) == 0:
+            return None
+        return self.dates[-1].item(), float(self.prices[-1])
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """Formato das respostas da API: [{"date": "2024-01-15", "price": 28.5}, ...]"""
+        return [
+            {"date": day, "price": price}
+            for day, price in zip(self.dates.astype(str).tolist(), self.prices.tolist())
+        ]
+
+    def __len__(self) -> int:
+        return len(self.dates)
@@ -0,0 +1,109 @@
+"""
+Hub de publicação/assinatura em memória (por processo)
+Cada assinante tem uma fila própria; uma publicação é distribuída apenas
+para quem assina o tópico
+"""
+import queue
+import threading
+from typing import Any, Dict, Hashable, Iterable, Optional, Set
+
+
+class Subscription:
+    """Assinatura de um conjunto de tópicos; mensagens chegam em uma fila limitada"""
+
+    def __init__(self, topics: Iterable[Hashable], max_queue: int = 100):
+        self.topics = frozenset(topics)
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, int(max_queue)))
+        self.dropped = 0
+
+    def _put(self, message: Any) -> None:
+        # Assinante lento: descarta a mensagem mais antiga para não travar o publicador
+        while True:
+            try:
+                self._queue.put_nowait(message)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Any]:
+        """Próxima mensagem, ou None se nada chegar dentro do timeout"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class PubSubHub:
+    """
+    Distribui mensagens por tópico para todos os assinantes daquele tópico
+
+    Example:
+        >>> hub = PubSubHub("prices")
+        >>> sub = hub.subscribe(["uuid-petr4"])
+        >>> hub.publish("uuid-petr4", {"price": 30.5})
+        1
+        >>> sub.get(timeout=1)
+        {'price': 30.5}
+        >>> hub.unsubscribe(sub)
+    """
+
+    def __init__(self, name: str, max_queue: int = 100):
+        self.name = name
+        self.max_queue = max_queue
+        self._lock = threading.Lock()
+        self._subscribers: Dict[Hashable, Set[Subscription]] = {}
+        self.published = 0
+        self.delivered = 0
+
+    def subscribe(self, topics: Iterable[Hashable]) -> Subscription:
+        subscription = Subscription(topics, self.max_queue)
+        with self._lock:
+            for topic in subscription.topics:
+                self._subscribers.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            for topic in subscription.topics:
+                subscribers = self._subscribers.get(topic)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[topic]
+
+    def has_subscribers(self, topic: Hashable) -> bool:
+        with self._lock:
+            return topic in self._subscribers
+
+    def publish(self, topic: Hashable, message: Any) -> int:
+        """
+        Publica a mensagem no tópico
+
+        Returns:
+            Número de assinantes que receberam a mensagem
+        """
+        with self._lock:
+            subscribers = list(self._subscribers.get(topic, ()))
+            self.published += 1
+            self.delivered += len(subscribers)
+
+        for subscription in subscribers:
+            subscription._put(message)
+        return len(subscribers)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            subscriptions = set()
+            for subscribers in self._subscribers.values():
+                subscriptions.update(subscribers)
+            return {
+                "topics": len(self._subscribers),
+                "subscribers": len(subscriptions),
+                "published": self.published,
+                "delivered": self.delivered
+            }
@@ -0,0 +1,112 @@
+"""
+Mapa de identidade por requisição com carregamento em lote (estilo DataLoader)
+
+Dentro de um escopo (uma requisição HTTP), cada chave é buscada no máximo uma
+vez e chaves distintas pedidas juntas viram uma única consulta. Fora de um
+escopo, cada chamada usa um loader novo: nada é reaproveitado entre chamadas.
+"""
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional
+
+_MISSING = object()
+
+_scope: contextvars.ContextVar = contextvars.ContextVar('request_loader_scope', default=None)
+
+
+class BatchLoader:
+    """
+    Cache de chave -> registro com busca em lote das chaves ausentes
+
+    batch_fn recebe a lista de chaves não carregadas e devolve um dicionário
+    {chave: registro}; chaves ausentes do resultado ficam em cache como None.
+
+    Example:
+        >>> users = BatchLoader(lambda ids: fetch_users_by_id(ids))
+        >>> users.load_many(["u1", "u2"])   # uma consulta com in_
+        >>> users.load("u1")                # sem consulta
+    """
+
+    def __init__(self, batch_fn: Callable[[List[Hashable]], Dict[Hashable, Any]]):
+        self._batch_fn = batch_fn
+        self._values: Dict[Hashable, Any] = {}
+        self.batches = 0
+        self.hits = 0
+
+    def load(self, key: Hashable) -> Optional[Any]:
+        return self.load_many([key])[key]
+
+    def load_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Optional[Any]]:
+        """
+        Registros das chaves, buscando apenas as que ainda não estão em cache
+
+        Returns:
+            Dicionário {chave: registro ou None}, na ordem das chaves pedidas
+        """
+        keys = list(dict.fromkeys(keys))
+        pending = [key for key in keys if key not in self._values]
+        self.hits += len(keys) - len(pending)
+
+        if pending:
+            self.batches += 1
+            found = self._batch_fn(pending) or {}
+            for key in pending:
+                self._values[key] = found.get(key)
+
+        return {key: self._values[key] for key in keys}
+
+    def prime(self, key: Hashable, value: Any) -> None:
+        """Grava um registro já conhecido (ex: retorno de insert/update)"""
+        self._values[key] = value
+
+    def clear(self, key: Hashable = _MISSING) -> None:
+        """Descarta uma chave (ou todas) após uma escrita"""
+        if key is _MISSING:
+            self._values.clear()
+        else:
+            self._values.pop(key, None)
+
+    def clear_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        for key in [key for key in self._values if predicate(key)]:
+            del self._values[key]
+
+
+def get_loader(name: str, batch_fn: Callable[[List[Hashable]], Dict[Hashable, Any]]) -> BatchLoader:
+    """
+    Loader do escopo atual para o nome dado
+
+    O primeiro batch_fn registrado no escopo é o que vale; fora de um escopo
+    retorna um loader descartável.
+    """
+    loaders = _scope.get()
+    if loaders is None:
+        return BatchLoader(batch_fn)
+
+    loader = loaders.get(name)
+    if loader is None:
+        loader = loaders[name] = BatchLoader(batch_fn)
+    return loader
+
+
+def begin_request_scope() -> contextvars.Token:
+    return _scope.set({})
+
+
+def end_request_scope(token: contextvars.Token) -> None:
+    _scope.reset(token)
+
+
+@contextmanager
+def request_scope():
+    """
+    Abre um escopo de carregamento (usado pelo app em cada requisição)
+
+    Example:
+        >>> with request_scope():
+        ...     get_group(group_id, user_id)
+    """
+    token = begin_request_scope()
+    try:
+        yield
+    finally:
+        end_request_scope(token)
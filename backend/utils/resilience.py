@@ -0,0 +1,118 @@
+"""
+Primitivas de resiliência para clientes de APIs externas
+- backoff_delay: espera exponencial com jitter entre tentativas
+- CircuitBreaker: interrompe chamadas a um serviço que está falhando repetidamente
+"""
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class CircuitOpenError(Exception):
+    """Lançada quando o circuito está aberto e a chamada nem chega a ser feita"""
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 8.0) -> float:
+    """
+    Calcula a espera antes da próxima tentativa (exponencial com "full jitter")
+
+    Args:
+        attempt: Número da tentativa que falhou (0 = primeira)
+        base: Espera base em segundos
+        cap: Espera máxima em segundos
+
+    Returns:
+        Segundos a esperar, sorteado entre 0 e min(cap, base * 2^attempt)
+
+    Example:
+        >>> 0 <= backoff_delay(2, base=0.5, cap=8) <= 2.0
+        True
+    """
+    return random.uniform(0, min(cap, base * (2 ** max(0, attempt))))
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker simples (fechado -> aberto -> meio-aberto)
+
+    Após `failure_threshold` falhas consecutivas o circuito abre e as chamadas
+    são recusadas por `reset_timeout` segundos. Depois disso uma única chamada
+    de teste é liberada (meio-aberto): sucesso fecha o circuito, falha reabre.
+
+    Example:
+        >>> breaker = CircuitBreaker("brapi", failure_threshold=5, reset_timeout=30)
+        >>> breaker.before_call()
+        >>> breaker.record_success()
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self.rejected = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    def before_call(self) -> None:
+        """
+        Verifica se a chamada pode ser feita
+
+        Raises:
+            CircuitOpenError: Se o circuito está aberto (ou já há uma chamada de teste em andamento)
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            self.rejected += 1
+        raise CircuitOpenError(f"Circuito '{self.name}' aberto - chamada recusada")
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            state = self._current_state()
+            if state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if state != self.OPEN:
+                    self.times_opened += 1
+                    print(f"[AVISO] Circuito '{self.name}' aberto por {self.reset_timeout}s após {self._failures} falha(s)")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self._current_state(),
+                "consecutive_failures": self._failures,
+                "times_opened": self.times_opened,
+                "rejected": self.rejected
+            }
@@ -0,0 +1,83 @@
+"""
+Coalescência de chamadas concorrentes (single-flight)
+Chamadas simultâneas com a mesma chave compartilham uma única execução e o seu resultado
+"""
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+
+
+class SingleFlight:
+    """
+    Garante no máximo uma execução em andamento por chave
+
+    Example:
+        >>> flight = SingleFlight("brapi")
+        >>> flight.do(("PETR4", "3mo"), lambda: fetch("PETR4"))
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """
+        Executa func para a chave, ou espera a execução já em andamento
+
+        Args:
+            key: Identificador da operação (ex: (ticker, range))
+            func: Função sem argumentos que faz o trabalho
+
+        Returns:
+            Resultado de func (o mesmo objeto para todos os chamadores coalescidos)
+
+        Raises:
+            A mesma exceção lançada por func, para todos os chamadores
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            print(f"[SINGLE-FLIGHT] {self.name}: aguardando busca em andamento para {key}")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            # Remove antes de liberar: chamadas posteriores fazem uma busca nova
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+        return call.result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls)
+            }
@@ -0,0 +1,49 @@
+-- FinTracker: views com o preço e o dividendo mais recentes por ação
+--
+-- Como aplicar:
+-- 1. Supabase Dashboard → SQL Editor
+-- 2. Ou: supabase db push (com CLI configurado)
+--
+-- Usadas pelo backend para montar carteira/watchlist com UMA consulta
+-- (.in_('stock_id', ids)) ao invés de uma consulta por ação.
+
+-- ---------------------------------------------------------------------------
+-- Índices que tornam o DISTINCT ON por ação uma leitura de índice
+-- ---------------------------------------------------------------------------
+
+CREATE INDEX IF NOT EXISTS idx_stock_prices_stock_id_date_desc
+  ON public.stock_prices(stock_id, date DESC);
+
+CREATE INDEX IF NOT EXISTS idx_stock_dividends_stock_id_payment_date_desc
+  ON public.stock_dividends(stock_id, payment_date DESC);
+
+-- ---------------------------------------------------------------------------
+-- Preço mais recente por ação
+-- ---------------------------------------------------------------------------
+
+CREATE OR REPLACE VIEW public.latest_stock_prices
+WITH (security_invoker = true)
+AS
+  SELECT DISTINCT ON (stock_id)
+    stock_id,
+    price,
+    date
+  FROM public.stock_prices
+  ORDER BY stock_id, date DESC;
+
+-- ---------------------------------------------------------------------------
+-- Dividendo mais recente por ação
+-- ---------------------------------------------------------------------------
+
+CREATE OR REPLACE VIEW public.latest_stock_dividends
+WITH (security_invoker = true)
+AS
+  SELECT DISTINCT ON (stock_id)
+    stock_id,
+    value,
+    payment_date
+  FROM public.stock_dividends
+  ORDER BY stock_id, payment_date DESC;
+
+GRANT SELECT ON public.latest_stock_prices TO anon, authenticated, service_role;
+GRANT SELECT ON public.latest_stock_dividends TO anon, authenticated, service_role;
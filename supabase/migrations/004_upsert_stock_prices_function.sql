@@ -0,0 +1,52 @@
+-- FinTracker: UPSERT condicional de preços em uma única chamada
+--
+-- Como aplicar:
+-- 1. Supabase Dashboard → SQL Editor
+-- 2. Ou: supabase db push (com CLI configurado)
+--
+-- Usada por save_service.upsert_prices (supabase.rpc('upsert_stock_prices', ...)).
+-- Substitui o "SELECT dos preços existentes + UPSERT de tudo": o banco insere
+-- datas novas, atualiza só preços que mudaram e não toca nas linhas iguais.
+-- Aceita linhas de várias ações na mesma chamada.
+
+-- ---------------------------------------------------------------------------
+-- upsert_stock_prices(p_rows jsonb)
+--   p_rows: [{"stock_id": "uuid", "date": "2024-01-15", "price": 28.5}, ...]
+--   Retorna, por ação afetada, quantas linhas foram inseridas e atualizadas.
+--   Linhas sem mudança não aparecem (unchanged = enviadas - inseridas - atualizadas).
+-- ---------------------------------------------------------------------------
+
+CREATE OR REPLACE FUNCTION public.upsert_stock_prices(p_rows jsonb)
+RETURNS TABLE (stock_id uuid, inserted integer, updated integer)
+LANGUAGE sql
+SECURITY INVOKER
+AS $$
+  WITH incoming AS (
+    -- ON CONFLICT não pode tocar a mesma linha duas vezes: mantém a última ocorrência
+    SELECT DISTINCT ON (r.stock_id, r.date)
+      r.stock_id,
+      r.date,
+      r.price
+    FROM ROWS FROM (jsonb_to_recordset(p_rows) AS (stock_id uuid, date date, price numeric))
+      WITH ORDINALITY AS r(stock_id, date, price, ord)
+    ORDER BY r.stock_id, r.date, r.ord DESC
+  ),
+  written AS (
+    INSERT INTO public.stock_prices AS sp (stock_id, date, price, created_at)
+    SELECT i.stock_id, i.date, i.price, now()
+    FROM incoming i
+    ON CONFLICT (stock_id, date) DO UPDATE
+      SET price = EXCLUDED.price,
+          created_at = EXCLUDED.created_at
+      WHERE sp.price IS DISTINCT FROM EXCLUDED.price
+    RETURNING sp.stock_id, (xmax = 0) AS was_inserted
+  )
+  SELECT
+    w.stock_id,
+    COUNT(*) FILTER (WHERE w.was_inserted)::integer AS inserted,
+    COUNT(*) FILTER (WHERE NOT w.was_inserted)::integer AS updated
+  FROM written w
+  GROUP BY w.stock_id;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.upsert_stock_prices(jsonb) TO authenticated, service_role;
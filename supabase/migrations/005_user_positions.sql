@@ -0,0 +1,45 @@
+-- FinTracker: posições materializadas a partir das transações
+--
+-- Como aplicar:
+-- 1. Supabase Dashboard → SQL Editor
+-- 2. Ou: supabase db push (com CLI configurado)
+--
+-- Mantida por services/position_service.py (service role): cada transação
+-- criada/alterada/removida atualiza apenas a linha da ação afetada, com
+-- quantidade, custo médio e lucro realizado. O lucro não realizado é calculado
+-- na leitura, com o preço mais recente.
+
+-- ---------------------------------------------------------------------------
+-- user_positions: uma linha por (usuário, ação) com transações
+-- ---------------------------------------------------------------------------
+
+CREATE TABLE IF NOT EXISTS public.user_positions (
+  user_id uuid NOT NULL REFERENCES public.users(id) ON DELETE CASCADE,
+  stock_id uuid NOT NULL REFERENCES public.stocks(id) ON DELETE CASCADE,
+  quantity numeric NOT NULL DEFAULT 0,
+  average_cost numeric NOT NULL DEFAULT 0,
+  cost_basis numeric NOT NULL DEFAULT 0,
+  realized_pnl numeric NOT NULL DEFAULT 0,
+  transactions_count integer NOT NULL DEFAULT 0,
+  last_transaction_date timestamptz,
+  updated_at timestamptz NOT NULL DEFAULT now(),
+  PRIMARY KEY (user_id, stock_id)
+);
+
+-- transactions_count funciona como versão da linha: a atualização incremental
+-- só é aplicada se ninguém alterou a posição desde a leitura
+
+CREATE INDEX IF NOT EXISTS idx_transactions_user_id_stock_id_date
+  ON public.transactions(user_id, stock_id, date);
+
+-- ---------------------------------------------------------------------------
+-- RLS: o usuário lê as próprias posições; escrita apenas pelo backend
+-- ---------------------------------------------------------------------------
+
+ALTER TABLE public.user_positions ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY user_positions_select_own
+  ON public.user_positions
+  FOR SELECT
+  TO authenticated
+  USING (user_id = auth.uid());
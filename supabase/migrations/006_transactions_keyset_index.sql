@@ -0,0 +1,12 @@
+-- FinTracker: índice para a paginação de transações
+--
+-- Como aplicar:
+-- 1. Supabase Dashboard → SQL Editor
+-- 2. Ou: supabase db push (com CLI configurado)
+--
+-- list_transactions pagina por keyset em (date, created_at, id), do mais
+-- recente para o mais antigo. Com este índice cada página é uma leitura de
+-- índice a partir do cursor, independente do tamanho do histórico.
+
+CREATE INDEX IF NOT EXISTS idx_transactions_user_id_date_created_at_id_desc
+  ON public.transactions(user_id, date DESC, created_at DESC, id DESC);
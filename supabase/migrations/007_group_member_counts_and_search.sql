@@ -0,0 +1,44 @@
+-- FinTracker: contagem de membros em lote e busca/paginação de grupos públicos
+--
+-- Como aplicar:
+-- 1. Supabase Dashboard → SQL Editor
+-- 2. Ou: supabase db push (com CLI configurado)
+--
+-- Usadas por group_service.list_my_groups / list_public_groups: as contagens de
+-- todos os grupos da página vêm em UMA consulta (.in_('group_id', ids)) ao
+-- invés de um COUNT por grupo, e a descoberta pagina por (created_at, id) e
+-- busca por trecho do nome usando índices.
+
+-- ---------------------------------------------------------------------------
+-- Membros ativos por grupo
+-- ---------------------------------------------------------------------------
+
+CREATE INDEX IF NOT EXISTS idx_group_members_group_id_active
+  ON public.group_members(group_id)
+  WHERE status = 'active';
+
+CREATE OR REPLACE VIEW public.group_active_member_counts
+WITH (security_invoker = true)
+AS
+  SELECT
+    group_id,
+    COUNT(*)::integer AS active_member_count
+  FROM public.group_members
+  WHERE status = 'active'
+  GROUP BY group_id;
+
+GRANT SELECT ON public.group_active_member_counts TO authenticated, service_role;
+
+-- ---------------------------------------------------------------------------
+-- Descoberta: ordem (created_at DESC, id DESC) e busca ILIKE '%texto%' no nome
+-- ---------------------------------------------------------------------------
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_groups_discoverable_created_at_id
+  ON public.groups(created_at DESC, id DESC)
+  WHERE visibility IN ('publico', 'restrito');
+
+CREATE INDEX IF NOT EXISTS idx_groups_discoverable_name_trgm
+  ON public.groups USING gin (name gin_trgm_ops)
+  WHERE visibility IN ('publico', 'restrito');
@@ -0,0 +1,38 @@
+-- FinTracker: colunas das chaves de paginação sem NULL
+--
+-- Como aplicar:
+-- 1. Supabase Dashboard → SQL Editor
+-- 2. Ou: supabase db push (com CLI configurado)
+--
+-- Os cursores de list_transactions (date, created_at, id) e da descoberta de
+-- grupos (created_at, id) guardam os valores da última linha da página; um
+-- NULL geraria um cursor que a próxima requisição rejeita (e que nem teria
+-- filtro "menor que" válido). Preenche linhas antigas e proíbe NULL daqui
+-- em diante.
+
+-- ---------------------------------------------------------------------------
+-- transactions (migration 006)
+-- ---------------------------------------------------------------------------
+UPDATE public.transactions
+  SET created_at = COALESCE(date::timestamptz, now())
+  WHERE created_at IS NULL;
+
+UPDATE public.transactions
+  SET date = created_at
+  WHERE date IS NULL;
+
+ALTER TABLE public.transactions
+  ALTER COLUMN created_at SET DEFAULT now(),
+  ALTER COLUMN created_at SET NOT NULL,
+  ALTER COLUMN date SET NOT NULL;
+
+-- ---------------------------------------------------------------------------
+-- groups (migration 007)
+-- ---------------------------------------------------------------------------
+UPDATE public.groups
+  SET created_at = now()
+  WHERE created_at IS NULL;
+
+ALTER TABLE public.groups
+  ALTER COLUMN created_at SET DEFAULT now(),
+  ALTER COLUMN created_at SET NOT NULL;